@@ -0,0 +1,164 @@
+"""
+Parametric families of circuits for the benchmarks.
+
+Every generator takes the approximate number of elements of the circuit and
+returns a netlist record in the format read by batch.py::
+
+    {"name": "rc_ladder-1000", "origin": [...], "dest": [...],
+     "ele": [...], "val": [...], "input": "V1", "output": "V:C500"}
+
+The records are valid netlists for prog_tf.check_netlist_error: connected,
+without loops of voltage sources and with nodes numbered 1 .. n without gaps.
+The families are:
+
+- rc_ladder: a chain of series R and shunt C sections driven by one source
+
+- rlc_mesh: a square mesh with R along the rows, L along the columns and C
+  from every node to the reference node
+
+- resistor_grid: a square grid of equal resistors with one C at the far
+  corner, driven at the near corner
+
+- random_graph: a random spanning tree of resistors with random R, L and C
+  chords and several voltage sources, reproducible by its seed
+"""
+import numpy as np
+
+
+def _record(name, origin, dest, ele, val, output):
+    """Netlist record of a generated circuit driven by V1."""
+    return {'name': name, 'origin': [int(x) for x in origin],
+            'dest': [int(x) for x in dest], 'ele': list(ele),
+            'val': [float(x) for x in val], 'input': 'V1', 'output': output}
+
+
+def _side(size, per_node):
+    """Side of a square with about size elements, per_node for each node."""
+    return max(2, int(round(np.sqrt(size/float(per_node)))))
+
+
+def rc_ladder(size):
+    """
+    RC ladder of about size elements.
+
+    Node 1 is driven by V1 and every section adds R between node i and node
+    i+1 and C from node i+1 to the reference node. The output is the voltage
+    across the last C.
+    """
+    sections = max(1, (size - 1)//2)
+    origin, dest, ele, val = [1], [0], ['V1'], [1.0]
+    for i in range(1, sections + 1):
+        origin += [i, i + 1]
+        dest += [i + 1, 0]
+        ele += ['R' + str(i), 'C' + str(i)]
+        val += [1e3, 1e-6]
+    return _record('rc_ladder-' + str(size), origin, dest, ele, val,
+                   'V:C' + str(sections))
+
+
+def rlc_mesh(size):
+    """
+    RLC mesh of about size elements.
+
+    The k x k nodes are joined by R along the rows and by L along the columns,
+    and every node has a C to the reference node. V1 drives a corner and the
+    output is the current through the C at the opposite corner.
+    """
+    side = _side(size, 3)
+    origin, dest, ele, val = [1], [0], ['V1'], [1.0]
+    count = {'R': 0, 'L': 0, 'C': 0}
+
+    def add(kind, a, b, value):
+        count[kind] += 1
+        origin.append(a)
+        dest.append(b)
+        ele.append(kind + str(count[kind]))
+        val.append(value)
+    for i in range(side):
+        for j in range(side):
+            node = i*side + j + 1
+            if j + 1 < side:
+                add('R', node, node + 1, 10.0)
+            if i + 1 < side:
+                add('L', node, node + side, 1e-3)
+            if node > 1:
+                add('C', node, 0, 1e-6)
+    return _record('rlc_mesh-' + str(size), origin, dest, ele, val,
+                   'I:C' + str(count['C']))
+
+
+def resistor_grid(size):
+    """
+    Grid of about size equal resistors.
+
+    V1 drives the corner node 1 and a single C from the opposite corner to
+    the reference node is the output, so the transfer function stays of
+    first order whatever the size of the grid.
+    """
+    side = _side(size, 2)
+    origin, dest, ele, val = [1], [0], ['V1'], [1.0]
+    for i in range(side):
+        for j in range(side):
+            node = i*side + j + 1
+            for other in ((node + 1) if j + 1 < side else None,
+                          (node + side) if i + 1 < side else None):
+                if other is not None:
+                    origin.append(node)
+                    dest.append(other)
+                    ele.append('R' + str(len(ele)))
+                    val.append(1.0)
+    origin.append(side*side)
+    dest.append(0)
+    ele.append('C1')
+    val.append(1e-6)
+    return _record('resistor_grid-' + str(size), origin, dest, ele, val,
+                   'V:C1')
+
+
+def random_graph(size, sources=3, seed=0):
+    """
+    Random connected circuit of about size elements.
+
+    Parameters:
+
+    - size: approximate number of elements
+
+    - sources: number of voltage sources, each from its own node to the
+      reference node
+
+    - seed: seed of the random numbers, the same seed gives the same circuit
+
+    A quarter of the elements form a random spanning tree of resistors over
+    the nodes 0 .. n, so the circuit is connected. The other elements are
+    chords between random nodes, each an R, L or C with a value spread over
+    two decades, none of them across the nodes of two sources. The output is
+    the voltage across the last chord.
+    """
+    rng = np.random.RandomState(seed)
+    nodes = max(sources + 1, size//4)
+    origin, dest, ele, val = [], [], [], []
+    count = {'R': 0, 'L': 0, 'C': 0, 'V': 0}
+    base = {'R': 1e3, 'L': 1e-3, 'C': 1e-6}
+
+    def add(kind, a, b, value):
+        count[kind] += 1
+        origin.append(a)
+        dest.append(b)
+        ele.append(kind + str(count[kind]))
+        val.append(value)
+    for node in range(1, sources + 1):
+        add('V', node, 0, float(node))
+    for node in range(1, nodes + 1):
+        add('R', node, int(rng.randint(0, node)), base['R'])
+    while len(ele) < size:
+        a, b = rng.randint(0, nodes + 1, size=2)
+        if a == b or (a <= sources and b <= sources):
+            continue
+        kind = 'RLC'[rng.randint(3)]
+        add(kind, int(a), int(b), base[kind]*10**rng.uniform(-1, 1))
+    return _record('random_graph-' + str(size), origin, dest, ele, val,
+                   'V:' + ele[-1])
+
+
+FAMILIES = {'rc_ladder': rc_ladder, 'rlc_mesh': rlc_mesh,
+            'resistor_grid': resistor_grid, 'random_graph': random_graph}
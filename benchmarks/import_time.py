@@ -0,0 +1,100 @@
+"""
+Measure the time taken to import the solver core of prog_tf.
+
+Every measurement is made in a fresh interpreter, so that nothing is found
+in sys.modules or in the operating system's caches of the previous import
+other than what a new batch worker or test process also finds. The solver
+core is prog_tf without any of the Tkinter screens; for comparison the time
+is also measured with the GUI modules imported as well.
+
+The import of the solver core fails the benchmark if it loads any of the
+GUI, plotting or control modules, which are imported by prog_tf only when a
+screen is opened.
+
+Usage::
+
+    python benchmarks/import_time.py [-n REPEAT] [--core-only]
+
+The smallest and the median time of the repeats are printed in seconds.
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.path.pardir, "cc_params")
+GUI_MODULES = ('gui_input', 'gui_tf_io', 'gui_control', 'control',
+               'matplotlib', 'matplotlib.pyplot', 'Tkinter', 'tkinter')
+CORE = "import prog_tf"
+FULL = "import prog_tf, gui_input, gui_tf_io, gui_control"
+TIMER = """
+import sys, time
+sys.path.insert(0, %r)
+start = time.time()
+%s
+elapsed = time.time() - start
+loaded = [x for x in %r if x in sys.modules]
+sys.stdout.write(repr((elapsed, loaded)))
+"""
+
+
+def time_import(statement, repeat):
+    """
+    Time an import statement in fresh interpreters.
+
+    Parameters:
+
+    - statement: the import statement, executed with cc_params on sys.path
+
+    - repeat: number of interpreters started
+
+    Returns:
+
+    - times: elapsed time of every repeat in seconds
+
+    - loaded: the GUI_MODULES found in sys.modules after the last repeat
+    """
+    times, loaded = [], []
+    code = TIMER % (os.path.abspath(MODULE_PATH), statement, GUI_MODULES)
+    for x in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", code])
+        elapsed, loaded = ast.literal_eval(output.decode())
+        times.append(elapsed)
+    return times, loaded
+
+
+def summary(name, times):
+    """Line with the smallest and the median of the times."""
+    times = sorted(times)
+    return "%-6s min %.3f s  median %.3f s  (%d runs)" % (
+        name, times[0], times[len(times)//2], len(times))
+
+
+def main(argv=None):
+    """
+    Print the import times and check that the core loads no GUI module.
+
+    Returns the exit status: 1 if the solver core imported any of the
+    GUI_MODULES, else 0.
+    """
+    parser = argparse.ArgumentParser(description="Import time of the solver "
+                                     "core of prog_tf")
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help="number of fresh interpreters per measurement")
+    parser.add_argument('--core-only', action='store_true',
+                        help="do not measure the import with the GUI")
+    args = parser.parse_args(argv)
+    times, loaded = time_import(CORE, args.repeat)
+    print(summary("core", times))
+    if not args.core_only:
+        print(summary("gui", time_import(FULL, args.repeat)[0]))
+    if loaded:
+        print("solver core imported " + ", ".join(loaded))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
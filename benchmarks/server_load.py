@@ -0,0 +1,136 @@
+"""
+Load-test the HTTP solver of server.py on one machine.
+
+A server with JOBS worker processes is started on a free port of 127.0.0.1,
+unless --url names a server already running. CLIENTS threads then post
+REQUESTS records in all, taken in turn from DISTINCT RC ladders of
+circuits.py, so that identical records are in flight together and are
+coalesced by the server. The throughput, the percentiles of the latency and
+the counts of the server are printed.
+
+Usage::
+
+    python benchmarks/server_load.py [-n REQUESTS] [-c CLIENTS]
+                                     [-d DISTINCT] [-j JOBS] [--url URL]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from timeit import default_timer
+try:
+    from urllib2 import urlopen, Request
+except ImportError:
+    from urllib.request import urlopen, Request
+import circuits
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir, "cc_params"))
+import server
+
+
+def records(distinct):
+    """Records of distinct RC ladders asking for the roots as well."""
+    return [dict(circuits.rc_ladder(5 + 2*k), roots=True)
+            for k in range(distinct)]
+
+
+def post(url, record):
+    """Post a record to url/solve and return the decoded result."""
+    request = Request(url + "/solve", json.dumps(record).encode('utf-8'),
+                      {'Content-Type': 'application/json'})
+    return json.loads(urlopen(request).read().decode('utf-8'))
+
+
+def load(url, requests, clients, distinct):
+    """
+    Post requests records from clients threads.
+
+    Returns:
+
+    - latencies: sorted list of the seconds every request took
+
+    - elapsed: seconds taken by all the requests
+
+    - failed: number of results with an error
+    """
+    pool = records(distinct)
+    latencies, failed = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        while True:
+            with lock:
+                ind = next(counter, None)
+            if ind is None:
+                return
+            start = default_timer()
+            result = post(url, pool[ind % len(pool)])
+            with lock:
+                latencies.append(default_timer() - start)
+                failed[0] += 'error' in result
+    threads = [threading.Thread(target=client) for x in range(clients)]
+    start = default_timer()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), default_timer() - start, failed[0]
+
+
+def percentile(values, fraction):
+    """Value below which fraction of the sorted values lie."""
+    return values[min(len(values) - 1, int(fraction*len(values)))]
+
+
+def main(argv=None):
+    """
+    Run the load test and print its summary.
+
+    Returns the exit status: 1 if any result had an error, else 0.
+    """
+    parser = argparse.ArgumentParser(description="Load-test the HTTP solver "
+                                     "of server.py")
+    parser.add_argument('-n', '--requests', type=int, default=200,
+                        help="number of records posted in all")
+    parser.add_argument('-c', '--clients', type=int, default=8,
+                        help="number of client threads")
+    parser.add_argument('-d', '--distinct', type=int, default=10,
+                        help="number of different records")
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+                        help="number of worker processes of the server")
+    parser.add_argument('--url', default=None,
+                        help="URL of a running server, eg. "
+                        "http://127.0.0.1:8000")
+    args = parser.parse_args(argv)
+    httpd = pool = None
+    url = args.url
+    if url is None:
+        pool = server.Coalescing_pool(args.jobs)
+        httpd = server.Solver_server(('127.0.0.1', 0), pool, quiet=True)
+        thread = threading.Thread(target=httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+        url = "http://127.0.0.1:%d" % httpd.server_address[1]
+    try:
+        latencies, elapsed, failed = load(url, args.requests, args.clients,
+                                          args.distinct)
+        status = json.loads(urlopen(url + "/status").read().decode('utf-8'))
+    finally:
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
+            pool.close()
+    print("%d requests (%d errors) in %.3f s, %.1f requests/s" %
+          (len(latencies), failed, elapsed, len(latencies)/elapsed))
+    print("latency p50 %.3f s  p90 %.3f s  p99 %.3f s" %
+          (percentile(latencies, 0.5), percentile(latencies, 0.9),
+           percentile(latencies, 0.99)))
+    print("server: " + ", ".join("%s %s" % x for x in sorted(status.items())))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
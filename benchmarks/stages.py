@@ -0,0 +1,282 @@
+"""
+Time every stage of the solution of generated circuits.
+
+The circuits of the families in circuits.py are generated at every size and
+solved by the same steps as batch.exact_coefficients, timing each stage
+apart:
+
+- check_netlist_error: the element and graph checks
+
+- set_cond_matrix, set_volt_matrix, nodal_matrix: the nodal analysis
+  equations
+
+- solve_polynomial: the exact solution of the equations with the input
+  as the only source
+
+- polynomial_coefficients: the coefficients of the transfer function from
+  the exact solution
+
+- transfer_coefficients: the coefficients of tf_interp, computed numerically
+
+The exact solution grows too fast with the number of nodes to be timed for
+more than SYMBOLIC_LIMIT elements, and the numerical coefficients for more
+than NUMERIC_LIMIT; larger circuits only time the other stages.
+
+Every run appends one JSON line per family, size and stage to the history
+file. A stage is flagged as a regression if it took more than
+REGRESSION_RATIO times the median of its last HISTORY_RUNS runs with the same
+Python version, and the run then exits with status 1.
+
+Usage::
+
+    python benchmarks/stages.py [--sizes 10,100,1000] [--families rc_ladder]
+                                [--history FILE] [--no-record]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from timeit import default_timer
+import circuits
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir, "cc_params"))
+import batch
+import prog_tf as prog
+import tf_interp
+
+SIZES = (10, 100, 1000, 10000, 100000)
+SYMBOLIC_LIMIT = 10
+NUMERIC_LIMIT = 1000
+REPEAT = 3
+MIN_TIME = 0.5
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       "history.jsonl")
+HISTORY_RUNS = 5
+REGRESSION_RATIO = 1.5
+NOISE = 0.005
+
+
+def _netlist(record):
+    """The lists origin, dest, ele and val of a record."""
+    return record['origin'], record['dest'], record['ele'], record['val']
+
+
+def check_netlist_error(record, state):
+    """Element and graph checks, which must find no error."""
+    result = prog.check_netlist_error(*_netlist(record))
+    if result[0]:
+        raise ValueError(record['name'] + ": " + result[1])
+
+
+def set_cond_matrix(record, state):
+    """Conductance matrix."""
+    state['cond'], state['num_nodes'] = prog.set_cond_matrix(
+        *_netlist(record))
+
+
+def set_volt_matrix(record, state):
+    """Voltage source matrices."""
+    state['volt'], state['volt_t'], state['dep'] = prog.set_volt_matrix(
+        record['origin'], record['dest'], record['ele'], state['num_nodes'])
+
+
+def nodal_matrix(record, state):
+    """Nodal analysis equations."""
+    state['unknowns'], state['tot_mat'], state['rhs'] = prog.nodal_matrix(
+        state['cond'], state['volt'], record['val'], state['volt_t'],
+        state['num_nodes'], state['dep'].shape[1], record['ele'],
+        state['dep'])
+
+
+def solve_polynomial(record, state):
+    """
+    Exact solution of the nodal analysis equations for the input.
+
+    A singular matrix raises ValueError, which ends the run.
+    """
+    rhs = prog.input_rhs(state['unknowns'], state['rhs'], record['input'])
+    state['numerators'], state['denominator'] = prog.solve_polynomial(
+        state['unknowns'], state['tot_mat'], rhs)
+
+
+def polynomial_coefficients(record, state):
+    """Transfer function coefficients from the exact solution."""
+    ident, output_type = batch.parse_output_spec(record['output'])
+    prog.polynomial_coefficients(
+        state['numerators'], state['denominator'], record['origin'],
+        record['dest'], record['ele'], record['val'],
+        record['val'][record['ele'].index(record['input'])], ident,
+        output_type)
+
+
+def transfer_coefficients(record, state):
+    """Transfer function coefficients computed numerically."""
+    ident, output_type = batch.parse_output_spec(record['output'])
+    tf_interp.transfer_coefficients(record['origin'], record['dest'],
+                                    record['ele'], record['val'],
+                                    record['input'], ident, output_type)
+
+
+# Stages in the order they are run, with the largest number of elements for
+# which they are timed, None for no limit.
+STAGES = [(check_netlist_error, None), (set_cond_matrix, None),
+          (set_volt_matrix, None), (nodal_matrix, None),
+          (solve_polynomial, SYMBOLIC_LIMIT),
+          (polynomial_coefficients, SYMBOLIC_LIMIT),
+          (transfer_coefficients, NUMERIC_LIMIT)]
+
+
+def time_stages(record, repeat=REPEAT):
+    """
+    Time the stages for one circuit.
+
+    Parameters:
+
+    - record: netlist record of circuits.py
+
+    - repeat: largest number of times a stage is run, the stages are run
+      again only while they took less than MIN_TIME in all
+
+    Returns:
+
+    - list of (stage name, smallest time in seconds), for the stages within
+      their limit of elements
+    """
+    state, times = {}, []
+    elements = len(record['ele'])
+    for stage, limit in STAGES:
+        if limit is not None and elements > limit:
+            continue
+        best, total, count = None, 0.0, 0
+        while count < repeat and total < MIN_TIME:
+            start = default_timer()
+            stage(record, state)
+            elapsed = default_timer() - start
+            best = elapsed if best is None else min(best, elapsed)
+            total, count = total + elapsed, count + 1
+        times.append((stage.__name__, best))
+    return times
+
+
+def read_history(path):
+    """Records of the history file, an empty list if there is none."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as history:
+        return [json.loads(line) for line in history if line.strip()]
+
+
+def regressions(records, history, runs=HISTORY_RUNS,
+                ratio=REGRESSION_RATIO, noise=NOISE):
+    """
+    Find the stages that got slower than in the history.
+
+    Parameters:
+
+    - records: records of the current run
+
+    - history: records of the earlier runs, oldest first
+
+    - runs: number of earlier runs of a stage the median is taken over
+
+    - ratio: a stage is slower if it took more than ratio times the median
+
+    - noise: differences from the median below noise seconds are ignored
+
+    Returns:
+
+    - list of (record, median) for the slower stages
+    """
+    earlier = {}
+    for old in history:
+        key = (old['family'], old['size'], old['stage'], old['python'])
+        earlier.setdefault(key, []).append(old['seconds'])
+    slower = []
+    for new in records:
+        key = (new['family'], new['size'], new['stage'], new['python'])
+        times = sorted(earlier.get(key, [])[-runs:])
+        if not times:
+            continue
+        median = times[len(times)//2]
+        if new['seconds'] > ratio*median and \
+                new['seconds'] - median > noise:
+            slower.append((new, median))
+    return slower
+
+
+def _commit():
+    """Short hash of the checked out commit, None outside a git tree."""
+    try:
+        with open(os.devnull, 'w') as null:
+            output = subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], stderr=null,
+                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip()
+
+
+def run(families, sizes, repeat=REPEAT, out=sys.stdout):
+    """
+    Time the stages of every family at every size.
+
+    Returns the records of the run, one per family, size and stage.
+    """
+    stamp = datetime.datetime.now().isoformat()
+    commit, python = _commit(), platform.python_version()
+    records = []
+    for family in families:
+        for size in sizes:
+            record = circuits.FAMILIES[family](size)
+            for stage, seconds in time_stages(record, repeat):
+                records.append({'run': stamp, 'commit': commit,
+                                'python': python, 'family': family,
+                                'size': size,
+                                'elements': len(record['ele']),
+                                'stage': stage, 'seconds': seconds})
+                out.write("%-14s %7d %-24s %10.4f s\n" % (
+                    family, size, stage, seconds))
+                out.flush()
+    return records
+
+
+def main(argv=None):
+    """Run the benchmarks, record them and report the regressions."""
+    parser = argparse.ArgumentParser(description="Time the stages of the "
+                                     "solution of generated circuits")
+    parser.add_argument('--sizes', default=",".join(str(x) for x in SIZES),
+                        help="comma separated numbers of elements")
+    parser.add_argument('--families', default=",".join(
+                        sorted(circuits.FAMILIES)),
+                        help="comma separated families of circuits.py")
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help="largest number of times a stage is run")
+    parser.add_argument('--history', default=HISTORY,
+                        help="JSON lines file of the earlier runs")
+    parser.add_argument('--no-record', action='store_true',
+                        help="compare with the history without adding to it")
+    args = parser.parse_args(argv)
+    families = args.families.split(",")
+    for family in families:
+        if family not in circuits.FAMILIES:
+            parser.error("unknown family " + family)
+    sizes = [int(x) for x in args.sizes.split(",")]
+    records = run(families, sizes, args.repeat)
+    slower = regressions(records, read_history(args.history))
+    if not args.no_record:
+        with open(args.history, 'a') as history:
+            for record in records:
+                history.write(json.dumps(record, sort_keys=True) + "\n")
+    for record, median in slower:
+        print("REGRESSION %s %d %s: %.4f s, median %.4f s" % (
+            record['family'], record['size'], record['stage'],
+            record['seconds'], median))
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Numeric AC analysis of a netlist over a vector of frequencies.
+
+The descriptor system (G + s*C)x = B*u of mna.descriptor_system is stamped
+once and solved at s = j*omega for every frequency of interest. No symbolic
+transfer function is needed, so the response is free of the rounding of the
+coefficients done in prog_tf.polynomial_coefficients and the cost grows only
+with the size of the circuit and the number of frequencies.
+
+The transfer function is the ratio of the output to the selected voltage
+source, with all other voltage sources set to zero.
+"""
+import numpy as np
+import instrument
+import mna
+import ordering
+import pole_zero
+
+DENSE_LIMIT = 200
+CHUNK_BYTES = 64*1024*1024
+SLOW_STEPS = 30
+
+
+def slowest_rate(g, c, steps=SLOW_STEPS):
+    """
+    Estimate the size of the slowest natural frequency of a circuit.
+
+    Parameters:
+
+    - g: CSR matrix G of the descriptor system
+
+    - c: CSR matrix C of the descriptor system
+
+    - steps: number of steps of the power iteration
+
+    Returns:
+
+    - estimate of the smallest |s| of the poles in rad/s, or None if G is
+      singular or the iteration dies out
+
+    Method: The eigenvalues of G^-1 C are -1/s for the poles s, so the power
+    iteration x <- G^-1 C x, with one sparse factorization of G, grows as
+    1/|s| of the slowest pole. This is the collective mode of a long ladder
+    or mesh, far below the rate of any single node. The growth is averaged
+    over the second half of the steps, as a pair of complex poles makes it
+    oscillate.
+    """
+    try:
+        lu = ordering.Ordered_pencil(g, c).factor(0.0)
+    except RuntimeError:
+        return None
+    x = np.ones(g.shape[0])/np.sqrt(g.shape[0])
+    logs = []
+    for step in range(steps):
+        x = lu.solve(c.dot(x))
+        norm = np.linalg.norm(x)
+        if norm == 0 or not np.isfinite(norm):
+            return None
+        if 2*step >= steps:
+            logs.append(np.log(norm))
+        x = x/norm
+    return float(np.exp(-np.mean(logs)))
+
+
+def default_frequencies(g, c, num=500):
+    """
+    Choose a logarithmic frequency grid covering the dynamics of the circuit.
+
+    Parameters:
+
+    - g: CSR matrix G of the descriptor system
+
+    - c: CSR matrix C of the descriptor system
+
+    - num: number of frequencies
+
+    Returns:
+
+    - array of angular frequencies in rad/s
+
+    Method: For systems up to DENSE_LIMIT unknowns the poles are computed as
+    the finite generalized eigenvalues of (-G, C) by pole_zero. For larger
+    systems the corner frequencies are estimated from the diagonals: G/C for
+    capacitive nodes, R/L and 1/sqrt(LC) for inductors, using the median
+    node conductance and capacitance, and the slowest pole, which lies far
+    below these in a large ladder or mesh, by slowest_rate. The grid spans
+    two decades on either side.
+    """
+    if g.shape[0] <= DENSE_LIMIT:
+        poles = pole_zero.pencil_eigenvalues(g, c)
+        rates = list(np.abs(poles[poles != 0]))
+    else:
+        g_diag, c_diag = np.abs(g.diagonal()), np.abs(c.diagonal())
+        node_g = g_diag[g_diag > 0]
+        node_c = c_diag[(g_diag > 0) & (c_diag > 0)]
+        inductances = c_diag[(g_diag == 0) & (c_diag > 0)]
+        rates = []
+        if len(node_g) and len(node_c):
+            rates.extend(np.median(node_g)/node_c)
+        if len(node_g) and len(inductances):
+            rates.extend(1.0/(np.median(node_g)*inductances))
+        if len(node_c) and len(inductances):
+            rates.extend(1.0/np.sqrt(np.median(node_c)*inductances))
+        slowest = slowest_rate(g, c)
+        if slowest is not None and rates:
+            rates.append(slowest)
+    if not rates:
+        return np.logspace(-1, 5, num)
+    low = np.floor(np.log10(min(rates))) - 2
+    high = np.ceil(np.log10(max(rates))) + 2
+    return np.logspace(low, high, num)
+
+
+def solve_sweep(g, c, rhs, omega, dense_limit=DENSE_LIMIT, order='amd'):
+    """
+    Solve (G + j*omega*C)x = rhs for every angular frequency in omega.
+
+    Parameters:
+
+    - g: CSR matrix G of the descriptor system
+
+    - c: CSR matrix C of the descriptor system
+
+    - rhs: dense right hand side vector
+
+    - omega: array of angular frequencies in rad/s
+
+    - dense_limit: systems up to this size are solved as batched dense
+      systems, larger ones with a sparse LU factorization per frequency
+
+    - order: ordering of the unknowns for the sparse LU, one of
+      ordering.METHODS
+
+    Returns:
+
+    - complex array x of shape (len(omega), size)
+
+    Method: For small systems the matrices for a chunk of frequencies are
+    stacked into one array of shape (chunk, size, size) and handed to a
+    single batched numpy.linalg.solve call. The chunk is chosen so the stack
+    stays below CHUNK_BYTES. For the sparse LU the unknowns are reordered
+    once by ordering.Ordered_pencil, as G + j*omega*C has the same pattern
+    at every frequency.
+    """
+    omega = np.asarray(omega, dtype=np.float64)
+    size = g.shape[0]
+    x = np.empty((len(omega), size), dtype=np.complex128)
+    if size <= dense_limit:
+        g_dense, c_dense = g.toarray(), c.toarray()
+        chunk = max(1, int(CHUNK_BYTES // (16*size*size)))
+        for start in range(0, len(omega), chunk):
+            w = omega[start:start+chunk]
+            mats = g_dense[None, :, :] + 1j*w[:, None, None]*c_dense[None]
+            vecs = np.repeat(rhs[None, :, None], len(w), axis=0)
+            x[start:start+chunk] = np.linalg.solve(mats, vecs)[:, :, 0]
+    else:
+        pencil = ordering.Ordered_pencil(g, c, order)
+        for ind, w in enumerate(omega):
+            lu = pencil.factor(1j*w)
+            x[ind] = lu.solve(rhs.astype(np.complex128))
+    return x
+
+
+@instrument.timed(select=lambda result: None)
+def frequency_response(origin, dest, ele, val, input_source, ident,
+                       output_var, omega=None):
+    """
+    Compute the complex frequency response between an input and an output.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - input_source: identifier of the voltage source used as input, eg. V1
+
+    - ident: identifier of the element whose output parameter is asked
+
+    - output_var: I if current is demanded, else V
+
+    - omega: array of angular frequencies in rad/s, chosen by
+      default_frequencies if not given
+
+    Returns:
+
+    - response: complex array of the transfer function at every frequency
+
+    - omega: array of angular frequencies in rad/s
+    """
+    g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+    if omega is None:
+        omega = default_frequencies(g, c)
+    c0, c1 = mna.output_vectors(origin, dest, ele, val, unknowns, ident,
+                                output_var)
+    x = solve_sweep(g, c, b[:, int(input_source[1:])-1], omega)
+    response = x.dot(c0) + 1j*omega*x.dot(c1)
+    return response, np.asarray(omega)
+
+
+def bode(origin, dest, ele, val, input_source, ident, output_var,
+         omega=None):
+    """
+    Compute the Bode magnitude and phase of the transfer function.
+
+    Parameters are those of frequency_response.
+
+    Returns:
+
+    - mag: magnitude in dB
+
+    - phase: unwrapped phase in degrees
+
+    - omega: array of angular frequencies in rad/s
+    """
+    response, omega = frequency_response(origin, dest, ele, val,
+                                         input_source, ident, output_var,
+                                         omega)
+    mag = 20*np.log10(np.abs(response))
+    phase = np.degrees(np.unwrap(np.angle(response)))
+    return mag, phase, omega
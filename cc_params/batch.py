@@ -0,0 +1,400 @@
+"""
+Compute transfer functions of netlists without the Tkinter screens.
+
+The functions of prog_tf.py are called directly so that netlists can be solved
+on machines without a display, for example on a server or in CI. The same
+steps as prog_tf.main are followed: the netlist is checked for errors, the
+nodal analysis equations are set up and solved, and the coefficients of the
+transfer function between the selected input and output are computed. As
+everywhere in the package, the transfer function from an input is taken
+with all other voltage sources set to zero.
+
+A netlist record is a JSON object of the form::
+
+    {"name": "rlc", "origin": [1, 2, 3, 1], "dest": [2, 3, 0, 0],
+     "ele": ["R1", "L1", "C1", "V1"], "val": [10, 0.01, 1e-6, 10],
+     "input": "V1", "output": "V:C1"}
+
+A record may also hold "order": q, in which case the coefficients are those of
+the PRIMA reduced model of order q of reduction.py instead of the exact ones,
+as large RC and RLC networks cannot be solved symbolically.
+
+SPICE like netlist files (see spice_netlist.py) are also accepted, the input
+and output then being given on the command line. The output is written as
+JSON lines, one object per netlist, holding the numerator and denominator
+coefficients or the error message.
+
+Usage::
+
+    python batch.py [-j JOBS] [-o OUTPUT] [netlist.json ...]
+    python batch.py --input-source Vin --output-spec V:C1 netlist.cir
+    python batch.py --order 20 interconnect.json
+
+With no files, or with -, the records are read from the standard input. A JSON
+file may hold a single record or a list of records.
+"""
+import argparse
+import json
+import sys
+import time
+from multiprocessing import Pool
+import prog_tf as prog
+import reduction
+import spice_netlist
+import subckt
+import tf_cache
+
+SPICE_EXTENSIONS = ('.cir', '.sp', '.spi', '.net')
+
+
+def parse_output_spec(output_spec):
+    """
+    Split an output specification into element identifier and output type.
+
+    Parameters:
+
+    - output_spec: string such as V:C1 or I:R1, in the same format as the
+      values of the radio buttons of gui_tf_io.Output_selection
+
+    Returns:
+
+    - identifier of the element, for eg. C1
+
+    - output type, V for voltage across or I for current through the element
+    """
+    output_type, sep, ident = str(output_spec).partition(':')
+    if sep == '' or output_type not in ('V', 'I'):
+        raise ValueError("Output must be given as V:<element> or I:<element>")
+    return ident, output_type
+
+
+def check_netlist(origin, dest, ele, val, instances=()):
+    """
+    Raise ValueError with the message of prog_tf.check_netlist_error if the
+    netlist is erroneous.
+
+    Records are not entered through gui_input.Input_screen, so the lists
+    are first checked for what the screen guarantees: they have the same
+    length, the voltage sources are numbered V1, V2, .. without gaps, and
+    the instances are subckt.Instance objects, which JSON cannot hold.
+    """
+    if not len(origin) == len(dest) == len(ele) == len(val):
+        raise ValueError("origin, dest, ele and val must have the same "
+                         "length")
+    if any(not isinstance(x, subckt.Instance) for x in instances):
+        raise ValueError("instances must be subckt.Instance objects")
+    numbers = [x[1:] for x in ele if x[:1] == 'V']
+    if sorted(numbers) != sorted(str(k+1) for k in range(len(numbers))):
+        raise ValueError("Voltage sources must be numbered V1, V2, .. "
+                         "without gaps")
+    error_flag, error_msg = prog.check_netlist_error(origin, dest, ele, val,
+                                                     instances)
+    if error_flag == 1:
+        raise ValueError(error_msg)
+
+
+def nodal_equations(origin, dest, ele, val, instances=(), input_source=None):
+    """
+    Set up the nodal analysis equations of a netlist.
+
+    Returns unknowns, tot_mat and rhs as from prog_tf.nodal_matrix. If an
+    input_source is given, every other voltage source is set to zero in rhs
+    by prog_tf.input_rhs.
+    """
+    conductance, num_nodes = prog.set_cond_matrix(origin, dest, ele, val,
+                                                  instances)
+    voltage, voltage_trans, dep = prog.set_volt_matrix(origin, dest, ele,
+                                                       num_nodes)
+    unknowns, tot_mat, rhs = prog.nodal_matrix(conductance, voltage, val,
+                                               voltage_trans, num_nodes,
+                                               dep.shape[1], ele, dep)
+    if input_source is not None:
+        rhs = prog.input_rhs(unknowns, rhs, input_source)
+    return unknowns, tot_mat, rhs
+
+
+def solve_netlist(origin, dest, ele, val, instances=()):
+    """
+    Check and solve a netlist by nodal analysis.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - instances: list of subckt.Instance of subcircuits in the netlist
+
+    Returns:
+
+    - soln: dictionary containing solutions of the circuit unknowns
+
+    Raises ValueError with the message of prog_tf.check_netlist_error if the
+    netlist is erroneous, or Error in circuit if the nodal analysis matrix is
+    not invertible.
+    """
+    check_netlist(origin, dest, ele, val, instances)
+    try:
+        return prog.solve_circuit(*nodal_equations(origin, dest, ele, val,
+                                                   instances))
+    except ValueError:
+        raise ValueError("Error in circuit")
+
+
+def exact_coefficients(origin, dest, ele, val, input_source, ident,
+                       output_type, instances=()):
+    """
+    Compute the exact coefficients of the transfer function of a netlist.
+
+    The netlist is solved by prog_tf.solve_polynomial with input_source as
+    the only source, all others being zero as for tf_interp and ac_sweep,
+    and the coefficients are taken from the polynomials by
+    prog_tf.polynomial_coefficients, as the floating point solution of
+    solve_netlist would round them. Raises ValueError with Error in circuit
+    if the nodal analysis matrix is not invertible.
+    """
+    try:
+        numerators, denominator = prog.solve_polynomial(
+            *nodal_equations(origin, dest, ele, val, instances,
+                             input_source))
+    except ValueError:
+        raise ValueError("Error in circuit")
+    return prog.polynomial_coefficients(numerators, denominator, origin,
+                                        dest, ele, val,
+                                        val[ele.index(input_source)], ident,
+                                        output_type)
+
+
+def solve_transfer_function(netlist, input_source, output_spec,
+                            instances=(), order=None):
+    """
+    Compute the transfer function of a netlist without any user interaction.
+
+    Parameters:
+
+    - netlist: tuple of the lists (origin, dest, ele, val) as produced by
+      gui_input.Input_screen
+
+    - input_source: identifier of the voltage source used as input, eg. V1
+
+    - output_spec: output as V:<element> or I:<element>
+
+    - instances: list of subckt.Instance of subcircuits in the netlist
+
+    - order: order of the reduction.Reduced_model whose coefficients are
+      returned instead of the exact ones, None for the exact ones
+
+    Returns:
+
+    - num_coeffs: list of numerator coefficients in descending powers of s
+
+    - den_coeffs: list of denominator coefficients in descending powers of s
+
+    The exact coefficients are computed by exact_coefficients and looked up
+    in prog_tf.CACHE before, unless the netlist has subcircuits: the
+    canonical form used as key of the cache only holds the elements. The
+    port blocks of the subcircuits are cached by subckt.
+    """
+    origin, dest, ele, val = [list(x) for x in netlist]
+    ident, output_type = parse_output_spec(output_spec)
+    if input_source not in ele or not input_source.startswith('V'):
+        raise ValueError("Input must be one of the voltage sources")
+    if ident not in ele:
+        raise ValueError("Output element " + ident + " is not in netlist")
+    check_netlist(origin, dest, ele, val, instances)
+    if order is not None:
+        order = int(order)
+        if instances:
+            raise ValueError("Netlists with subcircuits cannot be reduced")
+
+        def reduce():
+            model = reduction.Reduced_model(origin, dest, ele, val,
+                                            order=order)
+            return model.transfer_coefficients(input_source, ident,
+                                               output_type)
+        return prog.CACHE.coefficients(origin, dest, ele, val, input_source,
+                                       ident, output_type, reduce,
+                                       method='prima' + str(order))
+    if instances:
+        num_coeffs, den_coeffs = exact_coefficients(
+            origin, dest, ele, val, input_source, ident, output_type,
+            instances)
+        return [float(a) for a in num_coeffs], [float(a) for a in den_coeffs]
+
+    def compute():
+        return exact_coefficients(origin, dest, ele, val, input_source, ident,
+                                  output_type)
+    num_coeffs, den_coeffs = prog.CACHE.coefficients(origin, dest, ele, val,
+                                                     input_source, ident,
+                                                     output_type, compute,
+                                                     method='exact')
+    return [float(a) for a in num_coeffs], [float(a) for a in den_coeffs]
+
+
+def solve_record(record):
+    """
+    Solve one netlist record and return the JSON serialisable result.
+
+    Errors in the record are reported in the error field of the result instead
+    of being raised, so one bad netlist does not stop a batch. A record that
+    is not a JSON object has an error as result. Errors that the checks of
+    check_netlist do not foresee are reported with the name of the exception.
+    """
+    if not isinstance(record, dict):
+        return {'name': None, 'error': "Record must be a JSON object"}
+    result = {'name': record.get('name')}
+    try:
+        netlist = (record['origin'], record['dest'], record['ele'],
+                   record['val'])
+        num, den = solve_transfer_function(netlist, record['input'],
+                                           record['output'],
+                                           record.get('instances', ()),
+                                           record.get('order'))
+        result['num'], result['den'] = num, den
+    except (KeyError, ValueError, TypeError) as err:
+        result['error'] = str(err)
+    except Exception as err:
+        result['error'] = "%s: %s" % (type(err).__name__, err)
+    return result
+
+
+def spice_record(path, netlist_file, input_source, output_spec):
+    """
+    Build a netlist record from a SPICE like netlist file.
+
+    The input source and the output element may be given by their names in
+    the file, for eg. Vin and V:Rload, and are mapped to the identifiers
+    assigned by spice_netlist.read_hierarchy. Subcircuit instances of the
+    file are kept in the instances field of the record.
+    """
+    origin, dest, ele, val, names, instances = \
+        spice_netlist.read_hierarchy(netlist_file)
+    record = {'name': path, 'origin': origin, 'dest': dest, 'ele': ele,
+              'val': val}
+    if instances:
+        record['instances'] = instances
+    if input_source is not None:
+        record['input'] = names.get(input_source.upper(), input_source)
+    if output_spec is not None:
+        output_type, sep, ident = output_spec.partition(':')
+        record['output'] = output_type + sep + names.get(ident.upper(),
+                                                         ident)
+    return record
+
+
+def read_records(paths, stdin=None, input_source=None, output_spec=None):
+    """
+    Read netlist records from JSON or SPICE netlist files.
+
+    Parameters:
+
+    - paths: list of file names, - stands for the standard input
+
+    - stdin: file object used for -, sys.stdin by default
+
+    - input_source: input used for SPICE netlists
+
+    - output_spec: output used for SPICE netlists
+
+    Yields:
+
+    - one netlist record (dictionary) at a time
+
+    Files ending in one of SPICE_EXTENSIONS are read with spice_netlist, all
+    other files and the standard input are read as JSON. Records that are
+    not JSON objects are yielded unchanged, to be reported by solve_record.
+    """
+    for path in paths or ['-']:
+        if path.lower().endswith(SPICE_EXTENSIONS):
+            with open(path) as netlist_file:
+                yield spice_record(path, netlist_file, input_source,
+                                   output_spec)
+            continue
+        if path == '-':
+            data = json.load(stdin or sys.stdin)
+        else:
+            with open(path) as netlist_file:
+                data = json.load(netlist_file)
+        if not isinstance(data, list):
+            data = [data]
+        for ind, record in enumerate(data):
+            if isinstance(record, dict) and record.get('name') is None:
+                record['name'] = path + '[' + str(ind) + ']'
+            yield record
+
+
+def use_cache(directory, max_bytes):
+    """
+    Give prog_tf.CACHE a disk tier in directory, if a directory is given.
+
+    Also used as initializer of the worker processes so that they share the
+    disk tier.
+    """
+    if directory:
+        prog.CACHE = tf_cache.Solution_cache(directory=directory,
+                                             max_bytes=max_bytes)
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Solves every netlist record, writes one JSON line per record and reports
+    the throughput in circuits per second on the standard error.
+    """
+    parser = argparse.ArgumentParser(description="Compute transfer functions "
+                                     "of netlists without the GUI.")
+    parser.add_argument('netlists', nargs='*',
+                        help="JSON netlist files, - for standard input")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument('-o', '--output', default='-',
+                        help="file for the JSON lines, - for standard output")
+    parser.add_argument('--input-source', default=None,
+                        help="input voltage source for SPICE netlists")
+    parser.add_argument('--output-spec', default=None,
+                        help="output as V:<element> or I:<element> for SPICE "
+                        "netlists")
+    parser.add_argument('--order', type=int, default=None,
+                        help="order of the PRIMA reduced model used for "
+                        "records that do not give one")
+    parser.add_argument('--cache-dir', default=None,
+                        help="directory of a persistent cache of solutions")
+    parser.add_argument('--cache-size', type=int, default=64,
+                        help="largest size of the cache directory in MB")
+    args = parser.parse_args(argv)
+    cache_args = (args.cache_dir, args.cache_size*1024*1024)
+    use_cache(*cache_args)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    records = read_records(args.netlists, input_source=args.input_source,
+                           output_spec=args.output_spec)
+    if args.order is not None:
+        records = (dict(record, order=record.get('order', args.order))
+                   if isinstance(record, dict) else record
+                   for record in records)
+    pool = Pool(args.jobs, use_cache, cache_args) if args.jobs > 1 else None
+    results = pool.imap(solve_record, records) if pool else \
+        (solve_record(record) for record in records)
+    count, failed, start = 0, 0, time.time()
+    for result in results:
+        out.write(json.dumps(result) + '\n')
+        count += 1
+        failed += 'error' in result
+    elapsed = time.time() - start
+    if pool:
+        pool.close()
+        pool.join()
+    if out is not sys.stdout:
+        out.close()
+    rate = count/elapsed if elapsed > 0 else float('inf')
+    sys.stderr.write("Solved %d circuits (%d errors) in %.3f s, "
+                     "%.1f circuits/s\n" % (count, failed, elapsed, rate))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Exact solution of linear equations whose entries are rational functions of s.
+
+The nodal analysis matrix holds entries such as g + c*s + l_inv/s. Solving it
+as a sympy Matrix of expressions builds nested quotients whose size explodes
+with the number of unknowns, and every unknown then has to be brought back to
+lowest terms. Here the equations are instead turned into a matrix of
+polynomials over the rationals QQ[s] and solved by Bareiss' fraction-free
+elimination, in which every division is exact:
+
+- every row, with its right hand side, is multiplied by the least common
+  multiple of the denominators of its entries, which leaves the solution
+  unchanged
+
+- the forward elimination computes
+
+      a_ij <- (a_kk*a_ij - a_ik*a_kj) / a_(k-1)(k-1)
+
+  so that every entry stays a minor of the matrix and its degree grows only
+  linearly; the last pivot is the determinant D, up to its sign
+
+- the back substitution computes y_i = D*x_i, which are polynomials by
+  Cramer's rule, with one more exact division by a_ii per unknown
+
+Every unknown is then the ratio y_i/D of two polynomials, with a common
+denominator. Only the ratio asked for is brought to lowest terms, with one
+polynomial gcd in lowest_terms, and no expression is ever simplified.
+"""
+from sympy import Poly, nsimplify
+
+
+def polynomial(expr, s):
+    """Poly in s over the rationals of a polynomial expression."""
+    return Poly(expr, s, domain='QQ')
+
+
+def polynomial_rows(mat, rhs, s):
+    """
+    Clear the denominators of a system of equations row by row.
+
+    Parameters:
+
+    - mat: (n x n) sympy Matrix of rational functions of s, with floating
+      point or rational coefficients
+
+    - rhs: (n x k) sympy Matrix of the right hand sides
+
+    - s: symbol of the rational functions
+
+    Returns:
+
+    - list of n rows, each a list of n + k Poly over QQ: the row of mat
+      followed by the row of rhs, multiplied by the least common multiple
+      of their denominators
+    """
+    rows = []
+    for i in range(mat.rows):
+        entries = [mat[i, j] for j in range(mat.cols)] + \
+            [rhs[i, j] for j in range(rhs.cols)]
+        fractions = []
+        for entry in entries:
+            num, den = nsimplify(entry, rational=True).as_numer_denom()
+            fractions.append((polynomial(num, s), polynomial(den, s)))
+        multiple = polynomial(1, s)
+        for num, den in fractions:
+            if not num.is_zero:
+                multiple = multiple.lcm(den)
+        rows.append([num*multiple.exquo(den) for num, den in fractions])
+    return rows
+
+
+def eliminate(rows, size):
+    """
+    Bring polynomial equations to upper triangular form without fractions.
+
+    Parameters:
+
+    - rows: list of rows of Poly as from polynomial_rows, changed in place
+
+    - size: number of unknowns, the entries beyond it being right hand sides
+
+    Returns:
+
+    - rows in upper triangular form, the last pivot being the determinant up
+      to its sign
+
+    Raises ValueError if the matrix is singular. The diagonal is used as
+    pivot unless it is zero, so that an ordering of the unknowns chosen
+    beforehand, as by ordering.permutation, is kept as far as possible.
+    """
+    previous = polynomial(1, rows[0][0].gen) if rows else None
+    for k in range(size):
+        pivot = k
+        while pivot < size and rows[pivot][k].is_zero:
+            pivot += 1
+        if pivot == size:
+            raise ValueError("Matrix det == 0; not invertible.")
+        rows[k], rows[pivot] = rows[pivot], rows[k]
+        top = rows[k]
+        for i in range(k+1, size):
+            row = rows[i]
+            factor = row[k]
+            for j in range(k+1, len(row)):
+                entry = top[k]*row[j]
+                if not factor.is_zero and not top[j].is_zero:
+                    entry = entry - factor*top[j]
+                row[j] = entry.exquo(previous)
+            row[k] = factor*0
+        previous = top[k]
+    return rows
+
+
+def solve(mat, rhs, s):
+    """
+    Solve mat*x = rhs exactly.
+
+    Parameters:
+
+    - mat: (n x n) sympy Matrix of rational functions of s
+
+    - rhs: (n x k) sympy Matrix of the right hand sides
+
+    - s: symbol of the rational functions
+
+    Returns:
+
+    - numerators: list of n lists of k Poly, numerators[i][j] being y_ij
+
+    - denominator: Poly D, so that x_ij = y_ij/D
+
+    Raises ValueError if mat is singular.
+    """
+    size = mat.rows
+    rows = eliminate(polynomial_rows(mat, rhs, s), size)
+    if not size:
+        return [], polynomial(1, s)
+    det = rows[-1][size-1]
+    numerators = [[None]*rhs.cols for _ in range(size)]
+    for col in range(rhs.cols):
+        for i in reversed(range(size)):
+            acc = det*rows[i][size+col]
+            for j in range(i+1, size):
+                if not rows[i][j].is_zero:
+                    acc = acc - rows[i][j]*numerators[j][col]
+            numerators[i][col] = acc.exquo(rows[i][i])
+    return numerators, det
+
+
+def lowest_terms(num, den):
+    """
+    Reduce the ratio of two Poly to lowest terms.
+
+    Returns the Poly num and den without common factor, normalized as
+    sympy.cancel normalizes a quotient over the rationals: integer
+    coefficients where the ratio allows and a positive leading coefficient
+    of the denominator.
+    """
+    if num.is_zero:
+        return num, polynomial(1, num.gen)
+    return num.cancel(den, include=True)
+
+
+def coefficients(num, den):
+    """
+    Coefficients of the ratio of two Poly in lowest terms.
+
+    Returns num_coeffs and den_coeffs in descending powers of s, rounded to
+    10 decimals, as the coefficients of the package always were.
+    """
+    num, den = lowest_terms(num, den)
+    return ([float(round(a, 10)) for a in num.all_coeffs()],
+            [float(round(a, 10)) for a in den.all_coeffs()])
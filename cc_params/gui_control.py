@@ -2,11 +2,109 @@
 
 If transfer function not a constant displays different plots such as Time
 Response, Bode, Nyquist as demanded by the user.
+
+The plots are drawn on a matplotlib figure embedded in the Tk window, not in
+separate pyplot windows. Each response is computed once, on the first click
+of its view, and its lines are kept on axes of their own; switching to a view
+drawn before only restores its rendered image. Dense responses are decimated
+to MAX_POINTS before they are drawn, keeping the extremes of every stretch.
 """
 import control
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import numpy as np
+import state_space
 import Tkinter as tk
-from Tkinter import Tk, Button, Radiobutton, StringVar
+from Tkinter import Tk, Button, Frame, Label, Radiobutton, StringVar
+try:
+    from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk \
+        as Toolbar
+except ImportError:
+    from matplotlib.backends.backend_tkagg import NavigationToolbar2TkAgg \
+        as Toolbar
+
+MAX_POINTS = 2000
+
+
+def decimate(x, y, max_points=MAX_POINTS):
+    """
+    Reduce a curve to about max_points points for drawing.
+
+    Parameters:
+
+    - x, y: arrays of the coordinates of the curve
+
+    - max_points: largest number of points kept
+
+    Returns:
+
+    - x, y: the curve itself if it is short enough, else its first and last
+      points with the smallest and the largest y of each of about
+      max_points/2 stretches of the curve, in their order along the curve
+
+    The drawn curve then still reaches every peak and dip of the original.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    edges = np.linspace(0, len(y), (max_points - 2)//2 + 1).astype(int)
+    keep = [0, len(y) - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        part = y[start:stop]
+        keep.extend((start + np.argmin(part), start + np.argmax(part)))
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+def frequency_grid(roots, num=500):
+    """
+    Choose the frequencies at which to draw a response.
+
+    Parameters:
+
+    - roots: sequence of arrays of the poles and zeros
+
+    - num: number of frequencies
+
+    Returns:
+
+    - array of angular frequencies in rad/s, logarithmic and spanning two
+      decades on either side of the nonzero roots, or 0.1 to 1e5 rad/s if
+      there are none
+    """
+    roots = np.concatenate([np.ravel(x) for x in roots] + [[]])
+    rates = np.abs(roots[roots != 0])
+    if len(rates):
+        return np.logspace(np.floor(np.log10(rates.min())) - 2,
+                           np.ceil(np.log10(rates.max())) + 2, num)
+    return np.logspace(-1, 5, num)
+
+
+def coefficient_response(numerator, denominator, num=500, roots=None):
+    """
+    Compute the frequency response of a transfer function.
+
+    Parameters:
+
+    - numerator, denominator: coefficients in descending powers of s
+
+    - num: number of frequencies
+
+    - roots: optional sequence of zeros and poles of the transfer function,
+      found from the coefficients if not given
+
+    Returns:
+
+    - freq_resp: complex array of the transfer function at every frequency
+
+    - omega: array of angular frequencies in rad/s from frequency_grid
+    """
+    if roots is None:
+        roots = (np.roots(numerator), np.roots(denominator))
+    omega = frequency_grid(roots, num)
+    freq_resp = np.polyval(numerator, 1j*omega) / \
+        np.polyval(denominator, 1j*omega)
+    return freq_resp, omega
 
 
 class Options():
@@ -19,14 +117,39 @@ class Options():
       prog_tf.py
     - denominator: denominator of the transfer function calculated in
       prog_tf.py
+    - response: optional tuple (frequency response, omega) computed
+      numerically by ac_sweep.frequency_response. If given, the Bode and
+      Nyquist plots are drawn from it instead of from the coefficients.
+    - transient: optional function without arguments returning (T, yout),
+      such as transient.step_response bound to the selection. If given, the
+      step response is simulated from the netlist with it.
+    - roots: optional tuple (zeros, poles, sign, log_gain) of
+      pole_zero.transfer_roots. If given, the poles and zeros are printed
+      with the transfer function, and the frequency grid drawn from the
+      coefficients spans them instead of the roots of the coefficients.
+    - realization: optional tuple (A, B, C, D) of
+      state_space.realization. If given, the system handed to the control
+      module is control.ss of it instead of control.tf of the coefficients,
+      which may then be None.
+    - note: optional text printed with the transfer function and shown
+      above the options, such as the estimated error of a reduced model.
 
     Options provided are time response, bode plot and nyquist plot.
     """
 
-    def __init__(self, numerator, denominator):
+    def __init__(self, numerator, denominator, response=None,
+                 transient=None, roots=None, realization=None, note=None):
         """Create a GUI window with title Control Parameter Options."""
         self.n = numerator
         self.d = denominator
+        self.response = response
+        self.transient = transient
+        self.roots = roots
+        self.realization = realization
+        self.note = note
+        self.views = {}
+        self.backgrounds = {}
+        self.current = None
         self.root = Tk()
         self.root.title('Control Parameter Options')
         self.displayoptions()
@@ -48,16 +171,35 @@ class Options():
 
             - Nyquist plot for which function nyq is called
 
-        Radio buttons are the input method for the user.
+        Radio buttons are the input method for the user. The plots are drawn
+        on a figure embedded beside them.
         """
-        self.sys = control.tf(self.n, self.d)
-        print("The transfer function of the system is: ")
-        print(self.sys)
-        if len(self.n) == 1 and len(self.d) == 1:
+        if self.realization is not None:
+            self.sys = control.ss(*self.realization)
+            constant = len(self.realization[0]) == 0
+        else:
+            self.sys = control.tf(self.n, self.d)
+            constant = len(self.n) == 1 and len(self.d) == 1
+        if self.n is not None:
+            print("The transfer function of the system is: ")
+            print(control.tf(self.n, self.d))
+        else:
+            print("The state space realization of the system is: ")
+            print(self.sys)
+        if self.roots is not None:
+            print("Zeros: " + np.array2string(self.roots[0], precision=6))
+            print("Poles: " + np.array2string(self.roots[1], precision=6))
+        if self.note is not None:
+            print(self.note)
+        if constant:
             print("Transfer function constant. Bye!!")
             self.close()
         else:
             self.v = StringVar()
+            if self.note is not None:
+                Label(self.root, text=self.note, wraplength=200,
+                      justify=tk.LEFT).grid(row=1, column=0, sticky=tk.W,
+                                            pady=4)
             Radiobutton(self.root, text="Step Response", variable=self.v,
                         value="step", command=self.step).grid(row=3, column=0,
                                                               sticky=tk.W,
@@ -74,69 +216,160 @@ class Options():
             Button(self.root, text='Exit',
                    command=self.close).grid(row=10, column=2,
                                             sticky=tk.W, pady=4)
+            self.embed_figure()
+
+    def embed_figure(self):
+        """
+        Embed an empty matplotlib figure and its toolbar in the window.
+
+        The rendered image of a view is saved after every full draw, and
+        the saved images are dropped when the window is resized.
+        """
+        frame = Frame(self.root)
+        frame.grid(row=0, column=1, rowspan=10, sticky=tk.NSEW)
+        self.root.grid_columnconfigure(1, weight=1)
+        self.root.grid_rowconfigure(9, weight=1)
+        self.figure = Figure(figsize=(7, 5))
+        self.canvas = FigureCanvasTkAgg(self.figure, master=frame)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH,
+                                         expand=1)
+        Toolbar(self.canvas, frame)
+        self.canvas.mpl_connect('draw_event', self.save_background)
+        self.canvas.mpl_connect('resize_event', self.drop_backgrounds)
+
+    def save_background(self, event):
+        """Keep the image of the view just drawn."""
+        if self.current is not None:
+            self.backgrounds[self.current] = self.canvas.copy_from_bbox(
+                self.figure.bbox)
+
+    def drop_backgrounds(self, event):
+        """Forget the images of the views, they no longer fit the canvas."""
+        self.backgrounds = {}
+
+    def frequency_response(self):
+        """
+        Return the frequency response and omega, computed once.
+
+        Taken from the response given to Options, else computed from the
+        realization by state_space.frequency_response over the eigenvalues
+        of A, or from the coefficients by coefficient_response over the
+        roots if given.
+        """
+        if self.response is None and self.realization is not None:
+            a, b, c, d = self.realization
+            omega = frequency_grid([np.linalg.eigvals(a)])
+            self.response = (state_space.frequency_response(a, b, c, d,
+                                                            omega), omega)
+        elif self.response is None:
+            roots = None if self.roots is None else self.roots[:2]
+            self.response = coefficient_response(self.n, self.d, roots=roots)
+        return self.response
+
+    def show(self, name, draw):
+        """
+        Show the view name, creating it with draw on its first use.
+
+        Parameters:
+
+        - name: name of the view
+
+        - draw: function without arguments adding the axes of the view to
+          the figure and returning them
+
+        The axes of the other views are hidden. A view that was drawn
+        before is shown by copying its saved image onto the canvas.
+        """
+        if name not in self.views:
+            self.views[name] = draw()
+        for view, axes in self.views.items():
+            for ax in axes:
+                ax.set_visible(view == name)
+        self.current = name
+        if name in self.backgrounds:
+            self.canvas.restore_region(self.backgrounds[name])
+            self.canvas.blit(self.figure.bbox)
+        else:
+            self.canvas.draw()
 
     def step(self):
         """
         Display step response of the system.
 
-        Uses the step_response function of control module to get two arrays
+        Uses the step_response function of control module on the
+        realization or the transfer function, or the transient simulation if
+        one was given, to get two arrays
 
         - T: timestamp against the response
 
         - yout: actual response data
 
-        They are then plotted using matplotlib
+        They are then plotted on the embedded figure.
         """
-        T, yout = control.step_response(self.sys)
-        plt.clf()
-        plt.figure(1)
-        plt.title("Step Response")
-        plt.grid()
-        plt.plot(T, yout)
-        plt.xlabel('Time(s)')
-        plt.ylabel('System Response')
-        plt.show()
+        def draw():
+            if self.transient is not None:
+                T, yout = self.transient()
+            else:
+                T, yout = control.step_response(self.sys)
+            ax = self.figure.add_subplot(1, 1, 1, label="step")
+            ax.set_title("Step Response")
+            ax.grid()
+            ax.plot(*decimate(T, np.ravel(yout)))
+            ax.set_xlabel('Time(s)')
+            ax.set_ylabel('System Response')
+            return [ax]
+        self.show("step", draw)
 
     def bode(self):
         """
         Display bode plot of the system.
 
-        uses the bode module of control.
+        Uses the numerical frequency response if one was given, else the
+        response computed from the coefficients.
         Plots **magnitude in dB** and **phase in degrees** with respect to the
         **Frequency in rad/s**.
         """
-        mag, phase, omega = control.bode(self.sys, dB=True)
-        plt.clf()
-        plt.figure(1)
-        plt.subplot(2, 1, 1)
-        plt.title("Magnitude Response")
-        plt.grid()
-        plt.plot(omega, mag, color='g')
-        plt.ylabel('Magnitude in dB')
-        plt.xlabel('Frequency in rad/s')
-        plt.subplot(2, 1, 2)
-        plt.title("Phase Response")
-        plt.plot(omega, phase, color='r')
-        plt.ylabel('Phase in degrees')
-        plt.xlabel('Frequency in rad/s')
-        plt.grid()
-        plt.tight_layout()
-        plt.show()
+        def draw():
+            freq_resp, omega = self.frequency_response()
+            mag = 20*np.log10(np.abs(freq_resp))
+            phase = np.degrees(np.unwrap(np.angle(freq_resp)))
+            top = self.figure.add_subplot(2, 1, 1, label="magnitude")
+            top.set_title("Magnitude Response")
+            top.grid()
+            top.plot(*decimate(omega, mag), color='g')
+            top.set_ylabel('Magnitude in dB')
+            top.set_xlabel('Frequency in rad/s')
+            bottom = self.figure.add_subplot(2, 1, 2, label="phase")
+            bottom.set_title("Phase Response")
+            bottom.plot(*decimate(omega, phase), color='r')
+            bottom.set_ylabel('Phase in degrees')
+            bottom.set_xlabel('Frequency in rad/s')
+            bottom.grid()
+            for ax in (top, bottom):
+                ax.set_xscale('log')
+            self.figure.subplots_adjust(hspace=0.5)
+            return [top, bottom]
+        self.show("bode", draw)
 
     def nyq(self):
         """
         Display Nyquist plot for the system.
 
-        Uses nyquist plotting functionality of the module control.
+        Plots the frequency response, numerical if one was given, and its
+        mirror image.
         """
-        plt.clf()
-        plt.figure(1)
-        real, imag, freq = control.nyquist(self.sys, Plot=True)
-        plt.title("Nyquist Plot")
-        plt.xlabel("Re($\omega$)")
-        plt.ylabel("Im($\omega$)")
-        plt.grid()
-        plt.show()
+        def draw():
+            freq_resp = self.frequency_response()[0]
+            real, imag = decimate(freq_resp.real, freq_resp.imag)
+            ax = self.figure.add_subplot(1, 1, 1, label="nyquist")
+            ax.plot(real, imag, 'b-')
+            ax.plot(real, -imag, 'r--')
+            ax.set_title("Nyquist Plot")
+            ax.set_xlabel(r"Re($\omega$)")
+            ax.set_ylabel(r"Im($\omega$)")
+            ax.grid()
+            return [ax]
+        self.show("nyquist", draw)
 
     def close(self):
         """
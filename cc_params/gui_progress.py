@@ -0,0 +1,143 @@
+"""
+Run a long computation in a worker process while the Tk window stays live.
+
+The solution of a large circuit can take minutes, most of it in sympy. A
+Worker_window starts the computation in a separate process and polls it with
+after() from the Tk loop, so the window keeps redrawing and shows the
+progress the computation reports. The Cancel button terminates the worker
+process, which also stops a sympy call that never returns; a thread could
+not be stopped there.
+
+The window is only shown if the computation takes longer than SHOW_AFTER_MS,
+so short computations do not flash a window.
+"""
+from multiprocessing import Process, Queue
+from Tkinter import Tk, Button, Label, StringVar
+import Tkinter as tk
+try:
+    from Queue import Empty
+except ImportError:
+    from queue import Empty
+
+POLL_MS = 100
+SHOW_AFTER_MS = 300
+
+
+def work(queue, task, args):
+    """
+    Body of the worker process.
+
+    Parameters:
+
+    - queue: multiprocessing Queue the outcome is sent back on
+
+    - task: function called as task(progress, *args), where progress is a
+      function of a message that sends the message back
+
+    - args: tuple of the further arguments of task
+
+    The messages are ('progress', message) while task runs, then
+    ('done', result) or ('error', message of the ValueError raised).
+    """
+    def progress(message):
+        queue.put(('progress', message))
+    try:
+        queue.put(('done', task(progress, *args)))
+    except ValueError as err:
+        queue.put(('error', str(err)))
+
+
+class Worker_window():
+    """
+    Window showing the progress of a computation in a worker process.
+
+    Parameters:
+
+    - title: title of the window
+
+    - task: function run in the worker as task(progress, *args). It must
+      be defined at the top level of a module, so that it can be handed to
+      the process, and its result must be picklable.
+
+    - args: tuple of the further arguments of task
+
+    After the window has closed, result holds the result of task, error the
+    message of a ValueError it raised and cancelled is True if the user
+    cancelled it. result is None unless the task was done.
+    """
+
+    def __init__(self, title, task, args=()):
+        """Start the worker and run the Tk loop until it has finished."""
+        self.result, self.error, self.cancelled = None, None, False
+        self.queue = Queue()
+        self.process = Process(target=work, args=(self.queue, task, args))
+        self.process.daemon = True
+        self.process.start()
+        self.root = Tk()
+        self.root.title(title)
+        self.root.withdraw()
+        self.message = StringVar()
+        self.message.set("Starting")
+        self.options()
+        self.root.after(SHOW_AFTER_MS, self.root.deiconify)
+        self.root.after(POLL_MS, self.poll)
+        self.root.mainloop()
+
+    def options(self):
+        """
+        Create the label for the progress and the Cancel button.
+
+        Closing the window also cancels the computation.
+        """
+        Label(self.root, textvariable=self.message,
+              width=50).grid(row=0, column=0, sticky=tk.W, padx=8, pady=8)
+        Button(self.root, text='Cancel',
+               command=self.cancel).grid(row=1, column=0, pady=4)
+        self.root.protocol("WM_DELETE_WINDOW", self.cancel)
+
+    def poll(self):
+        """
+        Take the messages of the worker, called by the Tk loop.
+
+        The progress messages are shown in the window, and the window is
+        closed once the outcome arrives or the worker has died without one.
+        """
+        try:
+            while True:
+                if self.handle(*self.queue.get_nowait()):
+                    return
+        except Empty:
+            pass
+        if not self.process.is_alive():
+            try:
+                while not self.handle(*self.queue.get(timeout=1)):
+                    pass
+            except Empty:
+                self.error = "The computation stopped unexpectedly"
+                self.finish()
+            return
+        self.root.after(POLL_MS, self.poll)
+
+    def handle(self, kind, value):
+        """Act on one message, return True if it was the outcome."""
+        if kind == 'progress':
+            self.message.set(value)
+            return False
+        if kind == 'done':
+            self.result = value
+        else:
+            self.error = value
+        self.finish()
+        return True
+
+    def cancel(self):
+        """Terminate the worker, called by the Cancel button."""
+        print("Computation cancelled")
+        self.cancelled = True
+        self.process.terminate()
+        self.finish()
+
+    def finish(self):
+        """Wait for the worker to end and close the window."""
+        self.process.join()
+        self.root.destroy()
@@ -4,7 +4,8 @@ Create GUI interface for user to select input and output for transfer function.
 Displays options to the user to select the input and output from the circuit
 to be considered for transfer function computation.
 """
-from Tkinter import Tk, Button, IntVar, StringVar, Label, Radiobutton
+from Tkinter import Tk, Button, IntVar, StringVar, Label, Radiobutton, \
+    Checkbutton, Entry
 import Tkinter as tk
 
 
@@ -19,9 +20,13 @@ class Input_selection():
 
     - number_of_options: number of voltage sources in circuit.
 
+    - order: order proposed for the reduced model of a circuit too large to
+      be solved whole, None if the circuit is not reduced. The order chosen
+      by the user is stored in order.
+
     """
 
-    def __init__(self, identifiers, values, number_of_options):
+    def __init__(self, identifiers, values, number_of_options, order=None):
         """
         Initialize Instance of class Input_selection.
 
@@ -31,6 +36,7 @@ class Input_selection():
         self.passive_element_list = identifiers
         self.element_values = values
         self.num_volt_sources = number_of_options
+        self.order = order
         self.root.title("Select your input for transfer function")
         self.options_input()
         self.root.mainloop()
@@ -41,7 +47,9 @@ class Input_selection():
 
         If there are *n* voltage sources in the circuit, *n* radiobuttons are
         given as optons to the user. The user can select any one and then
-        clicks on Confirm selection of input.
+        clicks on Confirm selection of input. A last option selects the matrix
+        of transfer functions from several sources to several outputs. If
+        the circuit is reduced, its order can be changed in an entry.
         """
         self.v = IntVar()
         Label(self.root, text="Options for input").grid(row=0, column=0,
@@ -50,13 +58,38 @@ class Input_selection():
             Radiobutton(self.root, text="V"+str(ind+1), variable=self.v,
                         value=ind+1).grid(row=ind+1, column=0, sticky=tk.W,
                                           pady=4)
+        Radiobutton(self.root, text="Transfer function matrix",
+                    variable=self.v, value=-1).grid(
+                        row=self.num_volt_sources+1, column=0, sticky=tk.W,
+                        pady=4)
+        if self.order is not None:
+            Label(self.root, text="Order of the reduced model").grid(
+                row=ind+3, column=0, sticky=tk.W, pady=4)
+            self.order_text = StringVar(value=str(self.order))
+            Entry(self.root, textvariable=self.order_text, width=6).grid(
+                row=ind+3, column=1, sticky=tk.W, pady=4)
         Button(self.root, text="Confirm selection of input",
                command=self.compute_val).grid(row=ind+4, column=0, sticky=tk.W,
                                               pady=4)
 
     def compute_val(self):
-        """Value of the voltage source selected by user is stored in inpval."""
-        ind = self.passive_element_list.index("V"+str(self.v.get()))
+        """
+        Value of the voltage source selected by user is stored in inpval.
+
+        The identifier of the source is stored in inp_identifier. Both are
+        None if the transfer function matrix was selected. An order that is
+        not a positive integer leaves the proposed one.
+        """
+        if self.order is not None:
+            text = self.order_text.get().strip()
+            if text.isdigit() and int(text) > 0:
+                self.order = int(text)
+        if self.v.get() == -1:
+            self.inp_identifier, self.inpval = None, None
+            self.root.destroy()
+            return
+        self.inp_identifier = "V"+str(self.v.get())
+        ind = self.passive_element_list.index(self.inp_identifier)
         self.inpval = self.element_values[ind]
         self.root.destroy()
 
@@ -119,3 +152,110 @@ class Output_selection():
         self.ele_identifier = l[1]
         self.output_type = l[0]
         self.root.destroy()
+
+
+class Matrix_selection():
+    """Class for creating GUI for selecting several inputs and outputs.
+
+    Parameters:
+
+    - identifiers: list of types of elements in the circuit.
+
+    - number_of_options: number of voltage sources in circuit.
+
+    """
+
+    def __init__(self, identifiers, number_of_options):
+        """
+        Initialize Instance of class Matrix_selection.
+
+        A GUI with title Select inputs and outputs for transfer functions is
+        created.
+        """
+        self.root = Tk()
+        self.element_list = identifiers
+        self.num_volt_sources = number_of_options
+        self.root.title("Select inputs and outputs for transfer functions")
+        self.options_matrix()
+        self.root.mainloop()
+
+    def options_matrix(self):
+        """
+        Inputs and outputs are selected by the user via checkbuttons.
+
+        Every voltage source can be checked as an input, and the voltage
+        across and current through every element as an output. All are
+        checked at first.
+        """
+        Label(self.root, text="Inputs").grid(row=0, column=0, sticky='news')
+        Label(self.root, text="Outputs").grid(row=0, column=1, columnspan=2,
+                                              sticky='news')
+        self.source_vars = []
+        for ind in range(self.num_volt_sources):
+            var = IntVar(value=1)
+            Checkbutton(self.root, text="V"+str(ind+1), variable=var).grid(
+                row=ind+1, column=0, sticky=tk.W, pady=4)
+            self.source_vars.append(("V"+str(ind+1), var))
+        self.output_vars = []
+        for ind in range(len(self.element_list)):
+            for col, (kind, text) in enumerate((("V", "Voltage across "),
+                                                ("I", "Current through "))):
+                var = IntVar(value=1)
+                Checkbutton(self.root, text=text+self.element_list[ind],
+                            variable=var).grid(row=ind+1, column=col+1,
+                                               sticky=tk.W, pady=4)
+                self.output_vars.append(((self.element_list[ind], kind),
+                                         var))
+        Button(self.root, text="Confirm selection",
+               command=self.matrix_selected).grid(
+                   row=max(self.num_volt_sources, len(self.element_list))+2,
+                   column=0, sticky=tk.W, pady=4)
+
+    def matrix_selected(self):
+        """
+        Store the inputs and outputs selected by user.
+
+        self.sources holds the identifiers of the checked voltage sources and
+        self.outputs a list of (identifier, output type) of the checked
+        outputs, eg. (R1, I) for the current through R1.
+        """
+        self.sources = [x for x, var in self.source_vars if var.get()]
+        self.outputs = [x for x, var in self.output_vars if var.get()]
+        self.root.destroy()
+
+
+class Matrix_display():
+    """Class for creating GUI showing a matrix of transfer functions.
+
+    Parameters:
+
+    - tfs: dictionary from (source, (identifier, output type)) to the
+      coefficients (num_coeffs, den_coeffs), as from tf_matrix.transfer_matrix
+
+    - sources: identifiers of the voltage sources, one column each
+
+    - outputs: list of (identifier, output type), one row each
+
+    """
+
+    def __init__(self, tfs, sources, outputs):
+        """
+        Initialize Instance of class Matrix_display.
+
+        A GUI with title Transfer function matrix is created.
+        """
+        self.root = Tk()
+        self.root.title("Transfer function matrix")
+        for col, source in enumerate(sources):
+            Label(self.root, text=source).grid(row=0, column=col+1,
+                                               sticky='news')
+        for row, output in enumerate(outputs):
+            Label(self.root, text=":".join(reversed(output))).grid(
+                row=row+1, column=0, sticky=tk.W)
+            for col, source in enumerate(sources):
+                num, den = tfs[(source, tuple(output))]
+                Label(self.root, text=str(num)+" / "+str(den)).grid(
+                    row=row+1, column=col+1, sticky=tk.W, padx=4)
+        Button(self.root, text="Close", command=self.root.destroy).grid(
+            row=len(outputs)+2, column=0, sticky=tk.W, pady=4)
+        self.root.mainloop()
@@ -0,0 +1,210 @@
+"""
+Re-solve a circuit after changes of element values by low-rank updates.
+
+While a circuit is tuned one element value changes at a time. A change of
+one R, L or C changes the descriptor matrix A(s) = G + s*C of
+mna.Descriptor_pattern in the rows and columns of at most two unknowns, so
+after a set of changes
+
+    A_new(s) = A(s) + P D(s) P^T
+
+where P selects the k unknowns touched so far and D(s) = dG + s*dC is a
+small dense (k x k) block. Incremental_solver keeps the sparse LU
+factorizations of A(s) at the points on a circle used by tf_interp, and
+finds the new solution and determinant by the Sherman-Morrison-Woodbury
+formula and the matrix determinant lemma:
+
+    x_new = x - W M^-1 D x[P],    det A_new = det A * det M
+
+with W = A^-1 P and M = I + D W[P]. Only the k columns of W need solves with
+the kept factorizations, each column once. The transfer function is then
+interpolated from the updated samples as in tf_interp.transfer_coefficients.
+
+All updates are taken relative to the factorized matrices. After MAX_UPDATES
+changes, or when the relative residual of the updated solution exceeds
+DRIFT_TOLERANCE, the matrices are factorized again.
+"""
+import numpy as np
+import mna
+import ordering
+import tf_interp
+
+MAX_UPDATES = 8
+DRIFT_TOLERANCE = 1e-10
+
+
+class Incremental_solver():
+    """
+    Transfer function of a netlist kept up to date under value changes.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - input_source: identifier of the voltage source used as input, eg. V1
+
+    - ident: identifier of the element whose output parameter is asked
+
+    - output_var: I if current is demanded, else V
+
+    - max_updates: number of value changes applied as updates before the
+      matrices are factorized again
+
+    - drift_tolerance: largest relative residual accepted for an updated
+      solution
+
+    Raises ValueError if the circuit equations are singular. The number of
+    times the matrices were factorized at all the points is counted in
+    factorizations.
+    """
+
+    def __init__(self, origin, dest, ele, val, input_source, ident,
+                 output_var, max_updates=MAX_UPDATES,
+                 drift_tolerance=DRIFT_TOLERANCE):
+        """Factorize the matrices at the points on the circle."""
+        self.origin, self.dest, self.ele = list(origin), list(dest), list(ele)
+        self.val = np.array(val, dtype=np.float64)
+        self.ident, self.output_var = ident, output_var
+        self.max_updates = max_updates
+        self.drift_tolerance = drift_tolerance
+        self.pattern = mna.Descriptor_pattern(origin, dest, ele)
+        self.b = self.pattern.b[:, int(input_source[1:])-1]
+        self.bound = tf_interp.degree_bound(ele)
+        self.points = tf_interp.sample_count(self.bound)
+        self.factorizations = 0
+        g, c = self.pattern.stamp(self.val)
+        self.pencil = ordering.Ordered_pencil(g, c)
+        self.rho = tf_interp.scale_estimate(g, c)
+        self.refactor()
+        ratio = tf_interp.radius_correction(self.scaled_coefficients()[1])
+        if ratio != 1.0:
+            self.rho *= ratio
+            self.refactor()
+
+    def refactor(self):
+        """
+        Factorize G + s*C for the current values at every point.
+
+        The solutions and determinants at the points become the base of
+        the following updates.
+        """
+        self.g, self.c = self.pattern.stamp(self.val)
+        self.pencil.update(self.g, self.c)
+        self.s_values = tf_interp.sample_points(self.rho, self.points)
+        try:
+            self.factors = [self.pencil.factor(s) for s in self.s_values]
+        except RuntimeError:
+            raise ValueError("Circuit equations are singular")
+        logs = np.array([lu.log_determinant() for lu in self.factors])
+        if not np.all(np.isfinite(logs[:, 1].real)):
+            raise ValueError("Circuit equations are singular")
+        logabs = logs[:, 1].real
+        self.base_den = logs[:, 0]*np.exp(logabs - np.max(logabs))
+        rhs = self.b.astype(np.complex128)
+        self.base_x = np.array([lu.solve(rhs) for lu in self.factors])
+        self.x, self.den = self.base_x, self.base_den
+        self.columns = {}
+        self.updates = 0
+        self.factorizations += 1
+        self._outputs()
+
+    def _outputs(self):
+        """Output vectors c0, c1 for the current values."""
+        self.c0, self.c1 = mna.output_vectors(
+            self.origin, self.dest, self.ele, self.val,
+            self.pattern.unknowns, self.ident, self.output_var)
+
+    def _column(self, index):
+        """Column index of A^-1 at every point, solved once per index."""
+        if index not in self.columns:
+            unit = np.zeros(self.pattern.size, dtype=np.complex128)
+            unit[index] = 1.0
+            self.columns[index] = np.array([lu.solve(unit)
+                                            for lu in self.factors])
+        return self.columns[index]
+
+    def _residual(self, g, c):
+        """Largest relative residual of x at the points for G and C."""
+        x = self.x.T
+        res = g.dot(x) + self.s_values*c.dot(x) - self.b[:, None]
+        scale = abs(g).dot(abs(x)) + np.abs(self.s_values)*abs(c).dot(abs(x))
+        scale += np.abs(self.b)[:, None]
+        return np.max(np.max(np.abs(res), axis=0)/np.max(scale, axis=0))
+
+    def set_value(self, ident, value):
+        """
+        Change the value of an element.
+
+        Parameters:
+
+        - ident: identifier of an R, L or C element
+
+        - value: its new value
+
+        Returns:
+
+        - num_coeffs, den_coeffs: the new transfer function, as from
+          transfer_function
+        """
+        self.val[self.ele.index(ident)] = value
+        self.updates += 1
+        if self.updates > self.max_updates:
+            self.refactor()
+            return self.transfer_function()
+        g, c = self.pattern.stamp(self.val)
+        d_g, d_c = (g - self.g).tocsr(), (c - self.c).tocsr()
+        d_g.eliminate_zeros()
+        d_c.eliminate_zeros()
+        touched = sorted(set(d_g.nonzero()[0]) | set(d_g.nonzero()[1]) |
+                         set(d_c.nonzero()[0]) | set(d_c.nonzero()[1]))
+        self._outputs()
+        if not touched:
+            self.x, self.den = self.base_x, self.base_den
+            return self.transfer_function()
+        w = np.stack([self._column(k) for k in touched], axis=2)
+        block = d_g[touched][:, touched].toarray()[None] + \
+            self.s_values[:, None, None]*d_c[touched][:, touched].toarray()
+        m = np.eye(len(touched)) + np.matmul(block, w[:, touched, :])
+        try:
+            y = np.linalg.solve(m, np.matmul(
+                block, self.base_x[:, touched, None]))
+        except np.linalg.LinAlgError:
+            self.refactor()
+            return self.transfer_function()
+        self.x = self.base_x - np.matmul(w, y)[:, :, 0]
+        self.den = self.base_den*np.linalg.det(m)
+        if self._residual(g, c) > self.drift_tolerance:
+            self.refactor()
+        return self.transfer_function()
+
+    def solution(self):
+        """
+        Solution of (G + s*C)x = B*u at the points on the circle.
+
+        Returns the points s and the array x of shape (points, unknowns),
+        with the unknowns ordered as in mna.Descriptor_pattern.unknowns.
+        """
+        return self.s_values, self.x
+
+    def scaled_coefficients(self):
+        """Coefficients of N and D in powers of s/rho, as in tf_interp."""
+        out = self.c0[None, :] + self.s_values[:, None]*self.c1[None, :]
+        num = self.den*np.sum(out*self.x, axis=1)
+        return tf_interp.scaled_coefficients(num, self.den, self.bound)
+
+    def transfer_function(self):
+        """
+        Coefficients of the transfer function for the current values.
+
+        Returns num_coeffs and den_coeffs in descending powers of s, with a
+        monic denominator, as tf_interp.transfer_coefficients does.
+        """
+        num_scaled, den_scaled = self.scaled_coefficients()
+        return tf_interp.unscaled_coefficients(num_scaled, den_scaled,
+                                               self.rho)
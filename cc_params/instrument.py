@@ -0,0 +1,313 @@
+"""
+Per phase measurements of the solution of a netlist.
+
+The stages of prog_tf and batch, and the steps inside them that can take
+long such as the LU solution, cancel and Poly, are marked as phases, either
+by the decorator timed around a function or by the context manager phase
+around a block. While a Report is active every phase records
+
+- seconds: wall time
+
+- peak_memory: peak of the memory allocated by Python during the phase, in
+  bytes, if the Report traces memory with tracemalloc
+
+- shape, nnz: dimensions and number of non-zero entries of the matrix the
+  phase produced
+
+- ops: size of the expressions it produced, counted by sympy.count_ops
+
+Phases inside phases are recorded with their depth. A Report can also run
+cProfile over everything it measures. With no active Report a phase only
+costs the check of the global ACTIVE, so the phases stay in the code.
+
+Usage::
+
+    with instrument.Report(memory=True, profile=True) as report:
+        batch.solve_transfer_function(netlist, "V1", "V:C1")
+    print(report.summary())
+    print(report.profile_stats(limit=10))
+
+tracemalloc is not available on Python 2, where peak_memory stays None. Before
+Python 3.9 the peak cannot be reset when a phase opens, so the peak of a
+phase may be that of an earlier phase.
+"""
+import cProfile
+import functools
+import pstats
+from timeit import default_timer
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+ACTIVE = None
+FIELDS = ('name', 'depth', 'seconds', 'peak_memory', 'shape', 'nnz', 'ops')
+
+
+def describe(value):
+    """
+    Return the size of a result of a phase.
+
+    Parameters:
+
+    - value: a sympy or numpy matrix, a scipy sparse matrix, a sympy
+      expression, a dictionary of solutions or a list of them
+
+    Returns:
+
+    - shape, nnz, ops: shape and number of non-zero entries of a matrix or
+      of the number of entries in a dictionary, and the sympy operation
+      count of the expressions, each None if it does not apply
+
+    sympy is only imported here, so that the numerical modules mark their
+    phases without importing it.
+    """
+    from sympy import count_ops
+    from sympy.matrices import MatrixBase
+    if isinstance(value, MatrixBase):
+        todok = getattr(value, 'todok', None)
+        entries = list(todok().values()) if todok else \
+            [x for x in value if x != 0]
+        return (tuple(value.shape), len(entries),
+                sum(count_ops(x) for x in entries))
+    if hasattr(value, 'nnz') and hasattr(value, 'shape'):
+        return tuple(value.shape), int(value.nnz), None
+    if hasattr(value, 'shape') and hasattr(value, 'nonzero'):
+        return tuple(value.shape), int(len(value.nonzero()[0])), None
+    if isinstance(value, dict):
+        return ((len(value),), len(value),
+                sum(count_ops(x) for x in value.values()))
+    if isinstance(value, (list, tuple)):
+        return (len(value),), None, sum(count_ops(x) for x in value)
+    if hasattr(value, 'free_symbols'):
+        return None, None, count_ops(value)
+    return None, None, None
+
+
+class Phase():
+    """
+    Measurements of one phase, the names of the attributes are in FIELDS.
+
+    Parameters:
+
+    - name: name of the phase
+
+    - depth: number of phases it runs inside
+    """
+
+    def __init__(self, name, depth):
+        """Phase not yet measured."""
+        self.name, self.depth = name, depth
+        self.seconds = self.peak_memory = None
+        self.shape = self.nnz = self.ops = None
+
+    def measure(self, value):
+        """Record the size of the value produced by the phase."""
+        self.shape, self.nnz, self.ops = describe(value)
+
+    def as_dict(self):
+        """Measurements as a dictionary of the FIELDS."""
+        return dict((x, getattr(self, x)) for x in FIELDS)
+
+
+class _Running():
+    """A phase while it runs, as returned by phase for an active Report."""
+
+    def __init__(self, report, name):
+        """Start measuring a phase of report."""
+        self.report = report
+        self.record = Phase(name, len(report.open))
+        report.phases.append(self.record)
+
+    def __enter__(self):
+        """Open the phase and start its clock."""
+        self.memory = self.report.memory_checkpoint(reset=True)
+        self.peak = self.memory
+        self.report.open.append(self)
+        self.start = default_timer()
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        """Stop the clock, record the memory and close the phase."""
+        self.record.seconds = default_timer() - self.start
+        self.report.memory_checkpoint()
+        self.report.open.pop()
+        if self.memory is not None:
+            self.record.peak_memory = self.peak - self.memory
+        return False
+
+    def measure(self, value):
+        """Record the size of the value produced by the phase."""
+        self.record.measure(value)
+
+
+class _Idle():
+    """The phase returned by phase without an active Report."""
+
+    def __enter__(self):
+        """Nothing is measured."""
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        """Nothing is measured."""
+        return False
+
+    def measure(self, value):
+        """Nothing is measured."""
+        pass
+
+
+_IDLE = _Idle()
+
+
+def phase(name):
+    """
+    Context manager marking a block as a phase.
+
+    The object returned by with has a method measure, to be called with the
+    value produced by the block. Without an active Report it does nothing.
+    """
+    if ACTIVE is None:
+        return _IDLE
+    return _Running(ACTIVE, name)
+
+
+def timed(name=None, select=None):
+    """
+    Decorator marking a function as a phase.
+
+    Parameters:
+
+    - name: name of the phase, the name of the function if None
+
+    - select: function picking the value that is measured from the value
+      returned, for eg. the matrix from a tuple; the returned value if None
+    """
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if ACTIVE is None:
+                return func(*args, **kwargs)
+            with _Running(ACTIVE, label) as running:
+                result = func(*args, **kwargs)
+                running.measure(result if select is None else select(result))
+            return result
+        return wrapper
+    return decorate
+
+
+class Report():
+    """
+    Structured report of the phases run while it is active.
+
+    Parameters:
+
+    - memory: trace the memory allocated in every phase with tracemalloc,
+      which slows down the phases considerably
+
+    - profile: run cProfile while the report is active
+
+    The report is active inside a with block, or between start and stop.
+    Only one Report is active at a time. The phases are kept in phases in
+    the order they started.
+    """
+
+    def __init__(self, memory=False, profile=False):
+        """Empty report."""
+        self.memory = memory and tracemalloc is not None
+        self.profiler = cProfile.Profile() if profile else None
+        self.phases, self.open = [], []
+        self._tracing = False
+
+    def start(self):
+        """Make this the active report."""
+        global ACTIVE
+        if ACTIVE is not None:
+            raise RuntimeError("Another Report is active")
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        ACTIVE = self
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def stop(self):
+        """Stop recording phases."""
+        global ACTIVE
+        if self.profiler is not None:
+            self.profiler.disable()
+        ACTIVE = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self):
+        """Start the report."""
+        return self.start()
+
+    def __exit__(self, kind, value, traceback):
+        """Stop the report."""
+        self.stop()
+        return False
+
+    def memory_checkpoint(self, reset=False):
+        """
+        Update the peaks of the open phases with the traced memory.
+
+        The peak of tracemalloc is reset when a phase opens, where possible,
+        so every phase sees its own peak and the open phases around it take
+        the largest of the peaks of their inner phases. Returns the memory
+        allocated now, None if memory is not traced.
+        """
+        if not self.memory:
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        for running in self.open:
+            running.peak = max(running.peak, peak)
+        if reset and hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        return current
+
+    def rows(self):
+        """Measurements of the phases as a list of dictionaries."""
+        return [x.as_dict() for x in self.phases]
+
+    def totals(self):
+        """Total seconds spent in every phase name, at any depth."""
+        total = {}
+        for x in self.phases:
+            total[x.name] = total.get(x.name, 0.0) + (x.seconds or 0.0)
+        return total
+
+    def summary(self):
+        """Text table of the phases, inner phases indented."""
+        lines = ["%-32s %10s %12s %-14s %8s %8s" % (
+            "phase", "seconds", "peak bytes", "shape", "nnz", "ops")]
+        for x in self.phases:
+            lines.append("%-32s %10.4f %12s %-14s %8s %8s" % (
+                "  "*x.depth + x.name, x.seconds or 0.0,
+                "-" if x.peak_memory is None else x.peak_memory,
+                "-" if x.shape is None else "x".join(str(n)
+                                                     for n in x.shape),
+                "-" if x.nnz is None else x.nnz,
+                "-" if x.ops is None else x.ops))
+        return "\n".join(lines)
+
+    def profile_stats(self, sort='cumulative', limit=20):
+        """
+        Text of the cProfile statistics, sorted by sort and cut after limit
+        functions. Raises ValueError if the report was made without profile.
+        """
+        if self.profiler is None:
+            raise ValueError("Report was made without profile")
+        out = StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats(sort).print_stats(
+            limit)
+        return out.getvalue()
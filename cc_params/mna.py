@@ -0,0 +1,351 @@
+"""
+Numeric stamping of the modified nodal analysis (MNA) matrices.
+
+The netlist is walked exactly once and the contribution of every element is
+stamped into sparse matrices. The conductance matrix of prog_tf.py is of the
+form
+
+    cond(s) = G + s*C + (1/s)*L_inv
+
+where G holds the conductances of the resistors, C the capacitances and L_inv
+the reciprocal inductances. Each of the three is kept as a scipy CSR matrix so
+that memory grows with the number of non-zero entries and not with the square
+of the number of nodes.
+"""
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from netlist import Netlist, RESISTOR, CAPACITOR
+
+
+def element_kinds(ele):
+    """
+    Return the type letter of each element identifier.
+
+    Parameters:
+
+    - ele: list of element identifiers such as R1, L2, C1, V1
+
+    Returns:
+
+    - numpy array holding the upper-case first letter of every identifier
+    """
+    return np.array([str(x)[:1].upper() for x in ele], dtype='U1')
+
+
+def _stamp(a, b, y, size):
+    """
+    Stamp two-terminal admittances into a sparse matrix.
+
+    Parameters:
+
+    - a: numpy array of origin nodes of the elements
+
+    - b: numpy array of destination nodes of the elements
+
+    - y: numpy array of admittance coefficients of the elements
+
+    - size: number of non-reference nodes
+
+    Returns:
+
+    - CSR matrix of shape (size, size)
+
+    Method: Every element contributes +y at (a, a) and (b, b) and -y at (a, b)
+    and (b, a). Stamps that touch the reference node 0 are dropped. The four
+    stamps of an element are laid out next to each other so duplicates are
+    summed in netlist order.
+    """
+    rows = np.column_stack((a, b, a, b)).ravel()
+    cols = np.column_stack((a, b, b, a)).ravel()
+    data = np.column_stack((y, y, -y, -y)).ravel()
+    keep = (rows != 0) & (cols != 0)
+    mat = coo_matrix((data[keep], (rows[keep]-1, cols[keep]-1)),
+                     shape=(size, size))
+    return mat.tocsr()
+
+
+def stamp_conductance(origin, dest, ele, val):
+    """
+    Stamp the sparse parts of the conductance matrix in a single pass.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    Returns:
+
+    - g: CSR matrix of resistor conductances
+
+    - c: CSR matrix of capacitances (coefficient of s)
+
+    - l_inv: CSR matrix of reciprocal inductances (coefficient of 1/s)
+
+    - num_nodes: number of nodes in the circuit
+
+    Method: Voltage sources are skipped, they are handled by set_volt_matrix.
+    Resistors stamp 1/R into g, capacitors stamp C into c and inductors stamp
+    1/L into l_inv, each type taken as a view of the netlist.Netlist arrays.
+    """
+    net = Netlist(origin, dest, ele, val)
+    parts = []
+    for kind in ('R', 'C', 'L'):
+        positions, a, b, values = net.of_type(kind)
+        if kind == 'C':
+            y = values
+        else:
+            y = 1.0/values
+        parts.append(_stamp(a, b, y, net.num_nodes))
+    g, c, l_inv = parts
+    return g, c, l_inv, net.num_nodes
+
+
+def nonzero_entries(*matrices):
+    """
+    Iterate over the union of the sparsity patterns of several matrices.
+
+    Parameters:
+
+    - matrices: CSR matrices of identical shape
+
+    Yields:
+
+    - (row, col) index followed by a tuple with the value of the entry in
+      each of the matrices (0.0 where a matrix has no entry)
+    """
+    entries = {}
+    for ind, mat in enumerate(matrices):
+        mat = mat.tocoo()
+        for row, col, value in zip(mat.row, mat.col, mat.data):
+            if value == 0:
+                continue
+            key = (int(row), int(col))
+            if key not in entries:
+                entries[key] = [0.0]*len(matrices)
+            entries[key][ind] = float(value)
+    for key in sorted(entries):
+        yield key, tuple(entries[key])
+
+
+CONSTANT, RECIPROCAL, PROPORTIONAL = 0, 1, 2
+
+
+class Descriptor_pattern():
+    """
+    Topology of the descriptor system (G + s*C)x = B*u of a netlist.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    The positions of all the stamps are worked out once. Every stamp is a
+    constant (incidence of branch currents), a reciprocal (1/R) or a multiple
+    (C, L) of an element value, so stamp() only has to evaluate these for a
+    new list of values and add them into the fixed sparsity pattern. This is
+    what makes repeated solves with changed values cheap.
+
+    x holds the node voltages V_1 .. V_n, the inductor currents I_L1 ..
+    and the voltage source currents I_V1 .. in that order.
+    """
+
+    def __init__(self, origin, dest, ele):
+        """Work out the position of every stamp of the netlist."""
+        net = Netlist(origin, dest, ele)
+        num_nodes = net.num_nodes
+        inductors = net.of_type('L')[0]
+        sources = net.sources()
+        self.size = num_nodes + len(inductors) + len(sources)
+        passive = np.nonzero((net.kind == RESISTOR) |
+                             (net.kind == CAPACITOR))[0]
+        a, b = net.origin[passive], net.dest[passive]
+        rows = np.column_stack((a, b, a, b)).ravel()
+        cols = np.column_stack((a, b, b, a)).ravel()
+        elem = np.repeat(passive, 4)
+        sign = np.tile([1.0, 1.0, -1.0, -1.0], len(passive))
+        keep = (rows != 0) & (cols != 0)
+        resistive = net.kind[elem] == RESISTOR
+        g_stamps = [self._stamps(rows-1, cols-1, elem, sign, RECIPROCAL,
+                                 keep & resistive)]
+        c_stamps = [self._stamps(rows-1, cols-1, elem, sign, PROPORTIONAL,
+                                 keep & ~resistive)]
+        branch_elem = np.concatenate((inductors, sources)).astype(np.int64)
+        branch = num_nodes + np.arange(len(branch_elem))
+        branch_sign = np.concatenate((np.ones(len(inductors)),
+                                      -np.ones(len(sources))))
+        for nodes, direction in ((net.origin, 1.0), (net.dest, -1.0)):
+            node = nodes[branch_elem].astype(np.int64)
+            keep = node != 0
+            constant = np.full(len(branch), -1, dtype=np.int64)
+            g_stamps.append(self._stamps(node-1, branch, constant,
+                                         branch_sign*direction, CONSTANT,
+                                         keep))
+            g_stamps.append(self._stamps(branch, node-1, constant,
+                                         np.full(len(branch), direction),
+                                         CONSTANT, keep))
+        ind_branch = branch[:len(inductors)]
+        c_stamps.append(self._stamps(ind_branch, ind_branch, inductors,
+                                     -np.ones(len(inductors)), PROPORTIONAL,
+                                     np.ones(len(inductors), dtype=bool)))
+        self.g_parts = self._compile(g_stamps)
+        self.c_parts = self._compile(c_stamps)
+        self.b = np.zeros((self.size, len(sources)))
+        self.b[num_nodes+len(inductors)+np.arange(len(sources)),
+               np.arange(len(sources))] = 1.0
+        self.unknowns = (['V_'+str(n) for n in range(1, num_nodes+1)] +
+                         ['I_'+net.ident[x] for x in inductors] +
+                         ['I_'+net.ident[x] for x in sources])
+
+    @staticmethod
+    def _stamps(rows, cols, elem, sign, func, keep):
+        """Select the stamps in keep as a tuple of arrays."""
+        return (np.asarray(rows, dtype=np.int64)[keep],
+                np.asarray(cols, dtype=np.int64)[keep],
+                np.asarray(elem, dtype=np.int64)[keep],
+                np.asarray(sign, dtype=np.float64)[keep],
+                np.full(int(np.sum(keep)), func, dtype=np.int64))
+
+    def _compile(self, stamps):
+        """
+        Turn groups of stamps into arrays and the fixed CSR structure.
+
+        Returns the element, sign and function code of every stamp, the
+        position of every stamp in the data array of the CSR matrix, and the
+        index arrays of that CSR matrix.
+        """
+        rows, cols, elem, sign, func = [np.concatenate(x) for x in
+                                        zip(*stamps)]
+        keys = rows*self.size + cols
+        unique_keys, position = np.unique(keys, return_inverse=True)
+        u_rows, u_cols = unique_keys // self.size, unique_keys % self.size
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(
+            u_rows, minlength=self.size))))
+        return (elem, sign, func, position,
+                (u_cols, indptr, len(unique_keys)))
+
+    def _matrix(self, parts, values):
+        """Evaluate the stamps of one matrix for the element values."""
+        elem, sign, func, position, (indices, indptr, nnz) = parts
+        contrib = sign.copy()
+        picked = values[np.maximum(elem, 0)] if len(elem) else contrib
+        contrib[func == RECIPROCAL] /= picked[func == RECIPROCAL]
+        contrib[func == PROPORTIONAL] *= picked[func == PROPORTIONAL]
+        data = np.bincount(position, weights=contrib, minlength=nnz)
+        return csr_matrix((data, indices, indptr), shape=(self.size,
+                                                          self.size))
+
+    def stamp(self, val):
+        """
+        Stamp the descriptor matrices for a list of element values.
+
+        Parameters:
+
+        - val: list of values of all the elements in the netlist
+
+        Returns:
+
+        - g: CSR matrix multiplying x
+
+        - c: CSR matrix multiplying s*x
+        """
+        values = np.asarray(val, dtype=np.float64)
+        return (self._matrix(self.g_parts, values),
+                self._matrix(self.c_parts, values))
+
+
+def descriptor_system(origin, dest, ele, val):
+    """
+    Stamp the netlist as a descriptor system (G + s*C)x = B*u.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    Returns:
+
+    - g: CSR matrix multiplying x
+
+    - c: CSR matrix multiplying s*x
+
+    - b: dense matrix with one unit column per voltage source
+
+    - unknowns: list of names of the unknowns in x
+
+    Method:
+
+    The stamps are laid out by Descriptor_pattern. x holds the node voltages
+    V_1 .. V_n, the inductor currents I_L1 .. and the voltage source currents
+    I_V1 .. in that order. Keeping the inductor currents as unknowns makes
+    every entry a polynomial of degree at most one in s, which is what
+    numerical solvers need. The voltage sources use the same signs as
+    set_volt_matrix so I_V matches the current computed by
+    prog_tf.check_circuit_error. Column k of b drives the source V(k+1) with
+    a unit voltage.
+    """
+    pattern = Descriptor_pattern(origin, dest, ele)
+    g, c = pattern.stamp(val)
+    return g, c, pattern.b.copy(), list(pattern.unknowns)
+
+
+def output_vectors(origin, dest, ele, val, unknowns, ident, output_var):
+    """
+    Express an output of the circuit in terms of the descriptor unknowns.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - unknowns: list of names of the unknowns from descriptor_system
+
+    - ident: identifier of the element whose output parameter is asked
+
+    - output_var: I if current is demanded, else V
+
+    Returns:
+
+    - c0, c1: dense vectors such that the output is (c0 + s*c1).x
+
+    Method: The voltage across an element is V_origin - V_destination, as in
+    prog_tf.output_tf_calc. The current through a resistor is that voltage
+    divided by R, through a capacitor it is s*C times that voltage, and for
+    inductors and voltage sources it is the branch current unknown.
+    """
+    net = Netlist(origin, dest, ele, val)
+    unknowns = list(unknowns)
+    c0, c1 = np.zeros(len(unknowns)), np.zeros(len(unknowns))
+    ind = net.index(ident)
+    kind = net.letter(ident)
+    across = np.zeros(len(unknowns))
+    if net.origin[ind] != 0:
+        across[unknowns.index('V_'+str(net.origin[ind]))] += 1.0
+    if net.dest[ind] != 0:
+        across[unknowns.index('V_'+str(net.dest[ind]))] -= 1.0
+    if output_var == 'V':
+        c0 = across
+    elif kind == 'R':
+        c0 = across/net.value[ind]
+    elif kind == 'C':
+        c1 = across*net.value[ind]
+    else:
+        c0[unknowns.index('I_'+ident)] = 1.0
+    return c0, c1
@@ -0,0 +1,224 @@
+"""
+Monte Carlo tolerance analysis of the transfer function of a netlist.
+
+The values of the passive elements are drawn at random around their nominal
+values, and for every sample the frequency response between the selected
+input and output is evaluated numerically. From each response the low
+frequency gain, the -3 dB frequency and the peak of the magnitude are
+extracted. The samples are split into chunks that are evaluated by a pool of
+worker processes.
+
+The topology is laid out once by mna.Descriptor_pattern; each sample only
+re-evaluates the stamps for its values.
+
+Tolerances are given per element identifier, either as a relative tolerance
+such as 0.05 for a uniform distribution within +-5 %, or as a tuple
+('normal', 0.05) for a normal distribution whose 3 sigma equals 5 %.
+"""
+from multiprocessing import Pool
+import numpy as np
+import ac_sweep
+import mna
+
+METRICS = ('gain_db', 'f3db', 'peak_db', 'peak_omega')
+
+
+def sample_values(ele, val, tolerances, samples, seed=None, default=None):
+    """
+    Draw random element values.
+
+    Parameters:
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of nominal values of all the elements in the netlist
+
+    - tolerances: dictionary from identifiers to tolerance specifications
+
+    - samples: number of samples
+
+    - seed: seed of the random number generator
+
+    - default: tolerance specification for the R, L and C elements missing
+      from tolerances, they keep their nominal value if None
+
+    Returns:
+
+    - array of shape (samples, number of elements); voltage sources always
+      keep their nominal value
+    """
+    rng = np.random.RandomState(seed)
+    values = np.tile(np.asarray(val, dtype=np.float64), (samples, 1))
+    for ind, ident in enumerate(ele):
+        spec = tolerances.get(ident, default)
+        if spec is None or str(ident).startswith('V'):
+            continue
+        if isinstance(spec, tuple):
+            kind, tol = spec
+        else:
+            kind, tol = 'uniform', spec
+        if kind == 'uniform':
+            factor = rng.uniform(-tol, tol, samples)
+        elif kind == 'normal':
+            factor = rng.normal(0.0, tol/3.0, samples)
+        else:
+            raise ValueError("Unknown distribution " + str(kind))
+        values[:, ind] *= 1.0 + factor
+    return values
+
+
+def response_metrics(response, omega):
+    """
+    Extract the figures of merit from a frequency response.
+
+    Parameters:
+
+    - response: complex frequency response
+
+    - omega: angular frequencies of the response in rad/s
+
+    Returns:
+
+    - gain_db: magnitude at the lowest frequency, the DC gain of low pass
+      responses
+
+    - f3db: first frequency in rad/s where the magnitude falls 3 dB below
+      gain_db, interpolated on the logarithmic frequency axis, nan if it
+      never does
+
+    - peak_db: largest magnitude
+
+    - peak_omega: frequency of the largest magnitude
+    """
+    mag = 20*np.log10(np.abs(response))
+    gain_db = mag[0]
+    below = np.nonzero(mag < gain_db - 3.0)[0]
+    if len(below) == 0 or below[0] == 0:
+        f3db = np.nan
+    else:
+        ind = below[0]
+        frac = (gain_db - 3.0 - mag[ind-1])/(mag[ind] - mag[ind-1])
+        log_w = np.log10(omega[ind-1:ind+1])
+        f3db = 10**(log_w[0] + frac*(log_w[1] - log_w[0]))
+    peak = np.argmax(mag)
+    return gain_db, f3db, mag[peak], omega[peak]
+
+
+def evaluate_chunk(args):
+    """
+    Evaluate the metrics of a chunk of samples in a worker process.
+
+    Parameters:
+
+    - args: tuple (origin, dest, ele, values, input_source, ident,
+      output_var, omega) where values holds one row per sample
+
+    Returns:
+
+    - array of shape (samples, len(METRICS))
+    """
+    origin, dest, ele, values, input_source, ident, output_var, omega = args
+    pattern = mna.Descriptor_pattern(origin, dest, ele)
+    rhs = pattern.b[:, int(input_source[1:])-1]
+    out = np.empty((len(values), len(METRICS)))
+    for ind, sample in enumerate(values):
+        g, c = pattern.stamp(sample)
+        c0, c1 = mna.output_vectors(origin, dest, ele, sample,
+                                    pattern.unknowns, ident, output_var)
+        x = ac_sweep.solve_sweep(g, c, rhs, omega)
+        out[ind] = response_metrics(x.dot(c0) + 1j*omega*x.dot(c1), omega)
+    return out
+
+
+def monte_carlo(origin, dest, ele, val, input_source, ident, output_var,
+                tolerances, samples=1000, seed=None, default=None,
+                omega=None, processes=None, chunk_size=100):
+    """
+    Run a Monte Carlo tolerance analysis.
+
+    Parameters:
+
+    - origin, dest, ele, val: the netlist with nominal values
+
+    - input_source: identifier of the voltage source used as input, eg. V1
+
+    - ident: identifier of the element whose output parameter is asked
+
+    - output_var: I if current is demanded, else V
+
+    - tolerances, seed, default: see sample_values
+
+    - samples: number of samples
+
+    - omega: frequency grid, chosen from the nominal circuit if None
+
+    - processes: number of worker processes, all processors if None and no
+      pool at all if 1
+
+    - chunk_size: number of samples handed to a worker at a time
+
+    Returns:
+
+    - dictionary of NumPy arrays with one entry per sample for each of
+      METRICS, plus values holding the sampled element values
+    """
+    values = sample_values(ele, val, tolerances, samples, seed, default)
+    if omega is None:
+        g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+        omega = ac_sweep.default_frequencies(g, c)
+    omega = np.asarray(omega, dtype=np.float64)
+    chunks = [(list(origin), list(dest), list(ele), values[x:x+chunk_size],
+               input_source, ident, output_var, omega)
+              for x in range(0, samples, chunk_size)]
+    if processes == 1:
+        parts = [evaluate_chunk(chunk) for chunk in chunks]
+    else:
+        pool = Pool(processes)
+        try:
+            parts = pool.map(evaluate_chunk, chunks)
+        finally:
+            pool.close()
+            pool.join()
+    metrics = np.concatenate(parts) if parts else \
+        np.empty((0, len(METRICS)))
+    results = dict((name, metrics[:, ind]) for ind, name in
+                   enumerate(METRICS))
+    results['values'] = values
+    return results
+
+
+def summary(results, percentiles=(1, 5, 50, 95, 99)):
+    """
+    Summarise the results of monte_carlo.
+
+    Returns:
+
+    - dictionary with, for every metric, the mean, standard deviation,
+      minimum, maximum and the given percentiles, ignoring nan samples
+    """
+    stats = {}
+    for name in METRICS:
+        data = results[name][np.isfinite(results[name])]
+        entry = {'count': len(data)}
+        if len(data):
+            entry.update(mean=float(np.mean(data)), std=float(np.std(data)),
+                         min=float(np.min(data)), max=float(np.max(data)))
+            for pct in percentiles:
+                entry['p' + str(pct)] = float(np.percentile(data, pct))
+        stats[name] = entry
+    return stats
+
+
+def yield_fraction(results, name, low=None, high=None):
+    """
+    Fraction of the samples whose metric lies within [low, high].
+
+    Samples where the metric is nan count as failures.
+    """
+    data = results[name]
+    passed = np.isfinite(data)
+    if low is not None:
+        passed &= data >= low
+    if high is not None:
+        passed &= data <= high
+    return float(np.mean(passed)) if len(data) else 0.0
@@ -0,0 +1,148 @@
+"""
+Compact storage of a netlist in NumPy arrays.
+
+The GUI and the SPICE reader produce four parallel Python lists: origin
+nodes, destination nodes, element identifiers and values. Netlist keeps the
+same information as
+
+- origin, dest: int32 arrays of node numbers
+
+- kind: uint8 array of type codes, the position of the type letter in
+  TYPE_LETTERS
+
+- value: float64 array of element values
+
+- ident: the identifier table, a list of the identifiers
+
+so that per-element work is done by vectorized NumPy operations instead of
+Python loops and string tests. The elements of one type are available as
+views into a copy of the arrays sorted by type, and the elements at a node
+through a compressed adjacency index; both are built on first use.
+"""
+import numpy as np
+
+TYPE_LETTERS = 'RLCV'
+RESISTOR, INDUCTOR, CAPACITOR, SOURCE = 0, 1, 2, 3
+UNKNOWN = 255
+
+
+def type_codes(ele):
+    """
+    Return the type code of each element identifier.
+
+    Parameters:
+
+    - ele: list of element identifiers such as R1, L2, C1, V1
+
+    Returns:
+
+    - uint8 array of the positions of the upper-case first letters in
+      TYPE_LETTERS, UNKNOWN for other letters
+    """
+    points = np.asarray(ele, dtype='U').astype('U1').view(np.uint32)
+    kind = np.full(len(points), UNKNOWN, dtype=np.uint8)
+    for code, letter in enumerate(TYPE_LETTERS):
+        kind[(points == ord(letter)) | (points == ord(letter.lower()))] = code
+    return kind
+
+
+class Netlist(object):
+    """
+    Netlist held in NumPy arrays.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    Every list may also be given as an array. val may be None for a netlist
+    used only for its topology.
+    """
+
+    __slots__ = ('origin', 'dest', 'kind', 'value', 'ident', 'num_nodes',
+                 '_by_type', '_adjacency')
+
+    def __init__(self, origin, dest, ele, val=None):
+        """Convert the lists to arrays."""
+        self.origin = np.asarray(origin, dtype=np.int32)
+        self.dest = np.asarray(dest, dtype=np.int32)
+        self.ident = list(ele)
+        self.kind = type_codes(self.ident)
+        if val is None:
+            self.value = np.ones(len(self.ident))
+        else:
+            self.value = np.asarray(val, dtype=np.float64)
+        self.num_nodes = int(max(self.origin.max(), self.dest.max())) \
+            if len(self.ident) else 0
+        self._by_type = None
+        self._adjacency = None
+
+    def __len__(self):
+        """Number of elements."""
+        return len(self.ident)
+
+    def index(self, ident):
+        """Position of an element identifier, ValueError if missing."""
+        return self.ident.index(ident)
+
+    def letter(self, ident):
+        """Type letter of an element, as in TYPE_LETTERS."""
+        code = self.kind[self.index(ident)]
+        return TYPE_LETTERS[code] if code != UNKNOWN else ''
+
+    def of_type(self, letter):
+        """
+        Return the elements of one type.
+
+        Parameters:
+
+        - letter: one of the letters of TYPE_LETTERS
+
+        Returns:
+
+        - positions, origin, dest, value: arrays of the elements of that type
+          in netlist order, all views into one array sorted by type
+        """
+        if self._by_type is None:
+            order = np.argsort(self.kind, kind='stable').astype(np.int32)
+            bounds = np.searchsorted(self.kind[order],
+                                     np.arange(len(TYPE_LETTERS) + 1))
+            self._by_type = (order, self.origin[order], self.dest[order],
+                             self.value[order], bounds)
+        order, origin, dest, value, bounds = self._by_type
+        code = TYPE_LETTERS.index(letter)
+        part = slice(bounds[code], bounds[code+1])
+        return order[part], origin[part], dest[part], value[part]
+
+    def sources(self):
+        """Positions of the voltage sources sorted by their number."""
+        positions = self.of_type('V')[0]
+        numbers = [int(self.ident[x][1:]) for x in positions]
+        return positions[np.argsort(numbers, kind='stable')]
+
+    def elements_at(self, node):
+        """
+        Positions of the elements connected to a node.
+
+        The first call builds an index of all nodes at once: the positions
+        sorted by node with an array of offsets, as in a CSR matrix.
+        """
+        if self._adjacency is None:
+            ends = np.concatenate((self.origin, self.dest))
+            order = np.argsort(ends, kind='stable')
+            elements = (order % len(self)).astype(np.int32)
+            offsets = np.searchsorted(ends[order],
+                                      np.arange(self.num_nodes + 2))
+            self._adjacency = (elements, offsets)
+        elements, offsets = self._adjacency
+        return elements[offsets[node]:offsets[node+1]]
+
+    def lists(self):
+        """The netlist as the four lists origin, dest, ele and val."""
+        return (self.origin.tolist(), self.dest.tolist(), list(self.ident),
+                self.value.tolist())
@@ -0,0 +1,249 @@
+"""
+Fill-reducing orderings of the unknowns of the nodal analysis equations.
+
+The unknowns are numbered in the order of the node labels typed by the user,
+which for meshes and grids is usually a poor order for elimination: every
+step of an LU factorization connects all remaining neighbours of the
+eliminated unknown, and the fill-in this creates grows with the bandwidth
+and the degrees of the order. Two orderings are offered:
+
+- rcm: reverse Cuthill-McKee, which reduces the bandwidth, from
+  scipy.sparse.csgraph
+
+- amd: approximate minimum degree, which eliminates next the unknown with
+  the fewest neighbours in the elimination graph. Degrees are kept in a heap
+  and only recomputed when an unknown reaches the top of the heap, so the
+  degrees used for the choice are upper bounds, not exact values.
+
+Both work on the symmetric pattern A + A^T of the matrix, and both are
+symmetric permutations, so the diagonal stays the diagonal and the solution
+is mapped back to the original unknowns by the inverse permutation.
+"""
+import heapq
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+from scipy.sparse.linalg import splu
+
+METHODS = ('natural', 'rcm', 'amd')
+
+
+def symmetric_pattern(mat):
+    """
+    Return the pattern of A + A^T without the diagonal as a CSR matrix.
+
+    Parameters:
+
+    - mat: square scipy sparse matrix or dense array
+    """
+    mat = csr_matrix(mat)
+    pattern = csr_matrix((np.ones(mat.nnz), mat.indices, mat.indptr),
+                         shape=mat.shape)
+    pattern = (pattern + pattern.T).tocsr()
+    pattern.setdiag(0)
+    pattern.eliminate_zeros()
+    return pattern
+
+
+def minimum_degree(pattern):
+    """
+    Order the unknowns by approximate minimum degree.
+
+    Parameters:
+
+    - pattern: symmetric CSR pattern, as from symmetric_pattern
+
+    Returns:
+
+    - array with the unknowns in elimination order
+
+    Method: The elimination graph is kept as a list of neighbour sets.
+    Eliminating an unknown joins all its neighbours into a clique. The heap
+    holds the degree of each unknown when it was last computed; an unknown
+    popped with a stale degree is pushed back with its current degree, so
+    the unknown eliminated has a degree no larger than the stored degrees of
+    all the others.
+    """
+    size = pattern.shape[0]
+    neighbours = [set(pattern.indices[pattern.indptr[x]:pattern.indptr[x+1]])
+                  for x in range(size)]
+    heap = [(len(neighbours[x]), x) for x in range(size)]
+    heapq.heapify(heap)
+    eliminated = np.zeros(size, dtype=bool)
+    order = []
+    while heap:
+        degree, x = heapq.heappop(heap)
+        if eliminated[x]:
+            continue
+        if degree != len(neighbours[x]):
+            heapq.heappush(heap, (len(neighbours[x]), x))
+            continue
+        eliminated[x] = True
+        order.append(x)
+        clique = neighbours[x]
+        for y in clique:
+            neighbours[y].discard(x)
+            neighbours[y].update(clique)
+            neighbours[y].discard(y)
+        neighbours[x] = set()
+    return np.array(order, dtype=np.int64)
+
+
+def permutation(mat, method='amd'):
+    """
+    Compute a fill-reducing symmetric permutation of a matrix.
+
+    Parameters:
+
+    - mat: square scipy sparse matrix or dense array
+
+    - method: one of METHODS
+
+    Returns:
+
+    - perm: array such that mat[perm][:, perm] is the reordered matrix, and
+      unknown perm[k] of the original order is unknown k of the new one
+    """
+    if method not in METHODS:
+        raise ValueError("Unknown ordering " + str(method))
+    size = mat.shape[0]
+    if method == 'natural' or size == 0:
+        return np.arange(size)
+    pattern = symmetric_pattern(mat)
+    if method == 'rcm':
+        return np.asarray(reverse_cuthill_mckee(pattern,
+                                                symmetric_mode=True),
+                          dtype=np.int64)
+    return minimum_degree(pattern)
+
+
+def inverse(perm):
+    """Inverse of a permutation: position of every unknown in perm."""
+    inv = np.empty(len(perm), dtype=np.int64)
+    inv[perm] = np.arange(len(perm))
+    return inv
+
+
+def descriptor_permutation(g, c, method='amd'):
+    """
+    Compute the ordering of the unknowns of a descriptor system.
+
+    Parameters:
+
+    - g: CSR matrix G of the descriptor system
+
+    - c: CSR matrix C of the descriptor system
+
+    - method: one of METHODS
+
+    Returns:
+
+    - perm: permutation for every matrix G + s*C, as from permutation
+
+    The pattern of |G| + |C| holds the pattern of G + s*C for every s, so the
+    ordering is computed once and used for all frequencies or time steps.
+    """
+    return permutation(abs(g) + abs(c), method)
+
+
+def parity(perm):
+    """Sign of a permutation given as an index array."""
+    seen = np.zeros(len(perm), dtype=bool)
+    sign = 1
+    for start in range(len(perm)):
+        length, ind = 0, start
+        while not seen[ind]:
+            seen[ind] = True
+            ind = perm[ind]
+            length += 1
+        if length % 2 == 0 and length:
+            sign = -sign
+    return sign
+
+
+def permute(mat, perm):
+    """Return mat[perm][:, perm] as a CSC matrix."""
+    return csc_matrix(csr_matrix(mat)[perm][:, perm])
+
+
+class Ordered_lu():
+    """
+    Sparse LU factorization of a matrix in a given order of its unknowns.
+
+    Parameters:
+
+    - permuted: square sparse matrix already reordered by permute
+
+    - perm: the permutation used, as from permutation
+
+    The matrix is factorized by SuperLU without any column ordering of its
+    own, so the fill-in is that of perm; rows are still exchanged for
+    stability where a diagonal entry is too small. solve() takes and returns
+    vectors in the original order of the unknowns. nnz is the number of
+    non-zero entries of L + U.
+    """
+
+    def __init__(self, permuted, perm):
+        """Factorize the reordered matrix."""
+        self.perm = perm
+        self.lu = splu(csc_matrix(permuted), permc_spec='NATURAL')
+        self.nnz = self.lu.L.nnz + self.lu.U.nnz
+
+    def solve(self, rhs, trans='N'):
+        """
+        Solve the original system, or its transpose if trans is 'T'.
+
+        The transpose of the permuted matrix is the permuted transpose, so
+        both use the same factorization.
+        """
+        rhs = np.asarray(rhs)
+        x = self.lu.solve(np.ascontiguousarray(rhs[self.perm]), trans=trans)
+        out = np.empty_like(x)
+        out[self.perm] = x
+        return out
+
+    def log_determinant(self):
+        """
+        Determinant of the matrix in logarithmic form.
+
+        Returns phase det/|det| and log|det|, read off the diagonal of U and
+        the row permutation of SuperLU. The symmetric reordering does not
+        change the determinant.
+        """
+        diag = self.lu.U.diagonal()
+        logabs = np.sum(np.log(np.abs(diag)))
+        phase = np.prod(diag/np.abs(diag))*parity(self.lu.perm_r) * \
+            parity(self.lu.perm_c)
+        return phase, logabs
+
+
+class Ordered_pencil():
+    """
+    The matrices G + s*C of a descriptor system in a fill-reducing order.
+
+    Parameters:
+
+    - g: CSR matrix G of the descriptor system
+
+    - c: CSR matrix C of the descriptor system
+
+    - method: one of METHODS
+
+    The ordering and the reordered copies of G and C are computed once;
+    factor(s) then only adds and factorizes, so sweeps over frequency or
+    step size pay for the ordering a single time.
+    """
+
+    def __init__(self, g, c, method='amd'):
+        """Order the unknowns and reorder the matrices."""
+        self.perm = descriptor_permutation(g, c, method)
+        self.update(g, c)
+
+    def update(self, g, c):
+        """Replace G and C by matrices of the same pattern, keeping perm."""
+        self.g = permute(g, self.perm)
+        self.c = permute(c, self.perm)
+
+    def factor(self, s):
+        """Return the Ordered_lu of G + s*C."""
+        return Ordered_lu(self.g + s*self.c, self.perm)
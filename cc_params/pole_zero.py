@@ -0,0 +1,310 @@
+"""
+Poles and zeros of a circuit from generalized eigenvalue problems.
+
+For the descriptor system (G + s*C)x = B*u of mna.descriptor_system the
+poles are the finite s where det(G + s*C) = 0, the generalized eigenvalues
+of the pencil (G, C). The zeros of the transfer function from source u_k to
+the output y = (c0 + s*c1).x are those of the bordered pencil
+
+    [[G + s*C, b_k], [(c0 + s*c1)^T, 0]]
+
+whose determinant is -N(s) by Cramer's rule, as in tf_interp. No polynomial
+coefficients are formed, so roots spread over many decades keep their
+accuracy, whereas the roots of rounded coefficients lose it.
+
+Unknowns whose rows and columns of C are all zero, the voltage source
+currents and the nodes without a capacitor, give only infinite eigenvalues.
+They are eliminated first with the Schur complement
+
+    det(G + s*C) = det(G_aa)*det(G_dd + s*C_dd - G_da G_aa^-1 G_ad)
+
+so that the dense QZ algorithm only works on the dynamic unknowns. The
+eigenvalues that are infinite but come out finite and huge through rounding
+are dropped by finite_eigenvalues. The gain k is matched to the response of
+the circuit at one reference point away from all the roots, and is kept as
+its sign and log|k|: for a hundred poles of an LC ladder k no longer fits in
+a float.
+"""
+import numpy as np
+from scipy.linalg import eigvals
+from scipy.sparse import csr_matrix
+import instrument
+import mna
+import ordering
+
+INFINITE_EIGENVALUE = 1e8
+REFERENCE_RADII = 25
+REFERENCE_ANGLES = (np.pi/6, np.pi/3, np.pi/2, 2*np.pi/3, 5*np.pi/6)
+CANCEL_TOLERANCE = 1e-6
+
+
+def finite_eigenvalues(a, b):
+    """
+    Finite eigenvalues w of the dense pencil det(a + w*b) = 0.
+
+    Both matrices are scaled to unit norm first. An eigenvalue larger than
+    INFINITE_EIGENVALUE times the ratio of the norms comes from a singular
+    b and is dropped as infinite, as rounding makes it finite but huge.
+    """
+    a_norm, b_norm = np.linalg.norm(a), np.linalg.norm(b)
+    if a_norm == 0 or b_norm == 0:
+        return np.zeros(0, dtype=np.complex128)
+    scaled = eigvals(-a/a_norm, b/b_norm)
+    scaled = scaled[np.isfinite(scaled) &
+                    (np.abs(scaled) < INFINITE_EIGENVALUE)]
+    return scaled*a_norm/b_norm
+
+
+def algebraic_unknowns(c):
+    """
+    Find the empty rows and columns of C.
+
+    Returns two boolean arrays marking the rows and the columns of C that
+    hold no non-zero entry: the equations without a derivative and the
+    unknowns whose derivative appears nowhere.
+    """
+    c_abs = abs(csr_matrix(c))
+    return (np.asarray(c_abs.sum(axis=1)).ravel() == 0,
+            np.asarray(c_abs.sum(axis=0)).ravel() == 0)
+
+
+def pencil_eigenvalues(g, c):
+    """
+    Finite eigenvalues s of det(G + s*C) = 0.
+
+    Parameters:
+
+    - g, c: square sparse or dense matrices of the same size
+
+    Returns:
+
+    - complex array of the eigenvalues
+
+    Method: The unknowns with an empty row and column of C are eliminated
+    by the Schur complement of G on them, which leaves the finite
+    eigenvalues unchanged. If their numbers of rows and columns differ, or
+    G is singular on them, the whole pencil is handed to the QZ algorithm.
+    """
+    g, c = csr_matrix(g), csr_matrix(c)
+    rows, cols = algebraic_unknowns(c)
+    if rows.any() and rows.sum() == cols.sum():
+        alg_rows, dyn_rows = np.nonzero(rows)[0], np.nonzero(~rows)[0]
+        alg_cols, dyn_cols = np.nonzero(cols)[0], np.nonzero(~cols)[0]
+        g_rows = g[alg_rows]
+        try:
+            coupling = np.linalg.solve(g_rows[:, alg_cols].toarray(),
+                                       g_rows[:, dyn_cols].toarray())
+        except np.linalg.LinAlgError:
+            pass
+        else:
+            g_dyn = g[dyn_rows]
+            schur = g_dyn[:, dyn_cols].toarray() - \
+                g_dyn[:, alg_cols].dot(coupling)
+            return finite_eigenvalues(schur,
+                                      c[dyn_rows][:, dyn_cols].toarray())
+    return finite_eigenvalues(g.toarray(), c.toarray())
+
+
+def bordered_pencil(g, c, b_col, c0, c1):
+    """
+    The pencil of G and C bordered by an input and an output vector.
+
+    Returns the CSR matrices [[G, b_col], [c0^T, 0]] and
+    [[C, 0], [c1^T, 0]], whose finite eigenvalues are the zeros.
+    """
+    size = g.shape[0]
+    g_rows = np.vstack((np.column_stack((csr_matrix(g).toarray(), b_col)),
+                        np.append(c0, 0.0)))
+    c_rows = np.vstack((np.column_stack((csr_matrix(c).toarray(),
+                                         np.zeros(size))),
+                        np.append(c1, 0.0)))
+    return csr_matrix(g_rows), csr_matrix(c_rows)
+
+
+def descriptor_roots(g, c, b_col, c0, c1):
+    """
+    Zeros and poles of a descriptor system, before any cancellation.
+
+    Parameters:
+
+    - g, c: matrices G and C of (G + s*C)x = b_col*u
+
+    - b_col: dense input vector
+
+    - c0, c1: dense output vectors, the output being (c0 + s*c1).x
+
+    Returns:
+
+    - zeros, poles: complex arrays
+    """
+    poles = pencil_eigenvalues(g, c)
+    zeros = pencil_eigenvalues(*bordered_pencil(g, c, b_col, c0, c1))
+    return zeros, poles
+
+
+def reference_point(zeros, poles):
+    """
+    A point s in the upper half plane far from the zeros and poles.
+
+    The candidates lie at REFERENCE_RADII radii spaced logarithmically from
+    the smallest nonzero pole to the largest, or zero if there are no
+    poles, and at REFERENCE_ANGLES from the positive real axis. The one
+    whose nearest root is farthest relative to its radius is returned, so
+    that the roots near it do not spoil the match of the gain. The radii
+    keep clear of zeros far below the poles, which are often zeros at 0
+    that rounding moved, whose error is large next to their size.
+    """
+    roots = np.concatenate((zeros, poles)).astype(np.complex128)
+    rates = np.abs(np.asarray(poles if len(poles) else zeros))
+    rates = np.log10(rates[rates > 0]) if np.any(rates > 0) else [0.0]
+    radii = np.logspace(min(rates), max(rates), REFERENCE_RADII)
+    points = (radii[:, None]*np.exp(1j*np.array(REFERENCE_ANGLES))).ravel()
+    if not len(roots):
+        return points[len(points)//2]
+    dist = np.min(np.abs(points[:, None] - roots[None, :]), axis=1)
+    return points[int(np.argmax(dist/np.abs(points)))]
+
+
+def gain(point, value, zeros, poles):
+    """
+    The gain k of H(s) = k*prod(s - z)/prod(s - p).
+
+    Parameters:
+
+    - point: point s away from the roots
+
+    - value: H at point
+
+    - zeros, poles: complex arrays of the roots of H
+
+    Returns:
+
+    - sign: sign of k, 0.0 if H is zero
+
+    - log_gain: natural logarithm of |k|, -inf if H is zero
+
+    The matching is done on logarithms, which do not overflow for hundreds
+    of roots where k itself would.
+    """
+    if value == 0:
+        return 0.0, -np.inf
+    log_k = np.log(complex(value)) + np.sum(np.log(point - poles)) - \
+        np.sum(np.log(point - zeros))
+    return (1.0 if np.cos(log_k.imag) >= 0 else -1.0), float(log_k.real)
+
+
+def cancel_roots(zeros, poles, tolerance=CANCEL_TOLERANCE):
+    """
+    Remove the zeros and poles that cancel each other.
+
+    A zero and a pole cancel if they differ by at most tolerance times the
+    size of the pole. These are the natural frequencies of the circuit that
+    the input does not excite or the output does not see. Returns the arrays
+    of the remaining zeros and poles.
+    """
+    zeros, poles = list(zeros), list(poles)
+    kept = []
+    for root in zeros:
+        dist = [abs(root - x) for x in poles]
+        if dist and min(dist) <= tolerance*abs(poles[int(np.argmin(dist))]):
+            poles.pop(int(np.argmin(dist)))
+        else:
+            kept.append(root)
+    return np.array(kept, dtype=np.complex128), \
+        np.array(poles, dtype=np.complex128)
+
+
+def coefficients(zeros, poles, sign, log_gain):
+    """
+    Coefficients of sign*exp(log_gain)*prod(s - z)/prod(s - p).
+
+    Returns num_coeffs and den_coeffs in descending powers of s, with a
+    monic denominator, as tf_interp.transfer_coefficients does. They are
+    not rounded: roots spread over many decades need every digit of their
+    coefficients. The gain is applied to every coefficient on logarithms,
+    so only coefficients that do not fit a float themselves overflow.
+    """
+    if sign == 0:
+        return [0.0], [1.0]
+    num_poly = np.real(np.atleast_1d(np.poly(zeros)))
+    with np.errstate(over='ignore', divide='ignore'):
+        num_poly = sign*np.sign(num_poly)*np.exp(
+            log_gain + np.log(np.abs(num_poly)))
+    den_poly = np.atleast_1d(np.poly(poles))
+    return ([float(a) for a in np.real(num_poly)],
+            [float(a) for a in np.real(den_poly)])
+
+
+def poles(origin, dest, ele, val):
+    """
+    Compute the natural frequencies of a netlist.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    Returns:
+
+    - complex array of the finite eigenvalues of the pencil (G, C)
+    """
+    g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+    return pencil_eigenvalues(g, c)
+
+
+@instrument.timed(select=lambda result: None)
+def transfer_roots(origin, dest, ele, val, input_source, ident, output_var):
+    """
+    Compute the zeros, poles and gain of the transfer function.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - input_source: identifier of the voltage source used as input, eg. V1
+
+    - ident: identifier of the element whose output parameter is asked
+
+    - output_var: I if current is demanded, else V
+
+    Returns:
+
+    - zeros: complex array of the zeros
+
+    - poles: complex array of the poles
+
+    - sign, log_gain: sign and natural logarithm of |k| of gain for
+      H(s) = k*prod(s - z)/prod(s - p)
+
+    Zeros and poles that cancel are removed. The gain is matched to the
+    response of the circuit at reference_point, solved with a single
+    sparse factorization. Nearly all the time goes to the QZ algorithm for
+    the poles and the zeros, which grows as the cube of the number of
+    states: about 0.05 s for an LC ladder of 100 states, 0.4 s for 300 and
+    3 s for 600. Raises ValueError if the circuit equations are singular.
+    """
+    g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+    c0, c1 = mna.output_vectors(origin, dest, ele, val, unknowns, ident,
+                                output_var)
+    b_col = b[:, int(input_source[1:])-1]
+    zeros, poles = descriptor_roots(g, c, b_col, c0, c1)
+    point = reference_point(zeros, poles)
+    try:
+        x = ordering.Ordered_pencil(g, c).factor(point).solve(
+            b_col.astype(np.complex128))
+    except RuntimeError:
+        raise ValueError("Circuit equations are singular")
+    value = (c0 + point*c1).dot(x)
+    zeros, poles = cancel_roots(zeros, poles)
+    return (zeros, poles) + gain(point, value, zeros, poles)
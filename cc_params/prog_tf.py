@@ -8,102 +8,43 @@ to select the output s/he wants and a transfer function will be computed
 accordingly. The user will then have the option of veiwing different control
 parameters of the circuit such as time-domain response, frequency response and
 so on.
+
+The Tkinter screens of gui_input and gui_tf_io and the plots of gui_control,
+which pull in control, matplotlib and scipy.signal, are only imported by the
+functions that open them. Importing prog_tf for the solver alone, as batch
+does, then takes a fraction of the time; benchmarks/import_time.py measures
+it.
+
+The stages of the solution are phases of instrument, measured while an
+instrument.Report is active.
 """
 
-import gui_input as gui
-import gui_tf_io as gui_io
-import gui_control as control
+import ac_sweep
+import fraction_free
+import instrument
+import mna
+import ordering
+import pole_zero
+import reduction
+import state_space
+import subckt
+import tf_cache
+import tf_interp
+import tf_matrix
+import topology
+from netlist import Netlist, SOURCE
+import transient
 import numpy as np
-from sympy import symbols, simplify, Poly
+from sympy import symbols, nsimplify
 from sympy.matrices import Matrix
 from sympy.parsing.sympy_parser import parse_expr
 
+CACHE = tf_cache.Solution_cache()
+REDUCTION_LIMIT = 50
 
-def diagonal(node_number, from_list, to_list, element_list, value_list):
-    """
-    Function calculates the diagonal elements of the conductance matrix.
-
-    Parameters:
-
-     - node_number: decides the index of the conductance matrix to be computed
-
-     - from_list: list of all the origin nodes in the netlist
-
-     - to_list: list of all the destination nodes in the netlist
-
-     - element_list: list of identifiers of elements in the circuit
-
-     - value_list: list of values of elements in the circuit
-
-    Returns:
-
-     - Diagonal element of the conductance matrix
-
-    Method: For filling up conductance[i][i] the ith node is considered and
-    conductance of all the elements connected to this node is calculated and
-    summed up.
-    """
-    s = symbols('s')
-    cond_ele = 0
-    for x in range(len(from_list)):
-        if 'V' in element_list[x]:
-            continue
-        elif ('R' in element_list[x] and
-                (from_list[x] == node_number or to_list[x] == node_number)):
-            cond_ele = cond_ele+float(1/value_list[x])
-        elif ('L' in element_list[x] and
-                (from_list[x] == node_number or to_list[x] == node_number)):
-            cond_ele = cond_ele+float(1/value_list[x])/s
-        elif ('C' in element_list[x] and
-                (from_list[x] == node_number or to_list[x] == node_number)):
-            cond_ele = cond_ele+float(value_list[x])*s
-    return cond_ele
-
-
-def offdiagonal(node_number_from, node_number_to, from_list, to_list,
-                element_list, value_list):
-    """
-    Function calculates the offdiagonal elements of the conductance matrix.
-
-    Parameters:
-
-    - node_number_from: Row-index of the conductance matrix to be computed
-
-    - node_number_to: Column-index of the conductance matrix to be computed
-
-    - from_list: of all the origin nodes in the netlist
-
-    - to_list: list of all the destination nodes in the netlist
 
-    - element_list: list of identifiers of elements in the circuit
-
-    - value_list: list of values of elements in the circuit
-
-    Returns:
-
-    - Offdiagonal element of the conductance matrix.
-
-    Method: For filling up conductance[i][j] the negative of the conductance of
-    the element/s connected between i and j the nodes are added up.
-    """
-    s = symbols('s')
-    cond_ele = 0
-    for x in range(len(from_list)):
-        if 'V' in element_list[x]:
-            continue
-        elif 'R' in element_list[x] and (from_list[x] == node_number_from and
-                                         to_list[x] == node_number_to):
-            cond_ele = cond_ele+float(-1/value_list[x])
-        elif 'L' in element_list[x] and (from_list[x] == node_number_from and
-                                         to_list[x] == node_number_to):
-            cond_ele = cond_ele+float(-1/value_list[x])/s
-        elif 'C' in element_list[x] and (from_list[x] == node_number_from and
-                                         to_list[x] == node_number_to):
-            cond_ele = cond_ele+float(-1*value_list[x])*s
-    return cond_ele
-
-
-def set_cond_matrix(origin, dest, ele, val):
+@instrument.timed(select=lambda result: result[0])
+def set_cond_matrix(origin, dest, ele, val, instances=()):
     """
     Function builds up the conductance matrix of the system.
 
@@ -117,30 +58,39 @@ def set_cond_matrix(origin, dest, ele, val):
 
     - val: list of values of all the elements in the netlist
 
+    - instances: list of subckt.Instance of subcircuits in the netlist
+
     Returns:
 
     - Conductance matrix of the circuit
 
     - Number of nodes in the circuit
 
+    Method: The netlist is stamped once into sparse matrices by
+    mna.stamp_conductance and only the non-zero entries are converted to
+    expressions in s of the form g + c*s + l_inv/s. The port block of every
+    subcircuit instance, from which its internal nodes are already
+    eliminated, is then added at the nodes of the instance.
     """
-    num_nodes = max(max(origin), max(dest))
+    s = symbols('s')
+    g, c, l_inv, num_nodes = mna.stamp_conductance(origin, dest, ele, val)
+    num_nodes = max(num_nodes, subckt.largest_node(instances))
     cond = Matrix.zeros(num_nodes, num_nodes)
-    (row, col) = np.shape(cond)
-    for row_ind in range(row):
-        for col_ind in range(row_ind, col):
-            if row_ind == col_ind:
-                diag_ele = diagonal(row_ind+1, origin, dest, ele, val)
-                cond[row_ind, col_ind] = parse_expr(str(diag_ele))
-            else:
-                off_diag_ele = offdiagonal(row_ind+1, col_ind+1, origin, dest,
-                                           ele, val)
-                cond[row_ind, col_ind] = parse_expr(str(off_diag_ele))
-                cond[col_ind, row_ind] = parse_expr(str(off_diag_ele))
+    for (row, col), (g_ij, c_ij, l_ij) in mna.nonzero_entries(g, c, l_inv):
+        cond_ele = 0
+        if g_ij != 0:
+            cond_ele = cond_ele+g_ij
+        if l_ij != 0:
+            cond_ele = cond_ele+l_ij/s
+        if c_ij != 0:
+            cond_ele = cond_ele+c_ij*s
+        cond[row, col] = cond_ele
+    subckt.stamp_instances(cond, instances)
     return cond, num_nodes
 
 
-def set_volt_matrix(origin, dest, ele):
+@instrument.timed(select=lambda result: result[0])
+def set_volt_matrix(origin, dest, ele, num_nodes=None):
     """
     Function builds the voltage matrix required for nodal analysis.
 
@@ -152,6 +102,9 @@ def set_volt_matrix(origin, dest, ele):
 
     - ele: list of all element identifiers of the netlist
 
+    - num_nodes: number of nodes, if subcircuit instances use nodes beyond
+      the largest node of the elements
+
     Returns:
 
     - voltage matrix of the circuit appended to conductance matrix row-wise
@@ -167,20 +120,21 @@ def set_volt_matrix(origin, dest, ele):
 
     If there are 2 voltage sources the **dep** is a (2 by 2) matrix of 0's
     """
-    num_nodes = max(max(origin), max(dest))
-    number_of_voltage_sources = len([1 for x in ele if 'V' in x])
+    net = Netlist(origin, dest, ele)
+    positions, source_origin, source_dest, values = net.of_type('V')
+    number_of_voltage_sources = len(positions)
+    if num_nodes is None:
+        num_nodes = net.num_nodes
     voltage = Matrix.zeros(num_nodes, number_of_voltage_sources)
     voltage_trans = Matrix.zeros(number_of_voltage_sources, num_nodes)
-    (row, col) = np.shape(voltage)
-    for row_ind in range(row):
-        for col_ind in range(col):
-            for x in range(len(origin)):
-                if ele[x] == "V"+str(col_ind+1) and origin[x] == row_ind+1:
-                    voltage[row_ind, col_ind] = -1
-                    voltage_trans[col_ind, row_ind] = 1
-                elif ele[x] == "V"+str(col_ind+1) and dest[x] == row_ind+1:
-                    voltage[row_ind, col_ind] = 1
-                    voltage_trans[col_ind, row_ind] = -1
+    for x, row_o, row_d in zip(positions, source_origin, source_dest):
+        col_ind = int(net.ident[x][1:])-1
+        if row_o != 0:
+            voltage[row_o-1, col_ind] = -1
+            voltage_trans[col_ind, row_o-1] = 1
+        if row_d != 0:
+            voltage[row_d-1, col_ind] = 1
+            voltage_trans[col_ind, row_d-1] = -1
     dep = Matrix.zeros(number_of_voltage_sources, number_of_voltage_sources)
     return voltage, voltage_trans, dep
 
@@ -214,8 +168,11 @@ def output_tf_calc(solution, o, d, e_v, e_t, ident, output_var):
     through this element according to the element type.
     """
     s = symbols('s')
-    ind = e_t.index(ident)
-    origin_node, ending_node, value_of_element = o[ind], d[ind], e_v[ind]
+    net = Netlist(o, d, e_t, e_v)
+    ind = net.index(ident)
+    origin_node, ending_node = int(net.origin[ind]), int(net.dest[ind])
+    value_of_element = e_v[ind]
+    kind = net.letter(ident)
     if origin_node != 0 and ending_node == 0:
         volt_diff = solution[parse_expr("V_"+str(origin_node))]-parse_expr("0")
     elif origin_node == 0 and ending_node != 0:
@@ -223,11 +180,11 @@ def output_tf_calc(solution, o, d, e_v, e_t, ident, output_var):
     else:
         volt_diff = solution[parse_expr("V_"+str(origin_node))]-solution[
                                        parse_expr("V_"+str(ending_node))]
-    if 'R' in ident:
+    if kind == 'R':
         current = volt_diff/value_of_element
-    elif 'L' in ident:
+    elif kind == 'L':
         current = volt_diff/((value_of_element)*s)
-    elif 'C' in ident:
+    elif kind == 'C':
         current = volt_diff*value_of_element*s
     else:
         current = solution[parse_expr("I_"+ident)]
@@ -238,14 +195,66 @@ def output_tf_calc(solution, o, d, e_v, e_t, ident, output_var):
         return current
 
 
-def input_output_calculation(sol, or_list, des_list, element_type,
-                             element_value, voltage_sources_num):
+@instrument.timed(select=lambda result: None)
+def polynomial_coefficients(numerators, denominator, or_list, des_list,
+                            element_type, element_value, input_value,
+                            output_ident, output_type):
     """
-    Function calculates the transfer function as demanded by the user.
+    Function calculates the coefficients of the transfer function exactly.
 
     Parameters:
 
-    - sol: dictionary containing solutions of the circuit unknowns
+    - numerators, denominator: solution of the circuit unknowns as from
+      solve_polynomial, with the right hand side of input_rhs so that all
+      other voltage sources are zero
+
+    - or_list: list containing the originating nodes in the circuit
+
+    - des_list: list containing the terminating nodes in the circuit
+
+    - element_type: list containing the type of elements in the circuit
+
+    - element_value: list containing the values of elements in the circuit
+
+    - input_value: value of the voltage source selected as input
+
+    - output_ident: identifier of the element selected as output
+
+    - output_type: I if current is demanded, else V
+
+    Returns:
+
+    - num_coeffs: coefficients of the numerator in descending powers of s
+
+    - den_coeffs: coefficients of the denominator in descending powers of s
+
+    Method: output_tf_calc is linear in the unknowns, so it is applied to
+    their numerators, with the element values as exact rationals, and the
+    result is put over the common denominator times the input. The ratio of
+    the two polynomials is brought to lowest terms with a single gcd by
+    fraction_free.coefficients, without any expression being simplified,
+    and rounded to 10 decimals.
+    """
+    s = symbols('s')
+    exact_values = [nsimplify(float(x), rational=True) for x in element_value]
+    output = output_tf_calc(dict((x, y.as_expr())
+                                 for x, y in numerators.items()),
+                            or_list, des_list, exact_values, element_type,
+                            output_ident, output_type)
+    num, den = output.as_numer_denom()
+    den = fraction_free.polynomial(den, s)*denominator * \
+        nsimplify(input_value, rational=True)
+    with instrument.phase('Poly'):
+        return fraction_free.coefficients(fraction_free.polynomial(num, s),
+                                          den)
+
+
+def input_output_calculation(or_list, des_list, element_type, element_value,
+                             voltage_sources_num):
+    """
+    Function calculates the transfer function as demanded by the user.
+
+    Parameters:
 
     - or_list: list containing the originating nodes in the circuit
 
@@ -264,30 +273,119 @@ def input_output_calculation(sol, or_list, des_list, element_type,
 
     - Calculates the input as selected by the user
 
-    - Calculates the output transfer function by calling output_tf_calc
+    - Calculates coefficients of the transfer function from the selected
+      input to the selected output numerically with
+      tf_interp.transfer_coefficients, unless they are found in CACHE
 
-    - Calculates coefficients of the resulting transfer function
+    - Calculates the frequency response numerically with ac_sweep for the
+      Bode and Nyquist plots
+
+    - Calculates the poles and zeros with pole_zero.transfer_roots from the
+      generalized eigenvalues of the circuit
+
+    - Builds a state space realization of the circuit with state_space for
+      the control module, and only if the circuit has none hands a
+      transient simulation of the netlist to the step response
 
     - calls the methods of inbuilt control module of Python
 
+    If the user asks for the transfer function matrix instead of a single
+    input, matrix_calculation is called.
+
+    If the degree bound of the circuit exceeds REDUCTION_LIMIT, the user
+    also chooses the order of a reduction.Reduced_model, proposed as
+    reduction.DEFAULT_ORDER. The model is built once by reduction_task,
+    which returns its coefficients, roots, realization and estimated
+    error in place of those of the circuit; the estimate is shown with the
+    plots.
     """
-    s = symbols('s')
+    import gui_tf_io as gui_io
+    import gui_control as control
+    order = None
+    if tf_interp.degree_bound(element_type) > REDUCTION_LIMIT:
+        order = reduction.DEFAULT_ORDER
     gui_tf_input_calc = gui_io.Input_selection(element_type, element_value,
-                                               voltage_sources_num)
+                                               voltage_sources_num, order)
+    if gui_tf_input_calc.inp_identifier is None:
+        matrix_calculation(or_list, des_list, element_type, element_value,
+                           voltage_sources_num)
+        return
     gui_tf_output = gui_io.Output_selection(element_type)
-    tf_numerator = output_tf_calc(sol, or_list, des_list, element_value,
-                                  element_type, gui_tf_output.ele_identifier,
-                                  gui_tf_output.output_type)
-    tf_denominator = simplify(gui_tf_input_calc.inpval)
-    inp_out_tf = simplify(tf_numerator/tf_denominator)
-    num, den = inp_out_tf.as_numer_denom()
-    num_coeffs = list(Poly(num, s).all_coeffs())
-    den_coeffs = list(Poly(den, s).all_coeffs())
-    num_coeffs = [round(a, 10) for a in num_coeffs]
-    den_coeffs = [round(a, 10) for a in den_coeffs]
-    control.Options(num_coeffs, den_coeffs)
+    selection = (or_list, des_list, element_type, element_value,
+                 gui_tf_input_calc.inp_identifier,
+                 gui_tf_output.ele_identifier, gui_tf_output.output_type)
+    note = None
+    if order is not None:
+        reduced = run_worker("Reducing the circuit", reduction_task,
+                             (gui_tf_input_calc.order,) + selection)
+        if reduced is None:
+            return
+        (num_coeffs, den_coeffs), roots, realization, error, reached = \
+            reduced
+        note = "Reduced model of order %d, estimated relative error %.3g" \
+            % (reached, error)
+    else:
+        coefficients = CACHE.coefficients(
+            *selection, compute=lambda: run_worker(
+                "Computing the transfer function", coefficients_task,
+                selection), method='interp')
+        if coefficients is None:
+            return
+        num_coeffs, den_coeffs = coefficients
+        roots = run_worker("Computing the poles and zeros", roots_task,
+                           selection)
+        try:
+            realization = run_worker("Building the state space realization",
+                                     realization_task, selection)
+        except ValueError as err:
+            print(str(err) + ", using the transfer function")
+            realization = None
+    response = run_worker("Computing the frequency response", response_task,
+                          selection)
+    if response is None:
+        return
+    simulate = None
+    if realization is None:
+        def simulate():
+            return transient.step_response(
+                or_list, des_list, element_type, element_value,
+                gui_tf_input_calc.inp_identifier,
+                gui_tf_output.ele_identifier, gui_tf_output.output_type)
+    with instrument.phase('plot'):
+        control.Options(num_coeffs, den_coeffs, response, simulate, roots,
+                        realization, note)
+
+
+def matrix_calculation(or_list, des_list, element_type, element_value,
+                       voltage_sources_num):
+    """
+    Function calculates a matrix of transfer functions selected by the user.
 
+    Parameters:
+
+    - or_list: list containing the originating nodes in the circuit
+
+    - des_list: list containing the terminating nodes in the circuit
 
+    - element_type: list containing the type of elements in the circuit
+
+    - element_value: list containing the values of elements in the circuit
+
+    - voltage_sources_num: number of voltage sources in the circuit
+
+    Method: The user checks any number of inputs and outputs, and the
+    transfer functions between all of them are calculated by
+    tf_matrix.transfer_matrix from a single factorization and displayed.
+    """
+    import gui_tf_io as gui_io
+    selection = gui_io.Matrix_selection(element_type, voltage_sources_num)
+    tfs = tf_matrix.transfer_matrix(or_list, des_list, element_type,
+                                    element_value, selection.sources,
+                                    selection.outputs)
+    gui_io.Matrix_display(tfs, selection.sources, selection.outputs)
+
+
+@instrument.timed(select=lambda result: result[1])
 def nodal_matrix(cond, v, val, v_t, n_nodes, n_voltsrc, ele_type, dep_sources):
     """
     Create the matrices required for nodal analysis of the system.
@@ -354,6 +452,115 @@ def nodal_matrix(cond, v, val, v_t, n_nodes, n_voltsrc, ele_type, dep_sources):
     return unknowns, tot_mat, rhs
 
 
+def input_rhs(unknowns, rhs, input_source):
+    """
+    Right hand side of the nodal analysis equations for a single input.
+
+    Parameters:
+
+    - unknowns, rhs: as from nodal_matrix
+
+    - input_source: identifier of the voltage source used as input, eg. V1
+
+    Returns:
+
+    - copy of rhs in which every voltage source but input_source is zero
+
+    The transfer function from an input is taken by superposition with all
+    other sources set to zero, as by tf_interp, ac_sweep and tf_matrix.
+    """
+    current = symbols('I_' + input_source)
+    return Matrix([rhs[i, 0] if unknowns[i, 0] == current else 0
+                   for i in range(rhs.rows)])
+
+
+def solve_polynomial(unknowns, tot_mat, rhs, order='amd', progress=None):
+    """
+    Solve the nodal analysis equations into polynomials of s.
+
+    Parameters are those of solve_circuit.
+
+    Returns:
+
+    - numerators: dictionary from every unknown to the Poly y of its
+      numerator
+
+    - denominator: Poly D common to all the unknowns, each unknown being
+      y/D
+
+    Raises ValueError if A is not invertible.
+
+    Method: The unknowns are numbered by the node labels of the netlist, so A
+    is first reordered symmetrically as P*A*P^T by a fill-reducing ordering
+    of its pattern, which keeps the minors created by the elimination
+    sparse. The reordered equations are then solved exactly by
+    fraction_free.solve, with Bareiss' elimination over polynomials with
+    rational coefficients.
+    """
+    s = symbols('s')
+    pattern = np.array(tot_mat.applyfunc(lambda e: int(e != 0)).tolist(),
+                       dtype=np.float64)
+    perm = [int(x) for x in ordering.permutation(pattern, order)]
+    if progress is not None:
+        progress("Factorizing the nodal analysis matrix")
+    with instrument.phase('Bareiss') as step:
+        numerators, denominator = fraction_free.solve(
+            tot_mat.extract(perm, perm), rhs.extract(perm, [0]), s)
+        step.measure([row[0] for row in numerators] + [denominator])
+    return (dict((unknowns[x, 0], numerators[pos][0])
+                 for pos, x in enumerate(perm)), denominator)
+
+
+@instrument.timed()
+def solve_circuit(unknowns, tot_mat, rhs, order='amd', progress=None):
+    """
+    Solve the nodal analysis equations without any user interaction.
+
+    Nodal analysis equation: Ax=b
+
+    Parameters:
+
+    - unknowns: x in the nodal analysis equations
+
+    - tot_mat: A in the nodal analysis equations
+
+    - rhs: b in the nodal analysis equations
+
+    - order: ordering of the unknowns for the factorization, one of
+      ordering.METHODS
+
+    - progress: function called with a message before the factorization and
+      before every unknown is brought to lowest terms, or None
+
+    Returns:
+
+    - soln: solution of the nodal analysis equations
+
+    Raises ValueError if A is not invertible.
+
+    Method:
+
+    The equations are solved exactly by solve_polynomial, which gives every
+    unknown as a polynomial over the determinant of A. Each ratio is brought
+    to lowest terms by fraction_free.lowest_terms, with a single polynomial
+    gcd, converted back to floating point and stored under its own unknown,
+    so soln and everything computed from it, as in output_tf_calc, use the
+    node numbers of the user.
+    """
+    soln = {}
+    numerators, denominator = solve_polynomial(unknowns, tot_mat, rhs, order,
+                                               progress)
+    with instrument.phase('cancel'):
+        for pos in range(unknowns.rows):
+            if progress is not None:
+                progress("Simplifying unknown " + str(pos + 1) + " of " +
+                         str(unknowns.rows))
+            num, den = fraction_free.lowest_terms(
+                numerators[unknowns[pos, 0]], denominator)
+            soln[unknowns[pos, 0]] = (num.as_expr()/den.as_expr()).evalf()
+    return soln
+
+
 def check_circuit_error(unknowns, tot_mat, rhs):
     """
     Solve the nodal analysis equations.
@@ -376,26 +583,21 @@ def check_circuit_error(unknowns, tot_mat, rhs):
 
     If there are unnecessary voltage sources in the circuit the matrix A is not
     invertible. Such errors are handled in this function.
-    x is calculated if A is invertible as inv(A)*b
-    If A is not invertible thereby signifying circuit error user is given the
-    option of re-entering circuit netlist.
+    x is calculated exactly by solve_circuit with the fraction-free
+    elimination of fraction_free. If A is not invertible thereby signifying
+    circuit error user is given the option of re-entering circuit netlist.
     """
-    soln = {}
-    error_flag = 0
-    for x in range(np.shape(unknowns)[0]):
-        if 0 in tot_mat.eigenvals().keys():
-            print("Error in circuit")
-            error_flag = 1
-            break
-        else:
-            soln[unknowns[x, 0]] = simplify((tot_mat.inv()*rhs)[x, 0])
-    if error_flag == 1:
+    try:
+        soln = solve_circuit(unknowns, tot_mat, rhs)
+    except ValueError:
+        print("Error in circuit")
         main()
     else:
         return soln
 
 
-def check_netlist_error(origin, dest, ele_type, val_list):
+@instrument.timed(select=lambda result: None)
+def check_netlist_error(origin, dest, ele_type, val_list, instances=()):
     """
     Exception due to errors in netlist input by user handled.
 
@@ -409,6 +611,9 @@ def check_netlist_error(origin, dest, ele_type, val_list):
 
     - val_list: list of values of all elements in the netlist
 
+    - instances: list of subckt.Instance of subcircuits in the netlist, seen
+      by the graph checks as resistors between the ports they join
+
     List of exceptions handled are:-
 
     - Negative value of nodes
@@ -421,7 +626,16 @@ def check_netlist_error(origin, dest, ele_type, val_list):
 
     - Same value of origin and destination node
 
-    - Underlying graph is disconnected
+    - Underlying graph is disconnected, or a node number is skipped
+
+    - Loop of voltage sources
+
+    - Structurally singular circuit equations
+
+    The last two are only checked for netlists free of the other errors.
+    The element checks are vectorized over a netlist.Netlist and the graph
+    checks run in near-linear time with the functions of topology, so bad
+    circuits are rejected before the nodal analysis.
 
     Returns:
 
@@ -431,42 +645,161 @@ def check_netlist_error(origin, dest, ele_type, val_list):
 
     """
     error_flag, error_msg, error_count = 0, "", 0
-    if 0 not in origin+dest:
+    net = Netlist(origin, dest, ele_type)
+    extra_origin, extra_dest = subckt.check_edges(instances)
+    graph_origin = list(origin) + extra_origin
+    graph_dest = list(dest) + extra_dest
+    graph_ele = list(ele_type) + ['R']*len(extra_origin)
+    nodes = np.concatenate((net.origin, net.dest,
+                            [n for inst in instances for n in inst.nodes]))
+    if not np.any(nodes == 0):
         error_flag, error_count = 1, error_count+1
         error_msg = "No reference node"
-    if len(set(origin+dest)) != len(origin):
+    well_formed = len(net.origin) == len(net.dest) > 0 and nodes.min() >= 0
+    if well_formed and np.any(nodes == 0) and \
+            topology.unconnected_nodes(graph_origin, graph_dest):
         error_flag, error_count = 1, error_count+1
         error_msg = "Your circuit is not connected."
     if len(ele_type) < len(val_list):
         error_flag, error_count = 1, error_count+1
         error_msg = "You have not entered all identifiers."
-    check_source = len([1 for x in ele_type if 'V' in x])
-    if check_source == 0:
+    if not np.any(net.kind == SOURCE):
         error_flag, error_count = 1, error_count+1
         error_msg = "You have forgotten to enter sources"
-    check_negative_origin = any(n < 0 for n in origin)
-    check_negative_dest = any(n < 0 for n in dest)
-    if check_negative_dest is True or check_negative_origin is True:
+    if len(nodes) and nodes.min() < 0:
         error_msg = "Negative value of node."
         error_flag, error_count = 1, error_count+1
-    origin_dest_match = [origin[x] for x in range(len(origin))
-                         if origin[x] == dest[x]]
-    if len(origin_dest_match) > 0:
+    if np.any(net.origin == net.dest):
         error_flag, error_count = 1, error_count+1
         error_msg = "Same value of origin and destination node"
-    for ind in range(len(val_list)):
-        if val_list[ind] <= 0 and 'V' not in ele_type[ind]:
-            error_msg = "Non-positive value of R/L/C"
-            error_flag, error_count = 1, error_count+1
-        if val_list[ind] == 0:
-            error_msg = "Zero value"
+    values = np.asarray(val_list, dtype=np.float64)
+    is_source = np.zeros(len(values), dtype=bool)
+    known = min(len(values), len(net))
+    is_source[:known] = net.kind[:known] == SOURCE
+    non_positive = int(np.sum((values <= 0) & ~is_source))
+    zero = int(np.sum(values == 0))
+    if non_positive:
+        error_msg = "Non-positive value of R/L/C"
+        error_flag, error_count = 1, error_count+non_positive
+    if zero:
+        error_msg = "Zero value"
+        error_flag, error_count = 1, error_count+zero
+    if error_count == 0 and topology.voltage_loops(origin, dest, ele_type):
+        error_flag, error_count = 1, error_count+1
+        error_msg = "Loop of voltage sources"
+    if error_count == 0:
+        rank, size = topology.structural_rank(graph_origin, graph_dest,
+                                              graph_ele)
+        if rank < size:
             error_flag, error_count = 1, error_count+1
+            error_msg = "Circuit equations are singular"
     if error_count == 1 or error_count == 0:
         return error_flag, error_msg
     else:
         return error_flag, "Multiple Errors"
 
 
+def coefficients_task(progress, *selection):
+    """
+    Transfer function coefficients of tf_interp.transfer_coefficients.
+
+    selection holds its arguments from origin to output_var. Run by
+    input_output_calculation in a worker process of gui_progress.
+    """
+    progress("Interpolating the transfer function")
+    return tf_interp.transfer_coefficients(*selection)
+
+
+def reduction_task(progress, order, *selection):
+    """
+    Everything the plots need of the reduced model of a netlist.
+
+    Parameters:
+
+    - progress: function called with a message at every stage
+
+    - order: order of the reduction.Reduced_model
+
+    - selection: arguments of tf_interp.transfer_coefficients from origin to
+      output_var
+
+    Returns:
+
+    - coefficients: num_coeffs, den_coeffs formed from the roots
+
+    - roots: zeros, poles, sign and log_gain of Reduced_model.roots
+
+    - realization: matrices of Reduced_model.state_space, or None if the
+      model has none
+
+    - error: Reduced_model.error_estimate
+
+    - order: order reached by the model
+
+    The netlist is reduced a single time, as interpolation of a transfer
+    function of the order of a large circuit is neither fast nor accurate.
+    Run by input_output_calculation in a worker process of gui_progress.
+    """
+    progress("Reducing the circuit to order " + str(order))
+    model = reduction.Reduced_model(*selection[:4], order=order)
+    progress("Estimating the error of the reduced model")
+    error = model.error_estimate(*selection[4:])
+    roots = model.roots(*selection[4:])
+    try:
+        realization = model.state_space(*selection[4:])
+    except ValueError:
+        realization = None
+    return (pole_zero.coefficients(*roots), roots, realization, error,
+            model.order)
+
+
+def response_task(progress, *selection):
+    """
+    Frequency response of ac_sweep.frequency_response.
+
+    selection holds its arguments from origin to output_var. Run by
+    input_output_calculation in a worker process of gui_progress.
+    """
+    progress("Sweeping the frequency response")
+    return ac_sweep.frequency_response(*selection)
+
+
+def roots_task(progress, *selection):
+    """
+    Zeros, poles and gain of pole_zero.transfer_roots, as sign, log_gain.
+
+    selection holds its arguments from origin to output_var. Run by
+    input_output_calculation in a worker process of gui_progress.
+    """
+    progress("Solving the eigenvalue problems")
+    return pole_zero.transfer_roots(*selection)
+
+
+def realization_task(progress, *selection):
+    """
+    State space matrices of state_space.realization.
+
+    selection holds its arguments from origin to output_var. Run by
+    input_output_calculation in a worker process of gui_progress.
+    """
+    progress("Eliminating the algebraic unknowns")
+    return state_space.realization(*selection)
+
+
+def run_worker(title, task, args):
+    """
+    Run task in a worker process behind a gui_progress.Worker_window.
+
+    Returns the result of task, or None if the user cancelled it. Raises
+    ValueError with the message of an error of the task.
+    """
+    import gui_progress
+    window = gui_progress.Worker_window(title, task, args)
+    if window.error is not None:
+        raise ValueError(window.error)
+    return window.result
+
+
 def main():
     """
     Input accepted from user for netlist.
@@ -474,12 +807,15 @@ def main():
     If there is an error in the circuit entered by user, user is asked whether
     s/he wants to re-enter.
 
-    After a proper circuit is entered by user, the circuit is solved by calling
-    function **check_circuit_error**.
-
-    transfer function is then computed in the function
-    **input_output_calculation**.
+    After a proper circuit is entered by user, the transfer function is
+    computed in the function **input_output_calculation**, whose numerical
+    stages each run in a worker process that shows the progress and lets the
+    user cancel. The circuit is not solved symbolically first: nothing of the
+    GUI needs the exact solution, whose cost grows fastest with the size of
+    the circuit. If the circuit equations turn out to be singular, the user
+    is asked for the netlist again.
     """
+    import gui_input as gui
     continue_flag = 0
     gui_inputs = gui.Input_screen()
     or_nodes = gui_inputs.origin_list
@@ -494,18 +830,14 @@ def main():
     else:
         continue_flag = 1
     if continue_flag == 1:
-        conductance, num_nodes = set_cond_matrix(or_nodes, des_nodes,
-                                                 type_of_element, value)
-        voltage, voltage_trans, dep = set_volt_matrix(or_nodes, des_nodes,
-                                                      type_of_element)
-        number_of_voltage_sources = dep.shape[1]
-        unknowns, tot_mat, rhs = nodal_matrix(conductance, voltage, value,
-                                              voltage_trans, num_nodes,
-                                              number_of_voltage_sources,
-                                              type_of_element, dep)
-        soln = check_circuit_error(unknowns, tot_mat, rhs)
-        input_output_calculation(soln, or_nodes, des_nodes, type_of_element,
-                                 value, number_of_voltage_sources)
+        number_of_voltage_sources = len(Netlist(or_nodes, des_nodes,
+                                                type_of_element).sources())
+        try:
+            input_output_calculation(or_nodes, des_nodes, type_of_element,
+                                     value, number_of_voltage_sources)
+        except ValueError:
+            print("Error in circuit")
+            main()
 
 
 if __name__ == '__main__':
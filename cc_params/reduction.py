@@ -0,0 +1,293 @@
+"""
+Model order reduction of large RC and RLC networks by PRIMA.
+
+Extracted interconnect has thousands of nodes, and so a transfer function of
+an order in the thousands, while its response up to the frequencies of
+interest is that of a model of an order of tens. PRIMA projects the
+descriptor system (G + s*C)x = B*u of mna.descriptor_system onto a Krylov
+subspace of dimension q:
+
+    G_r = V^T G V,  C_r = V^T C V,  B_r = V^T B,  c_r = V^T c
+
+where the orthonormal columns of V span the block Krylov subspace
+
+    K_q(A, R),  A = (G + s0*C)^-1 C,  R = (G + s0*C)^-1 B
+
+built by block Arnoldi with one factorization of G + s0*C at the expansion
+point s0. The reduced model matches the first q/m block moments of the
+transfer functions around s0, m being the number of voltage sources.
+
+Before the projection the rows of the inductor branch equations are negated,
+which does not change the solution. Then G + G^T and C are positive
+semidefinite, as the congruence keeps them, so the reduced model is passive
+as seen from the voltage sources and stable for every output.
+
+The error is estimated as the largest difference over frequency between the
+reduced model and the one of the previous block, whose subspace is nested in
+it, relative to the largest response.
+"""
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+import ac_sweep
+import mna
+import ordering
+import pole_zero
+import state_space
+import tf_interp
+import topology
+
+DEFAULT_ORDER = 20
+DEFLATION_TOLERANCE = 1e-10
+
+
+def passive_form(g, c, unknowns):
+    """
+    Negate the rows of G and C of the inductor currents.
+
+    Parameters:
+
+    - g, c: CSR matrices of mna.descriptor_system
+
+    - unknowns: names of the unknowns from mna.descriptor_system
+
+    Returns the matrices g and c with G + G^T and C positive semidefinite.
+    The right hand side is zero in those rows, so the solution is the same.
+    """
+    sign = np.array([-1.0 if x.startswith('I_L') else 1.0
+                     for x in unknowns])
+    flip = diags(sign)
+    return csr_matrix(flip.dot(g)), csr_matrix(flip.dot(c))
+
+
+def expansion_estimate(g, c):
+    """
+    Choose a real expansion point for a circuit whose G is singular.
+
+    Returns the median rate G_ii/C_ii of the nodes with both a conductance
+    and a capacitance, or tf_interp.scale_estimate if there are none. The
+    point must keep clear of the poles near 0 that a singular G brings,
+    else the Krylov vectors all turn towards them and the subspace appears
+    invariant long before it is.
+    """
+    g_diag, c_diag = np.abs(g.diagonal()), np.abs(c.diagonal())
+    both = (g_diag > 0) & (c_diag > 0)
+    if not np.any(both):
+        return tf_interp.scale_estimate(g, c)
+    return float(np.median(g_diag[both]/c_diag[both]))
+
+
+def orthonormalize(block, basis, tolerance=DEFLATION_TOLERANCE):
+    """
+    Make the columns of block orthonormal to basis and to each other.
+
+    Parameters:
+
+    - block: dense matrix of new columns
+
+    - basis: list of orthonormal columns
+
+    - tolerance: a column is dropped if orthogonalization leaves less than
+      this fraction of its norm, as it then lies in the span already
+
+    Returns the list of new orthonormal columns. Every column is
+    orthogonalized twice by modified Gram-Schmidt, which keeps V orthonormal
+    to working precision.
+    """
+    kept = []
+    for col in np.asarray(block).T:
+        start = np.linalg.norm(col)
+        if start == 0:
+            continue
+        for sweep in range(2):
+            for other in basis + kept:
+                col = col - other*other.dot(col)
+        norm = np.linalg.norm(col)
+        if norm > tolerance*start:
+            kept.append(col/norm)
+    return kept
+
+
+def block_arnoldi(lu, c, b, order):
+    """
+    Orthonormal basis of the block Krylov subspace of PRIMA.
+
+    Parameters:
+
+    - lu: factorization of G + s0*C, with a method solve
+
+    - c: matrix C
+
+    - b: dense matrix B
+
+    - order: dimension q of the subspace
+
+    Returns V with q orthonormal columns, or fewer if the subspace is
+    invariant before, in which case the reduced model is exact.
+    """
+    block = orthonormalize(lu.solve(b), [])
+    basis = list(block)
+    while block and len(basis) < order:
+        block = orthonormalize(lu.solve(c.dot(np.column_stack(block))),
+                               basis)
+        basis.extend(block)
+    return np.column_stack(basis[:order])
+
+
+class Reduced_model():
+    """
+    PRIMA reduced model of a netlist.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - order: order q of the reduced model
+
+    - expansion: real expansion point s0 of the moments. If None, 0 is
+      used, so that the DC gain is exact, unless topology.dc_singular finds
+      G singular; then expansion_estimate is used.
+
+    The transfer functions, responses and error estimates are taken between
+    a voltage source and an output as in tf_interp.transfer_coefficients.
+    order holds the order actually reached, and exact is True if the Krylov
+    subspace became invariant, so that the model is exact. Raises ValueError
+    if G + s0*C is singular.
+    """
+
+    def __init__(self, origin, dest, ele, val, order=DEFAULT_ORDER,
+                 expansion=None):
+        """Build the Krylov basis and project the descriptor system."""
+        self.origin, self.dest, self.ele = list(origin), list(dest), list(ele)
+        self.val = list(val)
+        g, c, b, self.unknowns = mna.descriptor_system(origin, dest, ele, val)
+        self.full_g, self.full_c = g, c
+        g, c = passive_form(g, c, self.unknowns)
+        pencil = ordering.Ordered_pencil(g, c)
+        if expansion is not None:
+            self.expansion = float(expansion)
+        elif topology.dc_singular(origin, dest, ele):
+            self.expansion = expansion_estimate(self.full_g, self.full_c)
+        else:
+            self.expansion = 0.0
+        try:
+            lu = pencil.factor(self.expansion)
+        except RuntimeError:
+            raise ValueError("G + s0*C is singular at the expansion point")
+        self.v = block_arnoldi(lu, c, b, order)
+        self.order = self.v.shape[1]
+        self.exact = self.order < order or self.order == len(self.v)
+        self.block_size = b.shape[1]
+        self.g = self.v.T.dot(g.dot(self.v))
+        self.c = self.v.T.dot(c.dot(self.v))
+        self.b = self.v.T.dot(b)
+
+    def _projected(self, input_source, ident, output_var, order=None):
+        """Input and output vectors of the model of the first order columns."""
+        order = self.order if order is None else order
+        c0, c1 = mna.output_vectors(self.origin, self.dest, self.ele,
+                                    self.val, self.unknowns, ident,
+                                    output_var)
+        v = self.v[:, :order]
+        return (self.b[:order, int(input_source[1:])-1], v.T.dot(c0),
+                v.T.dot(c1))
+
+    def _response(self, s, input_source, ident, output_var, order=None):
+        """Transfer function at the points s of the model of order columns."""
+        order = self.order if order is None else order
+        b_col, c0, c1 = self._projected(input_source, ident, output_var,
+                                        order)
+        s = np.asarray(s, dtype=np.complex128)
+        mats = self.g[None, :order, :order] + \
+            s[:, None, None]*self.c[None, :order, :order]
+        rhs = np.repeat(b_col[None, :, None], len(s), axis=0)
+        x = np.linalg.solve(mats, rhs)[:, :, 0]
+        return np.sum((c0[None, :] + s[:, None]*c1[None, :])*x, axis=1)
+
+    def roots(self, input_source, ident, output_var):
+        """
+        Zeros, poles and gain of the transfer function of the reduced model.
+
+        Returns them as pole_zero.transfer_roots does.
+
+        Method: The zeros and poles are found by pole_zero from the small
+        dense pencils of the reduced model, and the gain is matched to its
+        response at pole_zero.reference_point.
+        """
+        zeros, poles = pole_zero.descriptor_roots(
+            self.g, self.c, *self._projected(input_source, ident, output_var))
+        point = pole_zero.reference_point(zeros, poles)
+        value = self._response([point], input_source, ident, output_var)[0]
+        zeros, poles = pole_zero.cancel_roots(zeros, poles)
+        return (zeros, poles) + pole_zero.gain(point, value, zeros, poles)
+
+    def transfer_coefficients(self, input_source, ident, output_var):
+        """
+        Coefficients of the transfer function of the reduced model.
+
+        Returns num_coeffs and den_coeffs in descending powers of s, with a
+        monic denominator, for use wherever the coefficients of
+        tf_interp.transfer_coefficients are used.
+
+        Method: The coefficients are formed from the roots of the model.
+        Interpolation on a circle, as tf_interp does, fails once the poles
+        spread over more decades than the order; the eigenvalues do not.
+        """
+        return pole_zero.coefficients(*self.roots(input_source, ident,
+                                                  output_var))
+
+    def state_space(self, input_source, ident, output_var):
+        """
+        State space realization of the reduced model.
+
+        Returns the matrices A, B, C, D of state_space.descriptor_realization
+        for control.ss, with the order of the reduced model as the number
+        of states.
+        """
+        return state_space.descriptor_realization(
+            self.g, self.c, *self._projected(input_source, ident, output_var))
+
+    def frequency_response(self, input_source, ident, output_var,
+                           omega=None):
+        """
+        Frequency response of the reduced model.
+
+        Returns the response and omega as ac_sweep.frequency_response does,
+        omega being chosen for the full circuit if not given.
+        """
+        if omega is None:
+            omega = ac_sweep.default_frequencies(self.full_g, self.full_c)
+        return (self._response(1j*np.asarray(omega, dtype=np.float64),
+                               input_source, ident, output_var), omega)
+
+    def error_estimate(self, input_source, ident, output_var, omega=None):
+        """
+        Estimated relative error of the reduced model.
+
+        The largest difference between the responses of this model and of
+        the model one block smaller, relative to the largest response, over
+        omega or the frequencies of ac_sweep.default_frequencies, which
+        reach down to the slowest pole of the full circuit. Returns 0 if the
+        Krylov subspace became invariant, as the model is then exact, and
+        inf if there is no smaller model to compare with. A model that is
+        not exact but whose response is zero at every frequency has missed
+        the output entirely, and its error is 1.
+        """
+        response, omega = self.frequency_response(input_source, ident,
+                                                  output_var, omega)
+        if self.exact:
+            return 0.0
+        smaller = self.order - self.block_size
+        if smaller < 1:
+            return np.inf
+        largest = np.max(np.abs(response))
+        if largest == 0:
+            return 1.0
+        previous = self._response(1j*np.asarray(omega, dtype=np.float64),
+                                  input_source, ident, output_var, smaller)
+        return float(np.max(np.abs(response - previous))/largest)
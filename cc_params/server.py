@@ -0,0 +1,470 @@
+"""
+Serve transfer functions of netlists over HTTP with JSON.
+
+Tools that only need transfer functions post netlist records to a local
+server instead of importing the package, whose GUI pulls in Tkinter. The
+records are those of batch.py, with optional fields asking for more than the
+coefficients::
+
+    {"name": "rlc", "origin": [1, 2, 3, 1], "dest": [2, 3, 0, 0],
+     "ele": ["R1", "L1", "C1", "V1"], "val": [10, 0.01, 1e-6, 10],
+     "input": "V1", "output": "V:C1",
+     "roots": true, "frequencies": [10, 100, 1000], "times": true}
+
+- roots: true for the zeros, poles and gain of pole_zero.transfer_roots
+
+- frequencies: list of angular frequencies in rad/s, or true for those of
+  ac_sweep.default_frequencies, for the sampled frequency response
+
+- times: list of time points in s, or true for the points chosen by the
+  control module, for the sampled step response
+
+A record with "order": q is answered from the PRIMA reduced model of order q
+of reduction.py, as batch does. The result holds num and den as from
+batch.solve_record, zeros and poles as lists of [real, imag], gain_sign and
+log_gain, the sign and natural logarithm of the gain, with gain itself or null
+if it does not fit a float, frequency as {"omega", "real", "imag"} and step
+as {"t", "y"}. An error in a record is reported in the error field of its
+result, with the fields computed before it.
+
+Endpoints:
+
+- POST /solve with one record, answered with one result, or with a list of
+  records, answered with the list of their results
+
+- GET /status with the number of workers and the counts of requests
+
+The records are solved by a Coalescing_pool of worker processes, started
+once with sympy and control imported and a small circuit solved, so that a
+request never waits for an import. Records that are identical to one still
+being solved are not solved again: they wait for the result of the first.
+Records of a list are all handed to the pool before the first result is
+awaited, so they are solved in parallel. The server listens on 127.0.0.1 by
+default and needs no other machine, so it can be load-tested locally with
+benchmarks/server_load.py.
+
+Usage::
+
+    python server.py [--host HOST] [--port PORT] [-j JOBS]
+    curl -d @rlc.json http://127.0.0.1:8000/solve
+"""
+import argparse
+import json
+import sys
+import threading
+from timeit import default_timer
+from multiprocessing import Pool, TimeoutError, cpu_count
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+import numpy as np
+import ac_sweep
+import batch
+import pole_zero
+import reduction
+import state_space
+import transient
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+REQUEST_TIMEOUT = 600
+POLL_INTERVAL = 1.0
+MAX_BODY = 16*1024*1024
+WARM_UP = {'name': 'warm-up', 'origin': [1, 2, 1], 'dest': [2, 0, 0],
+           'ele': ['R1', 'C1', 'V1'], 'val': [1e3, 1e-6, 1.0],
+           'input': 'V1', 'output': 'V:C1', 'roots': True,
+           'frequencies': True, 'times': True}
+
+
+def complex_list(values):
+    """List of [real, imag] of complex values, for JSON."""
+    return [[float(np.real(x)), float(np.imag(x))] for x in values]
+
+
+def json_gain(sign, log_gain):
+    """
+    Fields gain_sign, log_gain and gain of a result, all valid JSON.
+
+    log_gain is null for a zero gain, and gain is null if it does not fit a
+    float, as JSON has no Infinity.
+    """
+    with np.errstate(over='ignore'):
+        gain = sign*np.exp(log_gain)
+    return {'gain_sign': float(sign),
+            'log_gain': float(log_gain) if np.isfinite(log_gain) else None,
+            'gain': float(gain) if np.isfinite(gain) else None}
+
+
+def step_response(netlist, selection, times=None, model=None):
+    """
+    Sample the response of an output to a unit step of the input.
+
+    Parameters:
+
+    - netlist: tuple of the lists (origin, dest, ele, val)
+
+    - selection: tuple (input_source, ident, output_var)
+
+    - times: time points in s, chosen by the control module if None
+
+    - model: reduction.Reduced_model of the netlist, or None
+
+    Returns:
+
+    - T, yout: arrays of the time points and the response
+
+    Method: The step response of control.ss of the state space realization
+    of state_space, or of the reduced model, is sampled at times. A circuit
+    without a realization is simulated by transient.step_response up to the
+    last of the times, at the points it chooses.
+    """
+    import control
+    try:
+        if model is not None:
+            realization = model.state_space(*selection)
+        else:
+            realization = state_space.realization(*(netlist + selection))
+    except ValueError:
+        t_end = None if times is None else max(times)
+        return transient.step_response(*(netlist + selection + (t_end,)))
+    a, b, c, d = realization
+    if not len(a):
+        T = np.asarray([0.0, 1.0] if times is None else times, dtype=float)
+        return T, np.repeat(d[0, 0], len(T))
+    if times is None:
+        T, yout = control.step_response(control.ss(a, b, c, d))
+    else:
+        T, yout = control.step_response(control.ss(a, b, c, d),
+                                        np.asarray(times, dtype=float))
+    return T, np.ravel(yout)
+
+
+def solve_request(record):
+    """
+    Solve one netlist record and return the JSON serialisable result.
+
+    The coefficients are those of batch.solve_record. The roots and the
+    sampled responses asked for by the record are added from the netlist,
+    or from its reduced model if the record gives an order. Errors are
+    reported in the error field instead of being raised.
+    """
+    result = batch.solve_record(record)
+    if 'error' in result:
+        return result
+    netlist = (record['origin'], record['dest'], record['ele'],
+               record['val'])
+    ident, output_type = batch.parse_output_spec(record['output'])
+    selection = (record['input'], ident, output_type)
+    try:
+        model = None
+        if record.get('order') is not None:
+            model = reduction.Reduced_model(*netlist,
+                                            order=int(record['order']))
+        if record.get('roots'):
+            if model is not None:
+                zeros, poles, sign, log_gain = model.roots(*selection)
+            else:
+                zeros, poles, sign, log_gain = pole_zero.transfer_roots(
+                    *(netlist + selection))
+            result['zeros'], result['poles'] = complex_list(zeros), \
+                complex_list(poles)
+            result.update(json_gain(sign, log_gain))
+        if record.get('frequencies'):
+            omega = record['frequencies']
+            omega = None if omega is True else \
+                np.asarray(omega, dtype=float)
+            if model is not None:
+                response, omega = model.frequency_response(
+                    *(selection + (omega,)))
+            else:
+                response, omega = ac_sweep.frequency_response(
+                    *(netlist + selection + (omega,)))
+            result['frequency'] = {
+                'omega': [float(x) for x in omega],
+                'real': [float(x) for x in np.real(response)],
+                'imag': [float(x) for x in np.imag(response)]}
+        if record.get('times'):
+            times = None if record['times'] is True else record['times']
+            T, yout = step_response(netlist, selection, times, model)
+            result['step'] = {'t': [float(x) for x in T],
+                              'y': [float(x) for x in np.real(yout)]}
+    except (ValueError, TypeError, np.linalg.LinAlgError) as err:
+        result['error'] = str(err)
+    return result
+
+
+def warm_up(directory=None, max_bytes=0):
+    """
+    Initializer of the worker processes.
+
+    Gives prog_tf.CACHE the disk tier of batch.use_cache, imports control
+    with a backend of matplotlib that needs no display, and solves WARM_UP,
+    so that the parts of sympy and scipy imported on first use are loaded
+    before the first request.
+    """
+    batch.use_cache(directory, max_bytes)
+    import matplotlib
+    matplotlib.use('Agg')
+    import control
+    solve_request(WARM_UP)
+
+
+class Coalescing_pool():
+    """
+    Pool of worker processes sharing the work of identical records.
+
+    Parameters:
+
+    - processes: number of worker processes
+
+    - cache_args: directory and largest size in bytes of the disk tier of
+      prog_tf.CACHE in the workers, as for batch.use_cache
+
+    - timeout: seconds a record waits for its result
+
+    - task: function of a record solving it in the workers
+
+    Records are identical if their JSON texts with sorted keys are equal.
+    The result of a record in flight is shared by the identical records
+    submitted until a worker has finished it. A record that timed out stays
+    in flight, as its worker is still busy with it. Once every worker is
+    busy with such a record the pool is terminated and started again, and
+    the records still waiting are handed to the new workers.
+    """
+
+    def __init__(self, processes, cache_args=(None, 0),
+                 timeout=REQUEST_TIMEOUT, task=solve_request):
+        """Start the workers, each running warm_up once."""
+        self.processes, self.timeout = processes, timeout
+        self.cache_args, self.task = tuple(cache_args), task
+        self.pool = Pool(processes, warm_up, self.cache_args)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.stuck = {}
+        self.counts = {'requests': 0, 'coalesced': 0, 'timed_out': 0,
+                       'failed': 0, 'restarts': 0}
+
+    def _prune(self):
+        """Forget the records whose workers have finished. Needs the lock."""
+        for table in (self.in_flight, self.stuck):
+            for key in [x for x in table if table[x].ready()]:
+                del table[key]
+
+    def _restart(self):
+        """
+        Start new workers in place of the stuck ones. Needs the lock.
+
+        The records in flight that are not stuck are handed to the new
+        workers; the stuck ones are dropped.
+        """
+        self.pool.terminate()
+        self.pool.join()
+        self.pool = Pool(self.processes, warm_up, self.cache_args)
+        self.counts['restarts'] += 1
+        for key in self.stuck:
+            del self.in_flight[key]
+        self.stuck = {}
+        for key in self.in_flight:
+            self.in_flight[key] = self.pool.apply_async(
+                self.task, (json.loads(key),))
+
+    def submit(self, record):
+        """
+        Hand a record to the workers unless an identical one is in flight.
+
+        Returns the tuple (key, pending) to be handed to wait, pending being
+        the AsyncResult of the record or of the identical one in flight.
+        """
+        key = json.dumps(record, sort_keys=True)
+        with self.lock:
+            self._prune()
+            self.counts['requests'] += 1
+            pending = self.in_flight.get(key)
+            if pending is not None:
+                self.counts['coalesced'] += 1
+                return key, pending
+            pending = self.pool.apply_async(self.task, (record,))
+            self.in_flight[key] = pending
+            return key, pending
+
+    def wait(self, key, pending):
+        """
+        Result of a record handed over by submit.
+
+        An exception raised in the worker, a timeout or a restart of the
+        workers gives a result with the name of the record and the error.
+        If the workers are restarted for other records while this one
+        waits, it is followed to the new workers.
+        """
+        name = json.loads(key).get('name')
+        end = default_timer() + self.timeout
+        while True:
+            try:
+                return pending.get(max(0.0, min(POLL_INTERVAL,
+                                                end - default_timer())))
+            except TimeoutError:
+                pass
+            except Exception as err:
+                with self.lock:
+                    self.counts['failed'] += 1
+                return {'name': name,
+                        'error': "%s: %s" % (type(err).__name__, err)}
+            with self.lock:
+                if pending.ready():
+                    continue
+                current = self.in_flight.get(key)
+                if current is None:
+                    return {'name': name,
+                            'error': "Workers restarted while solving"}
+                if current is not pending or default_timer() < end:
+                    pending = current
+                    continue
+                self.counts['timed_out'] += 1
+                self.stuck[key] = pending
+                self._prune()
+                if len(self.stuck) >= self.processes:
+                    self._restart()
+                return {'name': name,
+                        'error': "No result after %d s" % self.timeout}
+
+    def solve(self, records):
+        """
+        Solve a list of records in parallel.
+
+        Returns the list of their results. A record that is not a JSON
+        object has an error as result, with a null name as from
+        batch.solve_record.
+        """
+        pending = []
+        for record in records:
+            if isinstance(record, dict):
+                pending.append(self.submit(record))
+            else:
+                pending.append({'name': None,
+                                'error': "Record must be a JSON object"})
+        return [self.wait(*x) if isinstance(x, tuple) else x
+                for x in pending]
+
+    def status(self):
+        """Number of workers, of records in flight and the counts."""
+        with self.lock:
+            self._prune()
+            return dict(self.counts, workers=self.processes,
+                        in_flight=len(self.in_flight), stuck=len(self.stuck))
+
+    def close(self):
+        """Stop the workers."""
+        self.pool.terminate()
+        self.pool.join()
+
+
+class Request_handler(BaseHTTPRequestHandler):
+    """Handler of the requests to a Solver_server."""
+
+    def send_json(self, code, value):
+        """Send value as a JSON response with the status code."""
+        body = json.dumps(value).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """Answer GET /status."""
+        if self.path != '/status':
+            self.send_json(404, {'error': "Not found"})
+            return
+        self.send_json(200, self.server.pool.status())
+
+    def do_POST(self):
+        """Answer POST /solve with the results of the records posted."""
+        if self.path != '/solve':
+            self.send_json(404, {'error': "Not found"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            self.send_json(413, {'error': "Body larger than %d bytes" %
+                                 MAX_BODY})
+            return
+        try:
+            data = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            self.send_json(400, {'error': "Body must be JSON"})
+            return
+        if isinstance(data, list):
+            self.send_json(200, self.server.pool.solve(data))
+        else:
+            self.send_json(200, self.server.pool.solve([data])[0])
+
+    def log_message(self, fmt, *args):
+        """Log the requests unless the server is quiet."""
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, fmt, *args)
+
+
+class Solver_server(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server answering every request in its own thread.
+
+    Parameters:
+
+    - address: tuple (host, port), port 0 for any free port
+
+    - pool: Coalescing_pool solving the records
+
+    - quiet: True to log no request
+    """
+    daemon_threads = True
+
+    def __init__(self, address, pool, quiet=False):
+        """Bind the server to address."""
+        HTTPServer.__init__(self, address, Request_handler)
+        self.pool, self.quiet = pool, quiet
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Starts the workers and serves until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Serve transfer functions "
+                                     "of netlists over HTTP with JSON.")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help="address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help="port to listen on")
+    parser.add_argument('-j', '--jobs', type=int, default=cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument('--timeout', type=int, default=REQUEST_TIMEOUT,
+                        help="seconds a request waits for its result")
+    parser.add_argument('--cache-dir', default=None,
+                        help="directory of a persistent cache of solutions")
+    parser.add_argument('--cache-size', type=int, default=64,
+                        help="largest size of the cache directory in MB")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="do not log the requests")
+    args = parser.parse_args(argv)
+    pool = Coalescing_pool(args.jobs, (args.cache_dir,
+                                       args.cache_size*1024*1024),
+                           args.timeout)
+    server = Solver_server((args.host, args.port), pool, args.quiet)
+    sys.stderr.write("Serving on http://%s:%d with %d workers\n" %
+                     (server.server_address[0], server.server_address[1],
+                      args.jobs))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,352 @@
+"""
+Read netlists written in a SPICE like text format.
+
+Each element is described on a line of its own::
+
+    * series RLC circuit
+    Vin  in  0    DC 10
+    R1   in  mid  10        ; inline comment
+    L1   mid out  10m
+    C1   out 0    1u
+    .end
+
+The first letter of the element name gives its type (R, L, C or V). Node 0
+(or gnd) is the reference node. All other labels, numeric or named, are
+numbered 1, 2, .. in the order in which they first appear, so the nodes have
+no gaps even if the numeric labels do. Values accept the usual
+engineering suffixes T, G, MEG, K, M, MIL, U, N, P and F, and any trailing unit
+such as the Ohm in 10kOhm is ignored. Lines starting with * are comments, text
+after ; or $ is an inline comment and a line starting with + continues the
+previous line. Subcircuits are defined between .subckt and .ends and used
+by X instances, see read_hierarchy. Other dot commands than these and .end
+are ignored.
+
+The file is read one line at a time so only the four lists of the netlist, in
+the form used by gui_input.Input_screen, and the subcircuits are kept in
+memory.
+"""
+import re
+import subckt
+
+SUFFIXES = {'t': 1e12, 'g': 1e9, 'meg': 1e6, 'k': 1e3, 'm': 1e-3,
+            'mil': 25.4e-6, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12, 'f': 1e-15}
+VALUE_PATTERN = re.compile(r'^([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)'
+                           r'(meg|mil|[tgkmunpf])?', re.IGNORECASE)
+GROUND_LABELS = ('0', 'gnd')
+ELEMENT_TYPES = ('R', 'L', 'C', 'V')
+
+
+def parse_value(token):
+    """
+    Convert a SPICE number with an optional engineering suffix to float.
+
+    Parameters:
+
+    - token: string such as 10k, 4.7u, 1e-3, 2MEG or 10kOhm
+
+    Returns:
+
+    - value of the token as a float
+
+    Raises ValueError if the token does not start with a number.
+    """
+    if token[-1:].isdigit() and '_' not in token:
+        try:
+            return float(token)
+        except ValueError:
+            pass
+    match = VALUE_PATTERN.match(token)
+    if match is None:
+        raise ValueError("Invalid value " + token)
+    value = float(match.group(1))
+    if match.group(2):
+        value *= SUFFIXES[match.group(2).lower()]
+    return value
+
+
+def logical_lines(lines):
+    """
+    Join continuation lines and strip comments.
+
+    Parameters:
+
+    - lines: iterable of text lines, for eg. an open file
+
+    Yields:
+
+    - (line number, list of tokens) for every non-empty logical line, stopping
+      at .end
+    """
+    pending, pending_num = None, 0
+    for num, line in enumerate(lines, 1):
+        if ';' in line:
+            line = line.split(';', 1)[0]
+        if '$' in line:
+            line = line.split('$', 1)[0]
+        line = line.strip()
+        if not line or line[0] == '*':
+            continue
+        if line[0] == '+':
+            if pending is None:
+                raise ValueError("Line %d: continuation without a previous "
+                                 "line" % num)
+            pending.extend(line[1:].split())
+            continue
+        if pending is not None:
+            yield pending_num, pending
+        pending, pending_num = line.split(), num
+        if line[0] == '.' and pending[0].lower() == '.end':
+            return
+    if pending is not None:
+        yield pending_num, pending
+
+
+def _element(num, tokens, values=None):
+    """
+    Parse the tokens of one element line.
+
+    values is a dictionary of the tokens already converted by parse_value,
+    which is filled as the lines are parsed; netlists repeat a few values
+    many times. Returns (name, origin label, destination label, type,
+    value).
+    """
+    kind = tokens[0][0].upper()
+    if kind not in ELEMENT_TYPES:
+        raise ValueError("Line %d: unsupported element %s" % (num, tokens[0]))
+    args = tokens[3:]
+    if kind == 'V':
+        args = [x for x in args if x.upper() not in ('DC', 'AC')]
+    if not args:
+        raise ValueError("Line %d: expected name, two nodes and a value"
+                         % num)
+    token = args[0]
+    value = None if values is None else values.get(token)
+    if value is None:
+        try:
+            value = parse_value(token)
+        except ValueError:
+            raise ValueError("Line %d: invalid value %s" % (num, token))
+        if values is not None:
+            values[token] = value
+    return tokens[0].upper(), tokens[1], tokens[2], kind, value
+
+
+def iter_elements(lines):
+    """
+    Parse the element lines of a netlist one at a time.
+
+    Parameters:
+
+    - lines: iterable of text lines, for eg. an open file
+
+    Yields:
+
+    - (name, origin label, destination label, type, value) for every element,
+      where the type is one of R, L, C or V
+
+    Method: For voltage sources the keywords DC and AC are skipped and the
+    first number after the nodes is taken as the value of the source.
+    """
+    for num, tokens in logical_lines(lines):
+        if tokens[0].startswith('.'):
+            continue
+        yield _element(num, tokens)
+
+
+def _number_local(labels, ports):
+    """
+    Number the node labels of a subcircuit definition.
+
+    The reference node is 0, the ports are 1 .. len(ports) in their order
+    and the other labels follow in the order in which they first appear.
+    """
+    numbers = dict((label, ind) for ind, label in enumerate(ports, 1))
+    count = len(ports)
+    for label in labels:
+        if label.lower() in GROUND_LABELS:
+            numbers[label] = 0
+        elif label not in numbers:
+            count += 1
+            numbers[label] = count
+    return numbers
+
+
+class _Definition():
+    """Lines of a .subckt definition collected until its .ends."""
+
+    def __init__(self, num, tokens):
+        """Start the definition from the tokens of the .subckt line."""
+        if len(tokens) < 3:
+            raise ValueError("Line %d: expected name and ports of the "
+                             "subcircuit" % num)
+        self.name = tokens[1].upper()
+        self.ports = tokens[2:]
+        if len(set(self.ports)) < len(self.ports) or \
+                any(x.lower() in GROUND_LABELS for x in self.ports):
+            raise ValueError("Line %d: ports must be distinct nodes other "
+                             "than the reference node" % num)
+        self.elements, self.instances = [], []
+
+    def build(self):
+        """Number the local nodes and return the subckt.Subcircuit."""
+        labels = [x for name, o, d, kind, value in self.elements
+                  for x in (o, d)]
+        labels += [x for name, definition, nodes in self.instances
+                   for x in nodes]
+        numbers = _number_local(labels, self.ports)
+        counts = dict((x, 0) for x in ELEMENT_TYPES)
+        seen, ele = set(), []
+        for name, origin, dest, kind, value in self.elements:
+            if name in seen:
+                raise ValueError("Same identifier entered twice in "
+                                 "subcircuit " + self.name + ": " + name)
+            seen.add(name)
+            counts[kind] += 1
+            ele.append(kind + str(counts[kind]))
+        instances = [subckt.Instance(name, definition,
+                                     [numbers[x] for x in nodes])
+                     for name, definition, nodes in self.instances]
+        return subckt.Subcircuit(
+            self.name, len(self.ports),
+            [numbers[x[1]] for x in self.elements],
+            [numbers[x[2]] for x in self.elements], ele,
+            [x[4] for x in self.elements], instances)
+
+
+def read_hierarchy(lines):
+    """
+    Read a SPICE like netlist with subcircuits into the lists of prog_tf.py.
+
+    Parameters:
+
+    - lines: iterable of text lines, for eg. an open file
+
+    Returns:
+
+    - origin_list, destination_list, ele_type, val_list, names: the elements
+      outside of the subcircuit definitions, as returned by read_netlist
+
+    - instances: list of subckt.Instance used outside of the definitions,
+      with nodes numbered as in origin_list and destination_list
+
+    Besides elements the file may hold subcircuit definitions and their
+    instances::
+
+        .subckt section in out
+        R1 in mid 1k
+        C1 mid 0 1u
+        R2 mid out 1k
+        .ends
+        X1 1 2 section
+        X2 2 3 section
+
+    A definition gives its ports after its name and ends with .ends. The
+    nodes of its elements are local to it, except the reference node. An
+    instance X<name> gives the nodes at the ports of a definition found
+    earlier in the file followed by the name of the definition, and may also
+    be used inside another definition.
+
+    Method: The positive node of a voltage source becomes its origin node.
+    Every label other than the reference node is numbered when it is first
+    seen, numeric labels as well, so that a file whose numeric labels skip
+    numbers gives no floating nodes. Only the lines of a definition are kept
+    until its .ends.
+    """
+    origin_list, destination_list, ele_type, val_list = [], [], [], []
+    names, counts = {}, dict((x, 0) for x in ELEMENT_TYPES)
+    definitions, instances, current = {}, [], None
+    numbers, grounds, values = {}, [], {}
+
+    def node_number(label):
+        number = numbers.get(label)
+        if number is None:
+            if label.lower() in GROUND_LABELS:
+                number = 0
+                grounds.append(label)
+            else:
+                number = len(numbers) - len(grounds) + 1
+            numbers[label] = number
+        return number
+
+    for num, tokens in logical_lines(lines):
+        word = tokens[0].lower() if tokens[0][0] in '.xX' else ''
+        if word == '.subckt':
+            if current is not None:
+                raise ValueError("Line %d: .subckt inside a subcircuit" % num)
+            current = _Definition(num, tokens)
+            continue
+        if word == '.ends':
+            if current is None:
+                raise ValueError("Line %d: .ends without .subckt" % num)
+            try:
+                definitions[current.name] = current.build()
+            except ValueError as err:
+                raise ValueError("Line %d: %s" % (num, err))
+            current = None
+            continue
+        if word[:1] == '.':
+            continue
+        if word[:1] == 'x':
+            definition = definitions.get(tokens[-1].upper())
+            if len(tokens) < 3 or definition is None:
+                raise ValueError("Line %d: expected nodes and the name of a "
+                                 "subcircuit defined before" % num)
+            if len(tokens) - 2 != definition.num_ports:
+                raise ValueError("Line %d: %s has %d ports" %
+                                 (num, definition.name, definition.num_ports))
+            if current is not None:
+                current.instances.append((tokens[0].upper(), definition,
+                                          tokens[1:-1]))
+                continue
+            nodes = [node_number(x) for x in tokens[1:-1]]
+            instances.append(subckt.Instance(tokens[0].upper(), definition,
+                                             nodes))
+            continue
+        name, origin, dest, kind, value = _element(num, tokens, values)
+        if current is not None:
+            current.elements.append((name, origin, dest, kind, value))
+            continue
+        if name in names:
+            raise ValueError("Same identifier entered twice: " + name)
+        counts[kind] += 1
+        names[name] = kind + str(counts[kind])
+        origin_list.append(node_number(origin))
+        destination_list.append(node_number(dest))
+        ele_type.append(names[name])
+        val_list.append(value)
+    if current is not None:
+        raise ValueError("Missing .ends of subcircuit " + current.name)
+    return origin_list, destination_list, ele_type, val_list, names, \
+        instances
+
+
+def read_netlist(lines):
+    """
+    Read a SPICE like netlist into the lists used by prog_tf.py.
+
+    Parameters:
+
+    - lines: iterable of text lines, for eg. an open file
+
+    Returns:
+
+    - origin_list: list of originating nodes in circuit
+
+    - destination_list: list of terminating nodes in circuit
+
+    - ele_type: list of element identifiers, numbered per type as R1, R2, ..
+      in the order of the file, as entered through gui_input.Input_screen
+
+    - val_list: list of element values in circuit
+
+    - names: dictionary mapping the (upper case) element names of the file to
+      the identifiers in ele_type
+
+    The file is read by read_hierarchy. Raises ValueError if it uses
+    subcircuits, which cannot be given as these lists alone.
+    """
+    origin_list, destination_list, ele_type, val_list, names, instances = \
+        read_hierarchy(lines)
+    if instances:
+        raise ValueError("Subcircuit instances need read_hierarchy")
+    return origin_list, destination_list, ele_type, val_list, names
@@ -0,0 +1,224 @@
+"""
+State space realization of a netlist for control.ss.
+
+The descriptor system C*dx/dt + G*x = b*u of mna.descriptor_system, with
+the output y = c0.x + c1.dx/dt, is turned into
+
+    dz/dt = A*z + B*u,  y = C*z + D*u
+
+by eliminating the algebraic unknowns, in two steps:
+
+- the unknowns whose rows and columns of C are empty, the voltage source
+  currents and the nodes without a capacitor, are eliminated from the
+  sparse matrices by the Schur complement of G on them, as in pole_zero,
+  unless G is singular on them
+
+- if C is still singular on the remaining unknowns, as with a loop of
+  capacitors or a cutset of inductors, it is rotated by its singular value
+  decomposition C = U*S*V^T into diag(S_r, 0) and the unknowns of the zero
+  singular values are eliminated the same way
+
+The remaining C is nonsingular and A = -C^-1 G. No symbolic algebra is used,
+and as the dynamic unknowns stay node voltages and inductor currents, or
+orthogonal combinations of them, the realization is as well conditioned as
+the circuit.
+
+A capacitor across a voltage source, or a loop of capacitors and voltage
+sources, makes the circuit of index two: G is singular on the algebraic
+unknowns. realization first eliminates the currents of the voltage sources
+that the output does not use by merging the two node equations of each
+such source, which removes the derivative of the capacitor voltage along
+with the current. Only if the output is the current of such a capacitor or
+source, which holds the derivative of the input, is there no realization.
+"""
+import numpy as np
+from scipy.linalg import svd
+from scipy.sparse import csr_matrix
+import mna
+import pole_zero
+
+RANK_TOLERANCE = 1e-12
+
+
+def eliminate(g, c, b_col, c0, c1, d, rows, cols):
+    """
+    Eliminate algebraic unknowns from a dense descriptor system.
+
+    Parameters:
+
+    - g, c, b_col, c0, c1: descriptor system as in descriptor_realization
+
+    - d: direct feedthrough of u to y found so far
+
+    - rows, cols: boolean arrays of the equations and unknowns eliminated,
+      of the same number, where C is zero
+
+    Returns:
+
+    - g, c, b_col, c0, c1, d of the remaining unknowns
+
+    Raises ValueError if G is singular on the eliminated unknowns, to
+    within RANK_TOLERANCE, or if the output depends on the derivative of
+    one of them.
+    """
+    alg_rows, dyn_rows = np.nonzero(rows)[0], np.nonzero(~rows)[0]
+    alg_cols, dyn_cols = np.nonzero(cols)[0], np.nonzero(~cols)[0]
+    if np.any(c1[alg_cols]):
+        raise ValueError("Circuit has no state space realization for an "
+                         "output on the derivative of an algebraic unknown")
+    g_alg = g[alg_rows]
+    if np.linalg.cond(g_alg[:, alg_cols]) > 1/RANK_TOLERANCE:
+        raise ValueError("Circuit has no state space realization")
+    solved = np.linalg.solve(g_alg[:, alg_cols],
+                             np.column_stack((g_alg[:, dyn_cols],
+                                              b_col[alg_rows])))
+    coupling, feed = solved[:, :-1], solved[:, -1]
+    g_dyn = g[dyn_rows]
+    return (g_dyn[:, dyn_cols] - g_dyn[:, alg_cols].dot(coupling),
+            c[dyn_rows][:, dyn_cols],
+            b_col[dyn_rows] - g_dyn[:, alg_cols].dot(feed),
+            c0[dyn_cols] - c0[alg_cols].dot(coupling), c1[dyn_cols],
+            d + c0[alg_cols].dot(feed))
+
+
+def descriptor_realization(g, c, b_col, c0, c1):
+    """
+    State space matrices of a descriptor system.
+
+    Parameters:
+
+    - g, c: sparse or dense matrices G and C of (G + s*C)x = b_col*u
+
+    - b_col: dense input vector
+
+    - c0, c1: dense output vectors, the output being (c0 + s*c1).x
+
+    Returns:
+
+    - a, b, c, d: dense arrays of shapes (n, n), (n, 1), (1, n) and (1, 1),
+      n being the number of states
+
+    Raises ValueError if the system has no state space realization.
+    """
+    g, c = csr_matrix(g), csr_matrix(c)
+    b_col, c0, c1 = [np.asarray(x, dtype=np.float64)
+                     for x in (b_col, c0, c1)]
+    rows, cols = pole_zero.algebraic_unknowns(c)
+    system = g.toarray(), c.toarray(), b_col, c0, c1, 0.0
+    if rows.any() and rows.sum() == cols.sum():
+        try:
+            system = eliminate(*(system + (rows, cols)))
+        except ValueError:
+            pass
+    g, c, b_col, c0, c1, d = system
+    if len(c):
+        left, values, right = svd(c)
+        rank = int(np.sum(values > RANK_TOLERANCE*values[0])) \
+            if values[0] > 0 else 0
+        if rank < len(c):
+            right = right.T
+            system = (left.T.dot(g).dot(right), np.diag(values),
+                      left.T.dot(b_col), c0.dot(right), c1.dot(right), d)
+            kept = np.arange(len(c)) >= rank
+            g, c, b_col, c0, c1, d = eliminate(*(system + (kept, kept)))
+    if not len(c):
+        empty = np.zeros((0, 0))
+        return empty, np.zeros((0, 1)), np.zeros((1, 0)), np.array([[d]])
+    a = -np.linalg.solve(c, g)
+    b = np.linalg.solve(c, b_col)
+    return (a, b.reshape(-1, 1), (c0 + c1.dot(a)).reshape(1, -1),
+            np.array([[d + c1.dot(b)]]))
+
+
+def unobserved_sources(g, c, b_col, c0, c1, unknowns):
+    """
+    Eliminate the voltage source currents the output does not depend on.
+
+    Parameters:
+
+    - g, c, b_col, c0, c1: descriptor system as in descriptor_realization
+
+    - unknowns: names of the unknowns from mna.descriptor_system
+
+    Returns:
+
+    - g, c, b_col, c0, c1: dense descriptor system of the other unknowns
+
+    Method: The current I_Vk only appears in the equations of Kirchhoff's
+    current law at the nodes of the source. One of them is solved for it and
+    substituted into the other, which becomes the law of the supernode
+    around the source, and the equation and the current are dropped. The
+    currents of a capacitor across the source then cancel in the supernode,
+    so its voltage is no longer a state but the algebraic one of the source.
+    """
+    g, c = csr_matrix(g).toarray(), csr_matrix(c).toarray()
+    b_col = np.array(b_col, dtype=np.float64)
+    keep_rows = np.ones(len(unknowns), dtype=bool)
+    keep_cols = np.ones(len(unknowns), dtype=bool)
+    for col, name in enumerate(unknowns):
+        if not name.startswith('I_V') or c0[col] or c1[col] or \
+                np.any(c[:, col]):
+            continue
+        rows = [x for x in np.nonzero(g[:, col])[0] if keep_rows[x]]
+        if not rows:
+            continue
+        pivot = rows[0]
+        for row in rows[1:]:
+            factor = g[row, col]/g[pivot, col]
+            g[row] -= factor*g[pivot]
+            c[row] -= factor*c[pivot]
+            b_col[row] -= factor*b_col[pivot]
+        keep_rows[pivot], keep_cols[col] = False, False
+    return (g[keep_rows][:, keep_cols], c[keep_rows][:, keep_cols],
+            b_col[keep_rows], np.asarray(c0)[keep_cols],
+            np.asarray(c1)[keep_cols])
+
+
+def realization(origin, dest, ele, val, input_source, ident, output_var):
+    """
+    Compute a state space realization between an input and an output.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - input_source: identifier of the voltage source used as input, eg. V1
+
+    - ident: identifier of the element whose output parameter is asked
+
+    - output_var: I if current is demanded, else V
+
+    Returns:
+
+    - a, b, c, d: matrices of the realization, as from
+      descriptor_realization, ready for control.ss
+
+    The source currents the output does not use are eliminated first by
+    unobserved_sources.
+    """
+    g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+    c0, c1 = mna.output_vectors(origin, dest, ele, val, unknowns, ident,
+                                output_var)
+    return descriptor_realization(*unobserved_sources(
+        g, c, b[:, int(input_source[1:])-1], c0, c1, unknowns))
+
+
+def frequency_response(a, b, c, d, omega):
+    """
+    Frequency response of a state space realization.
+
+    Returns the complex array of C*(j*omega*I - A)^-1*B + D at every
+    angular frequency in omega.
+    """
+    s = 1j*np.asarray(omega, dtype=np.float64)
+    mats = s[:, None, None]*np.eye(len(a))[None] - a[None]
+    rhs = np.repeat(b[None].astype(np.complex128), len(s), axis=0)
+    x = np.linalg.solve(mats, rhs)[:, :, 0] if len(a) else \
+        np.zeros((len(s), 0))
+    return x.dot(c[0]) + d[0, 0]
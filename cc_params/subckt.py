@@ -0,0 +1,253 @@
+"""
+Subcircuits reduced to admittance blocks at their ports.
+
+A subcircuit is a netlist of R, L and C elements between its ports and its
+internal nodes. It is defined once, for eg. with .subckt in a file read by
+spice_netlist.read_hierarchy, and used by any number of instances. An
+instance only enters the nodal equations of the nodes at its ports, so the
+internal nodes are eliminated once per definition by Kron reduction, the
+Schur complement of the internal block of the admittance matrix Y(s):
+
+    Y_red = Y_pp - Y_pi Y_ii^-1 Y_ip
+
+Y_red is a dense (ports x ports) matrix of rational functions of s. It is
+computed exactly over the rationals, kept in BLOCKS under the contents of
+the definition and added by stamp_instances into the conductance matrix of
+prog_tf.set_cond_matrix at the nodes the instance is connected to. The nodal
+analysis equations then have no unknowns for the internal nodes.
+
+Local numbering of the nodes of a definition: 0 is the reference node of the
+whole circuit, the ports are 1 .. number of ports and the internal nodes
+follow. A definition may itself hold instances of other definitions, whose
+blocks are stamped into its admittance matrix before the reduction.
+"""
+from sympy import symbols, cancel, nsimplify
+from sympy.matrices import Matrix
+from netlist import Netlist, SOURCE, UNKNOWN
+from tf_cache import Memory_cache
+from topology import Union_find
+
+BLOCKS = Memory_cache(maxsize=256)
+
+
+def _stamp(y, a, b, admittance):
+    """Add an admittance between nodes a and b to the matrix y."""
+    if a:
+        y[a-1, a-1] += admittance
+    if b:
+        y[b-1, b-1] += admittance
+    if a and b:
+        y[a-1, b-1] -= admittance
+        y[b-1, a-1] -= admittance
+
+
+def admittance_matrix(origin, dest, ele, val, size):
+    """
+    Build the exact admittance matrix Y(s) of a netlist of R, L and C.
+
+    Parameters:
+
+    - origin, dest, ele, val: the netlist
+
+    - size: number of nodes, at least the largest node number
+
+    Returns:
+
+    - (size x size) sympy Matrix with rational coefficients: 1/R, 1/(s*L)
+      and s*C stamped between the nodes of every element
+    """
+    s = symbols('s')
+    y = Matrix.zeros(size, size)
+    net = Netlist(origin, dest, ele, val)
+    for kind in ('R', 'L', 'C'):
+        positions, a, b, values = net.of_type(kind)
+        for x, y_a, y_b, value in zip(positions, a, b, values):
+            value = nsimplify(float(value), rational=True)
+            if kind == 'R':
+                admittance = 1/value
+            elif kind == 'L':
+                admittance = 1/(s*value)
+            else:
+                admittance = s*value
+            _stamp(y, int(y_a), int(y_b), admittance)
+    return y
+
+
+def stamp_block(y, block, nodes):
+    """
+    Add a port block to an admittance or conductance matrix.
+
+    Parameters:
+
+    - y: sympy Matrix, changed in place
+
+    - block: (ports x ports) block of a Subcircuit
+
+    - nodes: node of y at every port, the rows and columns of ports at the
+      reference node 0 are dropped
+    """
+    for i, row in enumerate(nodes):
+        if row == 0:
+            continue
+        for j, col in enumerate(nodes):
+            if col != 0 and block[i, j] != 0:
+                y[row-1, col-1] += block[i, j]
+
+
+class Subcircuit():
+    """
+    Definition of a subcircuit.
+
+    Parameters:
+
+    - name: name of the definition
+
+    - num_ports: number of ports, the local nodes 1 .. num_ports
+
+    - origin, dest, ele, val: netlist of the R, L and C elements in local
+      node numbers
+
+    - instances: list of Instance of other definitions, in local node
+      numbers
+
+    Raises ValueError for voltage sources or unknown elements.
+    """
+
+    def __init__(self, name, num_ports, origin, dest, ele, val,
+                 instances=()):
+        """Store the definition and compute the key of its block."""
+        self.name = name
+        self.num_ports = num_ports
+        self.origin, self.dest = list(origin), list(dest)
+        self.ele, self.val = list(ele), list(val)
+        self.instances = list(instances)
+        kind = Netlist(origin, dest, ele, val).kind
+        if ((kind == SOURCE) | (kind == UNKNOWN)).any():
+            raise ValueError("Subcircuit " + name + " may only hold R, L "
+                             "and C elements")
+        self.size = max([num_ports] + self.origin + self.dest +
+                        [n for inst in self.instances for n in inst.nodes])
+        self.key = (num_ports, tuple(self.origin), tuple(self.dest),
+                    tuple(x[0].upper() for x in self.ele),
+                    tuple(float(x) for x in self.val),
+                    tuple((inst.definition.key, tuple(inst.nodes))
+                          for inst in self.instances))
+
+    def port_block(self):
+        """
+        Return the Kron-reduced admittance block at the ports.
+
+        The block is computed on the first call for a definition with these
+        contents and found in BLOCKS afterwards, whatever the name of the
+        definition. Raises ValueError if internal nodes are floating, as
+        Y_ii is singular then.
+        """
+        block = BLOCKS.get(self.key)
+        if block is None:
+            block = self._reduce()
+            BLOCKS.put(self.key, block)
+        return block
+
+    def _reduce(self):
+        """Eliminate the internal nodes from the admittance matrix."""
+        y = admittance_matrix(self.origin, self.dest, self.ele, self.val,
+                              self.size)
+        for inst in self.instances:
+            stamp_block(y, inst.definition.port_block(), inst.nodes)
+        ports = self.num_ports
+        if self.size > ports:
+            try:
+                x = y[ports:, ports:].LUsolve(y[ports:, :ports])
+            except ValueError:
+                raise ValueError("Subcircuit " + self.name +
+                                 " has floating internal nodes")
+            y = y[:ports, :ports] - y[:ports, ports:]*x
+        return y.applyfunc(cancel)
+
+    def port_edges(self):
+        """
+        Return pairs of local nodes joined inside the subcircuit.
+
+        Every port joined through the elements to an earlier port or to the
+        reference node is paired with the first of them, so the pairs join
+        the ports exactly as the subcircuit does. Used for the graph checks
+        of prog_tf.check_netlist_error, which see an instance as resistors
+        along these pairs.
+        """
+        sets = Union_find(self.size + 1)
+        for a, b in zip(self.origin, self.dest):
+            sets.union(a, b)
+        for inst in self.instances:
+            for a, b in inst.edges():
+                sets.union(a, b)
+        first = {sets.find(0): 0}
+        edges = []
+        for port in range(1, self.num_ports + 1):
+            root = sets.find(port)
+            if root in first:
+                edges.append((first[root], port))
+            else:
+                first[root] = port
+        return edges
+
+
+class Instance():
+    """
+    Use of a Subcircuit in a netlist.
+
+    Parameters:
+
+    - name: name of the instance, for eg. X1
+
+    - definition: the Subcircuit
+
+    - nodes: node of the netlist at every port of the definition
+
+    Raises ValueError if the number of nodes is not the number of ports.
+    """
+
+    def __init__(self, name, definition, nodes):
+        """Store the instance."""
+        if len(nodes) != definition.num_ports:
+            raise ValueError("Instance " + name + " of " + definition.name +
+                             " needs " + str(definition.num_ports) +
+                             " nodes")
+        self.name = name
+        self.definition = definition
+        self.nodes = list(nodes)
+
+    def edges(self):
+        """Pairs of nodes of the netlist joined inside the instance."""
+        nodes = [0] + self.nodes
+        return [(nodes[a], nodes[b]) for a, b in
+                self.definition.port_edges()]
+
+
+def largest_node(instances):
+    """Largest node number used by the instances, 0 if there are none."""
+    return max([0] + [n for inst in instances for n in inst.nodes])
+
+
+def stamp_instances(cond, instances):
+    """
+    Add the port blocks of all instances to a conductance matrix.
+
+    Parameters:
+
+    - cond: conductance matrix of prog_tf.set_cond_matrix, changed in place
+
+    - instances: list of Instance
+    """
+    for inst in instances:
+        stamp_block(cond, inst.definition.port_block(), inst.nodes)
+
+
+def check_edges(instances):
+    """
+    Return the instances as lists of origin and destination nodes.
+
+    Each instance is replaced by the pairs of Instance.edges, so the graph
+    checks of a netlist see the connections made through the instances.
+    """
+    pairs = [pair for inst in instances for pair in inst.edges()]
+    return [a for a, b in pairs], [b for a, b in pairs]
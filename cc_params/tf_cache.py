@@ -0,0 +1,284 @@
+"""
+Cache transfer functions of netlists.
+
+Results are stored under a hash of a canonical form of the netlist, so the
+same circuit entered with other node numbers or with its elements in another
+order is found again. There are two tiers: a bounded in-memory LRU cache and
+an optional directory on disk whose total size is bounded as well. Entries
+found on disk are promoted to memory.
+
+Canonical form: the nodes are coloured by repeated refinement, starting from
+the reference node and refining each colour by the multiset of (element type,
+value, direction, neighbour colour) of the elements at the node. Nodes are
+then numbered by colour, and the elements are sorted and renumbered per type.
+The key is the hash of the whole canonical netlist, so two netlists share an
+entry only if they are the same circuit; when refinement cannot tell two
+nodes apart their original order decides, which may only cost a cache miss.
+"""
+import errno
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+REFINEMENT_ROUNDS = 64
+
+
+def canonical_netlist(origin, dest, ele, val):
+    """
+    Compute the canonical form of a netlist.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    Returns:
+
+    - text: canonical netlist as a string, one element per line
+
+    - node_map: dictionary from the nodes of the netlist to canonical nodes
+
+    - element_map: dictionary from the identifiers of the netlist to
+      canonical identifiers
+    """
+    kinds = [str(x)[:1].upper() for x in ele]
+    labels = [(kinds[x], repr(float(val[x]))) for x in range(len(ele))]
+    nodes = sorted(set(origin) | set(dest))
+    adjacent = dict((n, []) for n in nodes)
+    for x in range(len(ele)):
+        adjacent[origin[x]].append((x, dest[x], 1))
+        adjacent[dest[x]].append((x, origin[x], -1))
+    color = dict((n, 0 if n == 0 else 1) for n in nodes)
+    num_colors = len(set(color.values()))
+    for _ in range(REFINEMENT_ROUNDS):
+        signature = dict((n, (color[n], tuple(sorted(
+            (labels[x], direction, color[other])
+            for x, other, direction in adjacent[n])))) for n in nodes)
+        ranks = dict((sig, ind) for ind, sig in
+                     enumerate(sorted(set(signature.values()))))
+        color = dict((n, ranks[signature[n]]) for n in nodes)
+        if len(ranks) == num_colors:
+            break
+        num_colors = len(ranks)
+    ordered = sorted(nodes, key=lambda n: (n != 0, color[n], n))
+    node_map = dict((n, ind) for ind, n in enumerate(ordered))
+    if 0 not in node_map:
+        node_map = dict((n, ind+1) for ind, n in enumerate(ordered))
+    rows = sorted((labels[x], node_map[origin[x]], node_map[dest[x]], x)
+                  for x in range(len(ele)))
+    counts, element_map, lines = {}, {}, []
+    for (kind, value), o_node, d_node, x in rows:
+        counts[kind] = counts.get(kind, 0) + 1
+        element_map[ele[x]] = kind + str(counts[kind])
+        lines.append("%s %s %d %d" % (kind, value, o_node, d_node))
+    header = "nodes %d max %d" % (len(nodes), max(nodes))
+    return "\n".join([header] + lines), node_map, element_map
+
+
+def netlist_key(text, *selection):
+    """Hash of a canonical netlist and an input/output selection."""
+    digest = hashlib.sha256(text.encode('utf-8'))
+    for item in selection:
+        digest.update(('\0' + str(item)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Memory_cache():
+    """
+    Bounded in-memory cache evicting the least recently used entry.
+
+    Parameters:
+
+    - maxsize: largest number of entries kept
+    """
+
+    def __init__(self, maxsize=128):
+        """Create an empty cache."""
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        """Return the entry for key or None, marking it as recently used."""
+        if key not in self.entries:
+            return None
+        value = self.entries.pop(key)
+        self.entries[key] = value
+        return value
+
+    def put(self, key, value):
+        """Store an entry, evicting the least recently used ones if full."""
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+def remove_file(path):
+    """Remove a file, unless another process has removed it already."""
+    try:
+        os.remove(path)
+    except OSError as err:
+        if err.errno != errno.ENOENT:
+            raise
+
+
+class Disk_cache():
+    """
+    Cache storing each entry as a pickle file in a directory.
+
+    Parameters:
+
+    - directory: directory of the cache, created if missing
+
+    - max_bytes: largest total size of the files of the cache
+
+    The modification time of a file is refreshed on every hit, and the files
+    with the oldest times are removed when the size limit is exceeded.
+    Several processes may share the directory: every entry is written to a
+    temporary file of its own and renamed into place, and files removed by
+    another process while evicting are skipped.
+    """
+
+    def __init__(self, directory, max_bytes=64*1024*1024):
+        """Create the cache directory if needed."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path(self, key):
+        """File name of the entry for key."""
+        return os.path.join(self.directory, key + '.pkl')
+
+    def get(self, key):
+        """Return the entry for key or None."""
+        try:
+            with open(self.path(key), 'rb') as entry_file:
+                value = pickle.load(entry_file)
+            os.utime(self.path(key), None)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value
+
+    def put(self, key, value):
+        """Store an entry and evict old entries beyond max_bytes."""
+        handle, tmp_path = tempfile.mkstemp(suffix='.tmp',
+                                            dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as entry_file:
+                pickle.dump(value, entry_file, 2)
+            os.rename(tmp_path, self.path(key))
+        except Exception:
+            remove_file(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used files until under max_bytes."""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError as err:
+                    if err.errno != errno.ENOENT:
+                        raise
+                    continue
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            remove_file(os.path.join(self.directory, name))
+            total -= size
+
+
+class Solution_cache():
+    """
+    Two tier cache of transfer functions.
+
+    Parameters:
+
+    - maxsize: number of entries kept in memory
+
+    - directory: directory of the disk tier, no disk tier if None
+
+    - max_bytes: largest size of the disk tier
+
+    The coefficients are stored under the canonical identifiers of the input
+    and output, so they are found again for the netlist with other labels.
+    """
+
+    def __init__(self, maxsize=128, directory=None, max_bytes=64*1024*1024):
+        """Create the memory tier, and the disk tier if given a directory."""
+        self.memory = Memory_cache(maxsize)
+        self.disk = Disk_cache(directory, max_bytes) if directory else None
+        self.hits, self.misses = 0, 0
+
+    def lookup(self, key, compute):
+        """
+        Return the entry for key, calling compute() to fill it on a miss.
+
+        A None returned by compute() is passed on but not stored.
+        """
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        if value is None:
+            return None
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+        return value
+
+    def coefficients(self, origin, dest, ele, val, input_ident, output_ident,
+                     output_type, compute, method=None):
+        """
+        Return the transfer function coefficients for a selection.
+
+        Parameters:
+
+        - origin, dest, ele, val: the netlist
+
+        - input_ident: identifier of the voltage source used as input
+
+        - output_ident: identifier of the element used as output
+
+        - output_type: I if current is demanded, else V
+
+        - compute: function without arguments returning (num, den), called
+          on a miss
+
+        - method: name of the method used by compute, results of different
+          methods are kept apart, or None
+
+        Returns:
+
+        - num_coeffs, den_coeffs: coefficient lists of the transfer function,
+          or None if compute() returned None
+        """
+        text, node_map, element_map = canonical_netlist(origin, dest, ele, val)
+        selection = ['tf', element_map[input_ident],
+                     element_map[output_ident], output_type]
+        if method is not None:
+            selection.append(method)
+        key = netlist_key(text, *selection)
+        stored = self.lookup(key, compute)
+        if stored is None:
+            return None
+        num, den = stored
+        return list(num), list(den)
@@ -0,0 +1,312 @@
+"""
+Transfer function coefficients by polynomial interpolation.
+
+For the descriptor system (G + s*C)x = B*u of mna.descriptor_system and an
+output y = (c0 + s*c1).x, the transfer function from source u_k is N(s)/D(s)
+with
+
+    D(s) = det(G + s*C)
+
+    N(s) = -det([[G + s*C, b_k], [(c0 + s*c1)^T, 0]])
+
+by Cramer's rule. Both are polynomials whose degree is at most the number of
+capacitors and inductors (plus one for N). Instead of expanding them
+symbolically they are evaluated numerically at M points s = rho*exp(2*pi*j*k/M)
+on a circle of radius rho, and their coefficients a_j are recovered with one
+FFT, since the FFT of those samples is M*a_j*rho^j. This costs M numeric
+determinants, with no expression swell.
+
+rho scales the frequency so that the scaled coefficients a_j*rho^j are of
+similar size; it is first estimated from the dynamics of the circuit and then
+refined from the coefficients of D. Coefficients that are negligible against
+the rounding noise are set to zero, which detects the actual degrees. The
+noise is measured on the coefficients beyond the degree bound, which are
+zero in exact arithmetic, since twice as many points as needed are used.
+Roots shared by N and D are cancelled, and the coefficients are normalized
+to a monic denominator.
+"""
+import numpy as np
+from scipy.sparse import bmat, csc_matrix
+from scipy.sparse.linalg import splu
+import ac_sweep
+import instrument
+import mna
+import ordering
+
+DENSE_LIMIT = 200
+TOLERANCE = 1e-14
+NOISE_FACTOR = 100.0
+ROOT_TOLERANCE = 1e-6
+SIGNIFICANT_DIGITS = 12
+
+
+def log_determinants(mats):
+    """
+    Compute the determinants of several matrices in logarithmic form.
+
+    Parameters:
+
+    - mats: list of complex sparse matrices of the same size
+
+    Returns:
+
+    - phase: array of the phases det/|det|, 0 for singular matrices
+
+    - logabs: array of log|det|, -inf for singular matrices
+
+    Method: Up to DENSE_LIMIT unknowns the matrices are stacked and handed to
+    one batched numpy.linalg.slogdet call. Larger ones are factorized with a
+    sparse LU and the determinant is read off the diagonal of U and the
+    parities of the row and column permutations.
+    """
+    if mats[0].shape[0] <= DENSE_LIMIT:
+        stack = np.array([m.toarray() for m in mats])
+        return np.linalg.slogdet(stack)
+    phase = np.zeros(len(mats), dtype=np.complex128)
+    logabs = np.full(len(mats), -np.inf)
+    for ind, mat in enumerate(mats):
+        try:
+            lu = splu(csc_matrix(mat))
+        except RuntimeError:
+            continue
+        diag = lu.U.diagonal()
+        if np.any(diag == 0):
+            continue
+        logabs[ind] = np.sum(np.log(np.abs(diag)))
+        phase[ind] = np.prod(diag/np.abs(diag)) * \
+            ordering.parity(lu.perm_r)*ordering.parity(lu.perm_c)
+    return phase, logabs
+
+
+def _interpolate(samples):
+    """
+    Coefficients in ascending powers of s/rho from samples on the circle.
+    """
+    return np.fft.fft(samples)/len(samples)
+
+
+def _trim(scaled, threshold):
+    """Zero the scaled coefficients not above threshold."""
+    scaled = np.array(scaled)
+    scaled[np.abs(scaled) <= threshold] = 0
+    nonzero = np.nonzero(scaled)[0]
+    return scaled[:nonzero[-1]+1] if len(nonzero) else scaled[:1]*0
+
+
+def _noise_threshold(den_scaled, num_scaled, bound):
+    """
+    Level below which scaled coefficients are indistinguishable from noise.
+
+    The coefficients above the degree bound are zero in exact arithmetic, so
+    their size measures the rounding noise of the interpolation. The
+    threshold is NOISE_FACTOR times that, and at least TOLERANCE times the
+    largest coefficient.
+    """
+    both = np.concatenate((np.abs(den_scaled), np.abs(num_scaled)))
+    noise = max(np.max(np.abs(den_scaled[bound+1:])),
+                np.max(np.abs(num_scaled[bound+1:])))
+    return max(NOISE_FACTOR*noise, TOLERANCE*np.max(both))
+
+
+def _cancel_roots(num_roots, den_roots):
+    """Remove the roots of num_roots that also are roots of den_roots."""
+    num_roots, den_roots = list(num_roots), list(den_roots)
+    kept = []
+    for root in num_roots:
+        dist = [abs(root - x) for x in den_roots]
+        if dist and min(dist) <= ROOT_TOLERANCE*max(1.0, abs(root)):
+            den_roots.pop(int(np.argmin(dist)))
+        else:
+            kept.append(root)
+    return kept, den_roots
+
+
+def _unscale(poly, rho):
+    """Turn a polynomial in descending powers of s/rho into powers of s."""
+    powers = np.arange(len(poly)-1, -1, -1)
+    return poly/rho**powers
+
+
+def _round(coeffs):
+    """Real parts rounded to SIGNIFICANT_DIGITS significant digits."""
+    fmt = '%.' + str(SIGNIFICANT_DIGITS) + 'g'
+    return [float(fmt % a) for a in np.real(coeffs)]
+
+
+def scale_estimate(g, c):
+    """
+    Estimate a frequency scale of the circuit for the interpolation radius.
+
+    Returns the geometric mean of the ends of the frequency grid that
+    ac_sweep.default_frequencies chooses for the circuit.
+    """
+    omega = ac_sweep.default_frequencies(g, c, num=2)
+    return float(np.sqrt(omega[0]*omega[-1]))
+
+
+def sample_polynomials(g, c, b_col, c0, c1, rho, points):
+    """
+    Evaluate D and N at points equally spaced on the circle of radius rho.
+
+    Both are divided by the same constant to keep them within the floating
+    point range, which does not change their ratio.
+    """
+    size = g.shape[0]
+    s_values = sample_points(rho, points)
+    b_col = csc_matrix(b_col.reshape(size, 1))
+    den_mats, num_mats = [], []
+    for s in s_values:
+        system = csc_matrix(g + s*c, dtype=np.complex128)
+        out = csc_matrix((c0 + s*c1).reshape(1, size))
+        den_mats.append(system)
+        num_mats.append(bmat([[system, b_col], [out, None]], format='csc',
+                             dtype=np.complex128))
+    den_phase, den_log = log_determinants(den_mats)
+    num_phase, num_log = log_determinants(num_mats)
+    if not np.all(np.isfinite(den_log)):
+        raise ValueError("Circuit equations are singular")
+    ref = np.max(den_log)
+    den = den_phase*np.exp(den_log - ref)
+    num = -num_phase*np.exp(num_log - ref)
+    return num, den
+
+
+def degree_bound(ele):
+    """Bound on the degrees of N and D: one more than the number of L and C."""
+    kinds = mna.element_kinds(ele)
+    return int(np.sum((kinds == 'L') | (kinds == 'C'))) + 1
+
+
+def sample_count(bound):
+    """Number of points on the circle, a power of two above 2*(bound + 1)."""
+    return 1 << int(np.ceil(np.log2(2*(bound + 1))))
+
+
+def sample_points(rho, points):
+    """The points s equally spaced on the circle of radius rho."""
+    return rho*np.exp(2j*np.pi*np.arange(points)/points)
+
+
+def scaled_coefficients(num, den, bound):
+    """
+    Interpolate N and D from their samples and drop the noise.
+
+    Returns:
+
+    - num_scaled, den_scaled: coefficients in ascending powers of s/rho,
+      trimmed to the actual degrees
+
+    Raises ValueError if D vanishes.
+    """
+    den_scaled, num_scaled = _interpolate(den), _interpolate(num)
+    threshold = _noise_threshold(den_scaled, num_scaled, bound)
+    den_scaled = _trim(den_scaled, threshold)
+    if not np.any(den_scaled):
+        raise ValueError("Circuit equations are singular")
+    return _trim(num_scaled, threshold), den_scaled
+
+
+def radius_correction(den_scaled):
+    """
+    Factor by which to change rho to balance the coefficients of D.
+
+    Returns 1.0 if the lowest and highest coefficients differ by less than a
+    factor of 2 per power of s/rho.
+    """
+    nonzero = np.nonzero(den_scaled)[0]
+    low, high = nonzero[0], nonzero[-1]
+    if high == low:
+        return 1.0
+    ratio = abs(den_scaled[low]/den_scaled[high])**(1.0/(high - low))
+    return 1.0 if 0.5 <= ratio <= 2.0 else ratio
+
+
+def unscaled_coefficients(num_scaled, den_scaled, rho):
+    """
+    Turn scaled coefficients into the coefficients of the transfer function.
+
+    Roots shared by N and D are cancelled and D is made monic. Returns
+    num_coeffs and den_coeffs in descending powers of s.
+    """
+    if not np.any(num_scaled):
+        return [0.0], [1.0]
+    num_roots, den_roots = _cancel_roots(np.roots(num_scaled[::-1]),
+                                         np.roots(den_scaled[::-1]))
+    lead = num_scaled[-1]/den_scaled[-1]
+    num_poly = _unscale(lead*np.atleast_1d(np.poly(num_roots)), rho)
+    den_poly = _unscale(np.atleast_1d(np.poly(den_roots)), rho)
+    return _round(num_poly/den_poly[0]), _round(den_poly/den_poly[0])
+
+
+@instrument.timed(select=lambda result: None)
+def transfer_coefficients(origin, dest, ele, val, input_source, ident,
+                          output_var, rho=None):
+    """
+    Compute the transfer function coefficients between an input and output.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - input_source: identifier of the voltage source used as input, eg. V1
+
+    - ident: identifier of the element whose output parameter is asked
+
+    - output_var: I if current is demanded, else V
+
+    - rho: radius of the interpolation circle, estimated if None
+
+    Returns:
+
+    - num_coeffs: coefficients of the numerator in descending powers of s
+
+    - den_coeffs: coefficients of the denominator in descending powers of s,
+      with a leading coefficient of 1
+
+    Raises ValueError if the circuit equations are singular.
+
+    The transfer function is that of ac_sweep.frequency_response, the ratio of
+    the output to the input with all other voltage sources set to zero.
+    """
+    g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+    c0, c1 = mna.output_vectors(origin, dest, ele, val, unknowns, ident,
+                                output_var)
+    return descriptor_coefficients(g, c, b[:, int(input_source[1:])-1], c0,
+                                   c1, degree_bound(ele), rho)
+
+
+def descriptor_coefficients(g, c, b_col, c0, c1, bound, rho=None):
+    """
+    Compute the transfer function coefficients of a descriptor system.
+
+    Parameters:
+
+    - g, c: sparse matrices G and C of (G + s*C)x = b_col*u
+
+    - b_col: dense input vector
+
+    - c0, c1: dense output vectors, the output being (c0 + s*c1).x
+
+    - bound: bound on the degrees of N and D, as from degree_bound
+
+    - rho: radius of the interpolation circle, estimated if None
+
+    Returns num_coeffs and den_coeffs as transfer_coefficients does. Raises
+    ValueError if G + s*C is singular.
+    """
+    points = sample_count(bound)
+    rho = scale_estimate(g, c) if rho is None else rho
+    for attempt in range(2):
+        num, den = sample_polynomials(g, c, b_col, c0, c1, rho, points)
+        num_scaled, den_scaled = scaled_coefficients(num, den, bound)
+        ratio = radius_correction(den_scaled)
+        if attempt or ratio == 1.0:
+            break
+        rho *= ratio
+    return unscaled_coefficients(num_scaled, den_scaled, rho)
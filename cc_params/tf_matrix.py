@@ -0,0 +1,174 @@
+"""
+Matrix of transfer functions from every voltage source to many outputs.
+
+The transfer function from source V_k to an output y is y/V_k with all other
+sources set to zero. With the descriptor system (G + s*C)x = B*u of
+mna.descriptor_system and the output written as y = (c0 + s*c1).x, the whole
+matrix is
+
+    H(s) = Cout(s) (G + s*C)^-1 B
+
+where row i of Cout(s) is c0_i + s*c1_i of output i. (G + s*C) is factorized
+once and, whichever is cheaper, either solved for every column of B (one
+right hand side per source) or, as the adjoint system, (G + s*C)^T is solved
+for every row of Cout (one right hand side per output). Both give the same
+matrix.
+
+transfer_matrix does this exactly with fraction_free and returns coefficient
+lists as prog_tf.polynomial_coefficients does, response_matrix does it
+numerically at a vector of frequencies as ac_sweep does.
+"""
+import numpy as np
+from sympy import symbols, Matrix, nsimplify
+import ac_sweep
+import fraction_free
+import mna
+import ordering
+
+
+def all_outputs(ele):
+    """
+    List every output of a netlist.
+
+    Returns:
+
+    - list of (identifier, output type) with the voltage across and the
+      current through every element
+    """
+    return [(x, kind) for x in ele for kind in ('V', 'I')]
+
+
+def voltage_sources(ele):
+    """Identifiers of the voltage sources sorted by number, as in B."""
+    return sorted([x for x in ele if str(x).startswith('V')],
+                  key=lambda x: int(x[1:]))
+
+
+def output_matrices(origin, dest, ele, val, unknowns, outputs):
+    """
+    Stack the output vectors of several outputs.
+
+    Returns:
+
+    - c0, c1: arrays with one row per output such that the outputs are
+      (c0 + s*c1).x
+    """
+    rows = [mna.output_vectors(origin, dest, ele, val, unknowns, ident, kind)
+            for ident, kind in outputs]
+    size = len(unknowns)
+    c0 = np.array([r[0] for r in rows]).reshape(len(rows), size)
+    c1 = np.array([r[1] for r in rows]).reshape(len(rows), size)
+    return c0, c1
+
+
+def use_adjoint(num_sources, num_outputs):
+    """True if solving the adjoint system needs fewer right hand sides."""
+    return num_outputs < num_sources
+
+
+def _exact(mat):
+    """Convert a dense array to a sympy Matrix of exact rationals."""
+    return Matrix(mat.tolist()).applyfunc(
+        lambda e: nsimplify(e, rational=True))
+
+
+def _numerators(numerators):
+    """sympy Matrix of the numerators of fraction_free.solve."""
+    return Matrix([[y.as_expr() for y in row] for row in numerators])
+
+
+def transfer_matrix(origin, dest, ele, val, sources=None, outputs=None):
+    """
+    Compute the transfer functions from several sources to several outputs.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    - ele: list of all element identifiers of the netlist
+
+    - val: list of values of all the elements in the netlist
+
+    - sources: identifiers of the input voltage sources, all if None
+
+    - outputs: list of (identifier, output type), all_outputs if None
+
+    Returns:
+
+    - dictionary from (source, (identifier, output type)) to the tuple
+      (num_coeffs, den_coeffs) in descending powers of s
+
+    Raises ValueError if the circuit equations are singular.
+
+    Method: G + s*C is converted to exact rationals and fraction_free.solve
+    is called a single time with all the right hand sides, B for the chosen
+    sources or Cout^T for the adjoint system, so it is eliminated only once.
+    Every transfer function is then a polynomial over the determinant of
+    G + s*C, brought to lowest terms with a single gcd.
+    """
+    s = symbols('s')
+    sources = voltage_sources(ele) if sources is None else list(sources)
+    outputs = all_outputs(ele) if outputs is None else list(outputs)
+    g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+    columns = [int(x[1:])-1 for x in sources]
+    c0, c1 = output_matrices(origin, dest, ele, val, unknowns, outputs)
+    system = _exact(g.toarray()) + s*_exact(c.toarray())
+    b_exact = _exact(b[:, columns])
+    out_exact = _exact(c0) + s*_exact(c1)
+    if use_adjoint(len(sources), len(outputs)):
+        numerators, det = fraction_free.solve(system.T, out_exact.T, s)
+        h = _numerators(numerators).T*b_exact
+    else:
+        numerators, det = fraction_free.solve(system, b_exact, s)
+        h = out_exact*_numerators(numerators)
+    tfs = {}
+    for row, output in enumerate(outputs):
+        for col, source in enumerate(sources):
+            tfs[(source, tuple(output))] = fraction_free.coefficients(
+                fraction_free.polynomial(h[row, col], s), det)
+    return tfs
+
+
+def response_matrix(origin, dest, ele, val, sources=None, outputs=None,
+                    omega=None):
+    """
+    Evaluate the matrix of transfer functions at a vector of frequencies.
+
+    Parameters are those of transfer_matrix, plus
+
+    - omega: array of angular frequencies in rad/s, chosen by
+      ac_sweep.default_frequencies if None
+
+    Returns:
+
+    - response: complex array of shape (len(omega), outputs, sources)
+
+    - omega: array of angular frequencies in rad/s
+
+    Method: At every frequency G + j*omega*C is factorized once with a sparse
+    LU, in the order of the unknowns found by ordering.Ordered_pencil, and
+    solved for all the columns of B, or for all the rows of Cout with
+    the transposed factorization when there are fewer outputs than sources.
+    """
+    sources = voltage_sources(ele) if sources is None else list(sources)
+    outputs = all_outputs(ele) if outputs is None else list(outputs)
+    g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+    if omega is None:
+        omega = ac_sweep.default_frequencies(g, c)
+    omega = np.asarray(omega, dtype=np.float64)
+    b = b[:, [int(x[1:])-1 for x in sources]].astype(np.complex128)
+    c0, c1 = output_matrices(origin, dest, ele, val, unknowns, outputs)
+    adjoint = use_adjoint(len(sources), len(outputs))
+    response = np.empty((len(omega), len(outputs), len(sources)),
+                        dtype=np.complex128)
+    pencil = ordering.Ordered_pencil(g, c)
+    for ind, w in enumerate(omega):
+        lu = pencil.factor(1j*w)
+        out = c0 + 1j*w*c1
+        if adjoint:
+            response[ind] = lu.solve(out.T.copy(), trans='T').T.dot(b)
+        else:
+            response[ind] = out.dot(lu.solve(b))
+    return response, omega
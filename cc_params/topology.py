@@ -0,0 +1,187 @@
+"""
+Structural checks of a netlist done before any nodal analysis.
+
+All checks work on the graph of the netlist, whose vertices are the nodes
+and whose edges are the elements, and run in near-linear time:
+
+- every node from 0 up to the largest node number must be connected to the
+  reference node 0, a node number that is skipped is a floating node
+
+- voltage sources must not form a loop, their branch equations would be
+  linearly dependent
+
+- the matrix G of the descriptor system is singular when nodes are cut off
+  from the reference node by capacitors only, or when inductors and voltage
+  sources form a loop
+
+- the pattern of the descriptor system of mna.Descriptor_pattern must have
+  full structural rank, which is checked by a maximum bipartite matching of
+  its rows and columns
+
+Connectivity is found from the connected components of the node graph,
+computed by scipy.sparse.csgraph over the arrays of a netlist.Netlist. Loops
+of voltage sources use a union-find structure with path halving and union by
+size.
+"""
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.csgraph import structural_rank as matching_rank
+import mna
+from netlist import Netlist, INDUCTOR, CAPACITOR, SOURCE
+
+
+class Union_find():
+    """
+    Disjoint sets of the integers 0 .. size-1.
+
+    Parameters:
+
+    - size: number of elements
+    """
+
+    def __init__(self, size):
+        """Put every element in a set of its own."""
+        self.parent = list(range(size))
+        self.size = [1]*size
+
+    def find(self, x):
+        """Return the representative of the set containing x."""
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        """
+        Merge the sets containing x and y.
+
+        Returns False if they already were the same set.
+        """
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return False
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+        return True
+
+
+def _labels(origin, dest, keep=None):
+    """
+    Label the connected components of the nodes joined by the elements.
+
+    Parameters:
+
+    - origin, dest: node arrays of the netlist
+
+    - keep: boolean array of the elements taken into account, all if None
+
+    Returns:
+
+    - array with the component label of every node 0 .. max node
+    """
+    origin = np.asarray(origin, dtype=np.int64)
+    dest = np.asarray(dest, dtype=np.int64)
+    size = int(max(origin.max(), dest.max())) + 1
+    if keep is not None:
+        origin, dest = origin[keep], dest[keep]
+    graph = coo_matrix((np.ones(len(origin)), (origin, dest)),
+                       shape=(size, size))
+    return connected_components(graph, directed=False)[1]
+
+
+def unconnected_nodes(origin, dest):
+    """
+    Find the nodes without a path to the reference node.
+
+    Parameters:
+
+    - origin: list of all origin nodes of the netlist
+
+    - dest: list of all destination nodes of the netlist
+
+    Returns:
+
+    - sorted list of the nodes, including node numbers that are skipped
+    """
+    labels = _labels(origin, dest)
+    return [int(n) for n in np.nonzero(labels != labels[0])[0]]
+
+
+def voltage_loops(origin, dest, ele):
+    """
+    Find the voltage sources that close a loop of voltage sources.
+
+    Parameters:
+
+    - origin, dest, ele: nodes and identifiers of the netlist
+
+    Returns:
+
+    - list of the identifiers of the sources that close a loop, one per
+      independent loop; two sources in parallel form a loop
+    """
+    net = Netlist(origin, dest, ele)
+    positions, source_origin, source_dest, values = net.of_type('V')
+    sets = Union_find(net.num_nodes + 1)
+    return [net.ident[x] for x, a, b in zip(positions, source_origin,
+                                            source_dest)
+            if not sets.union(a, b)]
+
+
+def dc_singular(origin, dest, ele):
+    """
+    Tell whether the matrix G of the descriptor system is singular.
+
+    Parameters:
+
+    - origin, dest, ele: nodes and identifiers of the netlist
+
+    Returns:
+
+    - True if some node is joined to the reference only through capacitors,
+      its voltage then being undefined at DC, or if inductors and voltage
+      sources form a loop, their currents then being undefined at DC
+
+    The check is structural, so G can be tested before it is factorized.
+    """
+    net = Netlist(origin, dest, ele)
+    labels = _labels(net.origin, net.dest, net.kind != CAPACITOR)
+    if np.any(labels != labels[0]):
+        return True
+    sets = Union_find(net.num_nodes + 1)
+    shorts = (net.kind == INDUCTOR) | (net.kind == SOURCE)
+    return not all(sets.union(a, b) for a, b in zip(net.origin[shorts],
+                                                    net.dest[shorts]))
+
+
+def structural_rank(origin, dest, ele):
+    """
+    Compute the structural rank of the descriptor system of the netlist.
+
+    Parameters:
+
+    - origin, dest, ele: nodes and identifiers of the netlist
+
+    Returns:
+
+    - rank: size of a maximum matching of the rows and columns of the
+      pattern of G + s*C
+
+    - size: number of unknowns
+
+    Method: The pattern is stamped by mna.Descriptor_pattern with all values
+    set to one. Stamps of different elements never cancel, as all diagonal
+    stamps of R and C are positive, their off-diagonal stamps are negative
+    and every branch current has rows and columns of its own.
+    """
+    pattern = mna.Descriptor_pattern(origin, dest, ele)
+    g, c = pattern.stamp(np.ones(len(ele)))
+    structure = abs(g) + abs(c)
+    structure.eliminate_zeros()
+    structure = csr_matrix((np.ones(structure.nnz), structure.indices,
+                            structure.indptr), shape=structure.shape)
+    return int(matching_rank(structure)), pattern.size
@@ -0,0 +1,257 @@
+"""
+Transient simulation of a netlist in the time domain.
+
+The descriptor system of mna.Descriptor_pattern, G*x + C*dx/dt = B*u(t), is
+integrated directly, so any input waveform can be used and no transfer
+function has to be derived first. Capacitors and inductors are replaced by
+their companion models of the chosen integration method:
+
+- backward Euler: (G + C/h) x[n+1] = B u[n+1] + (C/h) x[n]
+
+- trapezoidal: (G + 2C/h) x[n+1] = B (u[n+1] + u[n]) + (2C/h - G) x[n]
+
+The matrix on the left only changes with the step size h, so its sparse LU
+factorization is kept and reused for as long as h stays the same. With
+adaptive stepping the local truncation error is estimated from divided
+differences of the solution, as in SPICE. h is halved on rejected steps and
+doubled only after GROWTH_STEPS steps in a row with a small error, so that
+refactorizations stay rare.
+"""
+from collections import OrderedDict
+import numpy as np
+import mna
+import ordering
+import pole_zero
+
+DENSE_LIMIT = 200
+GROWTH_STEPS = 4
+
+
+def default_end_time(g, c):
+    """
+    Choose a simulation time long enough for the response to settle.
+
+    Seven times the slowest time constant of the circuit, from the poles of
+    the pencil (-G, C) found by pole_zero for small systems or from the
+    diagonal ratios C/G for large ones.
+    """
+    if g.shape[0] <= DENSE_LIMIT:
+        poles = pole_zero.pencil_eigenvalues(g, c)
+        poles = poles[np.abs(poles) > 0]
+        decay = np.abs(poles.real[poles.real < 0])
+        if len(decay):
+            return 7.0/min(decay)
+        if len(poles):
+            return 10.0/min(np.abs(poles))
+        return 1.0
+    g_diag, c_diag = np.abs(g.diagonal()), np.abs(c.diagonal())
+    mask = (g_diag > 0) & (c_diag > 0)
+    return 7.0*max(c_diag[mask]/g_diag[mask]) if mask.any() else 1.0
+
+
+class Factor_cache():
+    """
+    Keep the LU factorizations of (G + alpha*C) for recent values of alpha.
+
+    Parameters:
+
+    - g: CSR matrix G of the descriptor system
+
+    - c: CSR matrix C of the descriptor system
+
+    - maxsize: number of factorizations kept
+
+    - order: ordering of the unknowns, one of ordering.METHODS
+
+    alpha is 1/h for backward Euler and 2/h for the trapezoidal rule. The step
+    control only halves or doubles h, so the same few values of alpha come
+    back and a factorization is computed only for a value not seen recently.
+    The number of factorizations done is counted in factorizations. The
+    fill-reducing ordering of the unknowns does not depend on alpha and is
+    computed once.
+    """
+
+    def __init__(self, g, c, maxsize=4, order='amd'):
+        """Order the unknowns, no factorization is done yet."""
+        self.pencil = ordering.Ordered_pencil(g, c, order)
+        self.maxsize = maxsize
+        self.factors = OrderedDict()
+        self.factorizations = 0
+
+    def solve(self, alpha, rhs):
+        """Solve (G + alpha*C)x = rhs, factorizing only for a new alpha."""
+        lu = self.factors.pop(alpha, None)
+        if lu is None:
+            lu = self.pencil.factor(alpha)
+            self.factorizations += 1
+        self.factors[alpha] = lu
+        while len(self.factors) > self.maxsize:
+            self.factors.popitem(last=False)
+        return lu.solve(rhs)
+
+
+def _source_vector(b, waveforms, t):
+    """Value of B*u(t) for the list of source waveforms."""
+    return b.dot(np.array([w(t) for w in waveforms]))
+
+
+def _lte(times, states, order):
+    """
+    Estimate the local truncation error of the last step.
+
+    Uses the divided difference of order+1 of the last order+2 points:
+    h^2*|x''|/2 for backward Euler and h^3*|x'''|/12 for the trapezoidal rule.
+    """
+    diff = [np.asarray(x) for x in states[-(order+2):]]
+    pts = times[-(order+2):]
+    for level in range(1, order+2):
+        diff = [(diff[k+1]-diff[k])/(pts[k+level]-pts[k])
+                for k in range(len(diff)-1)]
+    h = times[-1] - times[-2]
+    if order == 1:
+        return h**2*np.abs(diff[0])
+    return h**3*np.abs(diff[0])/2.0
+
+
+def simulate(origin, dest, ele, val, t_end=None, h=None, method='trap',
+             sources=None, adaptive=True, reltol=1e-3, abstol=1e-6,
+             max_steps=100000):
+    """
+    Simulate the netlist from a zero initial state.
+
+    Parameters:
+
+    - origin, dest, ele, val: the netlist
+
+    - t_end: end time in s, chosen by default_end_time if None
+
+    - h: initial (or fixed) step in s, t_end/1000 if None
+
+    - method: 'trap' for the trapezoidal rule or 'be' for backward Euler;
+      the first step is always a backward Euler step because the sources
+      switch on at t = 0
+
+    - sources: dictionary from voltage source identifiers to functions of
+      time; sources missing from it are steps to their value in val
+
+    - adaptive: control the step by the local truncation error, otherwise
+      use the fixed step h with a single factorization
+
+    - reltol, abstol: relative and absolute tolerance of the error control
+
+    - max_steps: largest number of steps attempted
+
+    Returns:
+
+    - dictionary with time (array of time points), x (one row of unknowns per
+      time point), unknowns (names of the unknowns), voltage and current
+      (dictionaries from every element identifier to its voltage and current
+      over time) and factorizations (number of LU factorizations done)
+    """
+    pattern = mna.Descriptor_pattern(origin, dest, ele)
+    g, c = pattern.stamp(val)
+    if t_end is None:
+        t_end = default_end_time(g, c)
+    h = t_end/1000.0 if h is None else h
+    sources = sources or {}
+    waveforms = []
+    for name in [x[2:] for x in pattern.unknowns if x.startswith('I_V')]:
+        value = val[list(ele).index(name)]
+        waveforms.append(sources.get(name, lambda t, v=value:
+                                     v if t > 0 else 0.0))
+    factors = Factor_cache(g, c)
+    order = 1 if method == 'be' else 2
+    times = [0.0]
+    states = [np.zeros(pattern.size)]
+    steps_used = []
+    u_prev = _source_vector(pattern.b, waveforms, 0.0)
+    attempts, small = 0, 0
+    while times[-1] < t_end*(1 - 1e-12) and attempts < max_steps:
+        attempts += 1
+        step = min(h, t_end - times[-1])
+        t_new = times[-1] + step
+        u_new = _source_vector(pattern.b, waveforms, t_new)
+        use_be = method == 'be' or len(times) == 1
+        if use_be:
+            x_new = factors.solve(1.0/step, u_new + c.dot(states[-1])/step)
+        else:
+            alpha = 2.0/step
+            x_new = factors.solve(alpha, u_new + u_prev +
+                                  alpha*c.dot(states[-1]) -
+                                  g.dot(states[-1]))
+        if adaptive and len(times) > order:
+            err = _lte(times + [t_new], states + [x_new], order)
+            scale = reltol*np.maximum(np.abs(x_new), np.abs(states[-1])) + \
+                abstol
+            ratio = np.max(err/scale)
+            if ratio > 1.0 and step > t_end*1e-9:
+                h, small = step/2.0, 0
+                continue
+            small = small + 1 if ratio < 0.1 and step == h else 0
+            if small == GROWTH_STEPS:
+                h, small = 2.0*h, 0
+        times.append(t_new)
+        states.append(x_new)
+        steps_used.append((step, use_be))
+        u_prev = u_new
+    x = np.array(states)
+    time = np.array(times)
+    voltage, current = element_waveforms(origin, dest, ele, val,
+                                         pattern.unknowns, x, steps_used)
+    return {'time': time, 'x': x, 'unknowns': list(pattern.unknowns),
+            'voltage': voltage, 'current': current,
+            'factorizations': factors.factorizations}
+
+
+def element_waveforms(origin, dest, ele, val, unknowns, x, steps_used):
+    """
+    Voltage across and current through every element over time.
+
+    The capacitor currents C*dv/dt are recovered with the same integration
+    formula that was used for each step, so they are consistent with the
+    node voltages.
+    """
+    position = dict((name, ind) for ind, name in enumerate(unknowns))
+    voltage, current = {}, {}
+    for ind, ident in enumerate(ele):
+        across = np.zeros(len(x))
+        if origin[ind] != 0:
+            across = across + x[:, position['V_'+str(origin[ind])]]
+        if dest[ind] != 0:
+            across = across - x[:, position['V_'+str(dest[ind])]]
+        voltage[ident] = across
+        kind = str(ident)[:1].upper()
+        if kind == 'R':
+            current[ident] = across/val[ind]
+        elif kind == 'C':
+            i_c = np.zeros(len(x))
+            for k, (step, use_be) in enumerate(steps_used):
+                dv = across[k+1] - across[k]
+                if use_be:
+                    i_c[k+1] = val[ind]*dv/step
+                else:
+                    i_c[k+1] = 2.0*val[ind]*dv/step - i_c[k]
+            current[ident] = i_c
+        else:
+            current[ident] = x[:, position['I_'+ident]]
+    return voltage, current
+
+
+def step_response(origin, dest, ele, val, input_source, ident, output_var,
+                  t_end=None):
+    """
+    Response of an output to a unit step of one voltage source.
+
+    All other voltage sources are held at zero.
+
+    Returns:
+
+    - T: time points
+
+    - yout: voltage across (V) or current through (I) the element ident
+    """
+    sources = dict((x, lambda t: 0.0) for x in ele if str(x).startswith('V'))
+    sources[input_source] = lambda t: 1.0 if t > 0 else 0.0
+    result = simulate(origin, dest, ele, val, t_end=t_end, sources=sources)
+    waveforms = result['voltage'] if output_var == 'V' else result['current']
+    return result['time'], waveforms[ident]
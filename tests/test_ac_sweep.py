@@ -0,0 +1,77 @@
+"""numpy is used to compare the computed responses against known values.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import ac_sweep
+import mna
+
+O, D = [1, 2, 3, 1], [2, 3, 0, 0]
+E, V = ["R1", "L1", "C1", "V1"], [10.0, 0.01, 1e-6, 10.0]
+
+
+def rlc(omega):
+    """Denominator LC(jw)^2 + RC(jw) + 1 of the series RLC circuit."""
+    s = 1j*omega
+    return 1e-8*s**2 + 1e-5*s + 1.0
+
+
+def test_frequency_response():
+    """
+    Test the response of a series RLC circuit against the hand computation.
+
+    The voltage across the capacitor is 1/(LCs^2 + RCs + 1) and the current
+    through the inductor is Cs/(LCs^2 + RCs + 1) times the source voltage.
+    Both the batched dense and the sparse solver are checked.
+    """
+    omega = np.logspace(1, 6, 50)
+    for limit in (ac_sweep.DENSE_LIMIT, 0):
+        g, c, b, unknowns = mna.descriptor_system(O, D, E, V)
+        x = ac_sweep.solve_sweep(g, c, b[:, 0], omega, dense_limit=limit)
+        assert np.allclose(x[:, unknowns.index("V_3")], 1/rlc(omega))
+    resp, w = ac_sweep.frequency_response(O, D, E, V, "V1", "C1", "V", omega)
+    assert np.allclose(resp, 1/rlc(omega))
+    resp, w = ac_sweep.frequency_response(O, D, E, V, "V1", "L1", "I", omega)
+    assert np.allclose(resp, 1e-6j*omega/rlc(omega))
+    resp, w = ac_sweep.frequency_response(O, D, E, V, "V1", "C1", "I", omega)
+    assert np.allclose(resp, 1e-6j*omega/rlc(omega))
+
+
+def test_bode():
+    """Magnitude in dB and phase in degrees at the resonance of 10^4 rad/s."""
+    mag, phase, omega = ac_sweep.bode(O, D, E, V, "V1", "C1", "V")
+    assert omega[0] <= 1e2 and omega[-1] >= 1e6
+    mag, phase, omega = ac_sweep.bode(O, D, E, V, "V1", "C1", "V",
+                                      np.array([1.0, 1e4]))
+    assert np.allclose(mag, [0.0, 20.0], atol=1e-6)
+    assert np.allclose(phase, [0.0, -90.0], atol=1e-3)
+
+
+def test_default_frequencies():
+    """
+    The grid of a 300 section RC ladder, too large for the eigenvalues,
+    covers its slowest pole near pi^2/(4*300^2*RC) = 0.027 rad/s and not
+    only the rate 1/RC = 1000 rad/s of its nodes.
+    """
+    sections = 300
+    origin, dest, ele, val = [1], [0], ["V1"], [1.0]
+    for i in range(1, sections + 1):
+        origin += [i, i + 1]
+        dest += [i + 1, 0]
+        ele += ["R" + str(i), "C" + str(i)]
+        val += [1e3, 1e-6]
+    g, c, b, unknowns = mna.descriptor_system(origin, dest, ele, val)
+    assert g.shape[0] > ac_sweep.DENSE_LIMIT
+    assert abs(ac_sweep.slowest_rate(g, c)/0.0273 - 1) < 1e-2
+    omega = ac_sweep.default_frequencies(g, c)
+    assert omega[0] <= 0.0273/10 and omega[-1] >= 1e4
+# Atrribute will_run is added to all the test functions
+test_frequency_response.will_run = True
+test_bode.will_run = True
+test_default_frequencies.will_run = True
@@ -0,0 +1,160 @@
+"""json and tempfile are used to feed netlist files to the batch interface.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import batch
+import tf_interp
+
+RLC = {"name": "rlc", "origin": [1, 2, 3, 1], "dest": [2, 3, 0, 0],
+       "ele": ["R1", "L1", "C1", "V1"], "val": [10.0, 0.01, 1e-6, 10.0],
+       "input": "V1", "output": "V:C1"}
+
+
+def test_solve_transfer_function():
+    """
+    Test the transfer function of a series RLC circuit without the GUI.
+
+    The voltage across the capacitor over the source voltage is
+    1/(LCs^2 + RCs + 1), compared after making the denominator monic.
+    """
+    netlist = (RLC["origin"], RLC["dest"], RLC["ele"], RLC["val"])
+    num, den = batch.solve_transfer_function(netlist, "V1", "V:C1")
+    scale = den[0]
+    assert len(num) == 1 and len(den) == 3
+    assert abs(num[0]/scale - 1e8) < 1e-3
+    assert abs(den[1]/scale - 1e3) < 1e-6
+    assert abs(den[2]/scale - 1e8) < 1e-3
+
+
+def test_superposition():
+    """
+    The transfer function from one of two sources is taken with the other
+    set to zero, as by tf_interp: V1 sees C1 through R1 and L1 with R2 to
+    the zeroed V2 as load, without the zero that V2 would add.
+    """
+    netlist = ([1, 2, 3, 1, 4, 4], [2, 3, 0, 0, 3, 0],
+               ["R1", "L1", "C1", "V1", "R2", "V2"],
+               [10.0, 0.01, 1e-6, 10.0, 100.0, 5.0])
+    for source in ("V1", "V2"):
+        num, den = batch.solve_transfer_function(netlist, source, "V:C1")
+        interp = tf_interp.transfer_coefficients(*(netlist + (source, "C1",
+                                                              "V")))
+        assert len(num) == len(interp[0]) and len(den) == len(interp[1])
+        assert np.allclose(np.array(num)/den[0], interp[0])
+        assert np.allclose(np.array(den)/den[0], interp[1])
+    num, den = batch.solve_transfer_function(netlist, "V1", "V:C1")
+    assert (num, den) == ([1e8], [1.0, 11000.0, 1.1e8])
+
+
+def test_solve_record_errors():
+    """Errors in a record are reported instead of raised."""
+    record = dict(RLC, origin=[1, -2, 3, 1], dest=[-2, 3, 0, 0])
+    assert batch.solve_record(record)["error"] == "Negative value of node."
+    record = dict(RLC, output="X:C1")
+    assert "Output" in batch.solve_record(record)["error"]
+    record = dict(RLC, origin=[1, 1, 1], dest=[0, 0, 2],
+                  ele=["V1", "V2", "R1"], val=[5.0, 3.0, 1.0], output="I:R1")
+    assert batch.solve_record(record)["error"] == "Loop of voltage sources"
+    assert batch.solve_record([1, 2])["error"] == \
+        "Record must be a JSON object"
+
+
+def test_solve_record_malformed():
+    """
+    Lists of different lengths, instances read from JSON and sources not
+    numbered from V1 are errors of their record, even when an equivalent
+    netlist is in the cache.
+    """
+    assert "same length" in batch.solve_record(
+        dict(RLC, val=[10.0, 0.01, 1e-6]))["error"]
+    assert "subckt.Instance" in batch.solve_record(
+        dict(RLC, instances=[{"name": "X1"}]))["error"]
+    assert "error" not in batch.solve_record(RLC)
+    record = dict(RLC, ele=["R1", "L1", "C1", "V2"], input="V2")
+    assert "V1, V2" in batch.solve_record(record)["error"]
+
+
+def test_main():
+    """The command line interface writes one JSON line per netlist."""
+    handle, in_path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(handle, "w") as netlist_file:
+        json.dump([RLC, dict(RLC, name="current", output="I:R1")],
+                  netlist_file)
+    out_path = in_path + ".out"
+    try:
+        assert batch.main([in_path, "-o", out_path]) == 0
+        with open(out_path) as out_file:
+            results = [json.loads(line) for line in out_file]
+    finally:
+        os.remove(in_path)
+        os.remove(out_path)
+    assert [r["name"] for r in results] == ["rlc", "current"]
+    assert len(results[1]["num"]) == 2
+
+
+def test_main_not_object():
+    """Records that are not JSON objects are reported one by one."""
+    handle, in_path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(handle, "w") as netlist_file:
+        json.dump([1, RLC, "rlc"], netlist_file)
+    out_path = in_path + ".out"
+    try:
+        assert batch.main([in_path, "-o", out_path, "--order", "2"]) == 1
+        with open(out_path) as out_file:
+            results = [json.loads(line) for line in out_file]
+    finally:
+        os.remove(in_path)
+        os.remove(out_path)
+    assert [r.get("error") for r in results] == \
+        ["Record must be a JSON object", None, "Record must be a JSON object"]
+    assert len(results[1]["den"]) == 3
+
+
+def test_main_spice():
+    """SPICE netlists take the input and output from the command line."""
+    handle, in_path = tempfile.mkstemp(suffix=".cir")
+    with os.fdopen(handle, "w") as netlist_file:
+        netlist_file.write("Vin in 0 10\nR1 in a 10\nL1 a b 10m\n"
+                           "Cload b 0 1u\n.end\n")
+    out_path = in_path + ".out"
+    try:
+        assert batch.main([in_path, "-o", out_path, "--input-source", "vin",
+                           "--output-spec", "V:Cload"]) == 0
+        with open(out_path) as out_file:
+            result = json.loads(out_file.readline())
+    finally:
+        os.remove(in_path)
+        os.remove(out_path)
+    assert result["num"] == [100000000.0]
+    assert result["den"] == [1.0, 1000.0, 100000000.0]
+
+
+def test_reduced_order():
+    """
+    A record with an order is solved by its PRIMA reduced model.
+
+    The reduced model of order 2 of the series RLC circuit is exact.
+    """
+    result = batch.solve_record(dict(RLC, order=2))
+    assert len(result["num"]) == 1 and len(result["den"]) == 3
+    assert abs(result["num"][0]/1e8 - 1) < 1e-9
+    assert abs(result["den"][1]/1e3 - 1) < 1e-9
+    assert abs(result["den"][2]/1e8 - 1) < 1e-9
+# Atrribute will_run is added to all the test functions
+test_solve_transfer_function.will_run = True
+test_superposition.will_run = True
+test_solve_record_errors.will_run = True
+test_solve_record_malformed.will_run = True
+test_main.will_run = True
+test_main_not_object.will_run = True
+test_main_spice.will_run = True
+test_reduced_order.will_run = True
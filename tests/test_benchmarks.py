@@ -0,0 +1,54 @@
+"""os and sys are used to access the benchmarks and the program that is being
+tested, present in the benchmarks and cc_params directories.
+"""
+import os
+import sys
+for directory in ("cc_params", "benchmarks"):
+    module_path = os.path.dirname(os.path.pardir + os.path.sep)
+    module_path = os.path.join(module_path, directory)
+    sys.path.insert(0, os.path.abspath(module_path))
+import circuits
+import prog_tf as prog
+import stages
+
+
+def test_circuits():
+    """
+    Every family gives a valid netlist of about the requested size, and the
+    random circuits are reproducible by their seed.
+    """
+    for name, family in circuits.FAMILIES.items():
+        for size in (10, 300):
+            record = family(size)
+            assert prog.check_netlist_error(record['origin'], record['dest'],
+                                            record['ele'],
+                                            record['val']) == (0, "")
+            assert 0.5*size <= len(record['ele']) <= 1.5*size
+            assert record['output'][2:] in record['ele']
+    assert circuits.random_graph(50, seed=3) == \
+        circuits.random_graph(50, seed=3)
+    assert circuits.random_graph(50, sources=4)['ele'][:4] == \
+        ['V1', 'V2', 'V3', 'V4']
+
+
+def test_stages():
+    """
+    The stages within their limit are timed, and a stage is flagged only when
+    it is slower than the median of its history by the ratio and the noise.
+    """
+    names = [x[0] for x in stages.time_stages(circuits.rc_ladder(40), 1)]
+    assert names == ['check_netlist_error', 'set_cond_matrix',
+                     'set_volt_matrix', 'nodal_matrix',
+                     'transfer_coefficients']
+
+    def record(seconds, stage='nodal_matrix', python='2.7'):
+        return {'family': 'rc_ladder', 'size': 10, 'stage': stage,
+                'python': python, 'seconds': seconds}
+    history = [record(9.0)] + [record(x) for x in (1.0, 1.2, 0.9, 1.1, 1.0)]
+    assert stages.regressions([record(1.4)], history) == []
+    assert stages.regressions([record(1.6)], history) == [(record(1.6), 1.0)]
+    assert stages.regressions([record(1.6, python='3.5')], history) == []
+    assert stages.regressions([record(0.004)], [record(0.001)]) == []
+# Atrribute will_run is added to all the test functions
+test_circuits.will_run = True
+test_stages.will_run = True
@@ -0,0 +1,107 @@
+"""sympy is used to build the equations and the reference solutions.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+from sympy import symbols, Matrix, Poly, cancel, nsimplify
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import batch
+import fraction_free
+import prog_tf as prog
+
+CIRCUITS = [
+    ([1, 2, 3, 1], [2, 3, 0, 0], ["R1", "L1", "C1", "V1"],
+     [10.0, 0.01, 1e-6, 10.0]),
+    ([1, 2, 1], [2, 0, 0], ["R1", "C1", "V1"], [1e3, 1e-6, 2.0]),
+    ([1, 2, 1], [2, 0, 0], ["R1", "L1", "V1"], [1e3, 1e-3, 2.0]),
+    ([1, 2, 1], [2, 0, 0], ["R1", "R2", "V1"], [1e3, 1e3, 2.0]),
+    ([1, 2, 3, 1, 4, 4], [2, 3, 0, 0, 3, 0],
+     ["R1", "L1", "C1", "V1", "R2", "V2"],
+     [10.0, 0.01, 1e-6, 10.0, 100.0, 5.0])]
+
+
+def reference_solution(unknowns, tot_mat, rhs):
+    """
+    Solve the nodal analysis equations with LUsolve on sympy expressions and
+    cancel every unknown, as prog_tf.solve_circuit did before fraction_free.
+    """
+    exact_mat = tot_mat.applyfunc(lambda e: nsimplify(e, rational=True))
+    exact_rhs = rhs.applyfunc(lambda e: nsimplify(e, rational=True))
+    x_mat = exact_mat.LUsolve(exact_rhs)
+    return dict((unknowns[i, 0], cancel(x_mat[i, 0]).evalf())
+                for i in range(unknowns.rows))
+
+
+def reference_coefficients(soln, origin, dest, ele, val, input_value, ident,
+                           kind):
+    """
+    Coefficients of the output of a reference solution over the input,
+    brought to lowest terms with cancel and rounded to 10 decimals.
+    """
+    s = symbols('s')
+    output = prog.output_tf_calc(soln, origin, dest, val, ele, ident, kind)
+    ratio = cancel(nsimplify(output, rational=True) /
+                   nsimplify(input_value, rational=True))
+    num, den = ratio.as_numer_denom()
+    return ([float(round(a, 10)) for a in Poly(num, s).all_coeffs()],
+            [float(round(a, 10)) for a in Poly(den, s).all_coeffs()])
+
+
+def test_solve():
+    """
+    Test the solution of small systems against hand computation.
+
+    The first pivot is zero, as for the source current of nodal analysis,
+    and a singular matrix raises ValueError.
+    """
+    s = symbols('s')
+    numerators, det = fraction_free.solve(Matrix([[0, 1], [1, 1/s]]),
+                                          Matrix([[1, 3], [2, 0]]), s)
+    assert det.as_expr() == s
+    assert [[y.as_expr() for y in row] for row in numerators] == \
+        [[2*s - 1, -3], [s, 3*s]]
+    try:
+        fraction_free.solve(Matrix([[1, s], [2, 2*s]]), Matrix([1, 2]), s)
+    except ValueError as err:
+        assert "not invertible" in str(err)
+    else:
+        assert False
+
+
+def test_lowest_terms():
+    """The ratios are normalized as sympy.cancel normalizes them."""
+    s = symbols('s')
+    num, den = fraction_free.lowest_terms(Poly(s/2, s, domain='QQ'),
+                                          Poly(-0.25*s**2 - s, s,
+                                               domain='QQ'))
+    assert (num.as_expr(), den.as_expr()) == (-2, s + 4)
+    num, den = fraction_free.lowest_terms(Poly(0, s), Poly(s + 1, s))
+    assert num.is_zero and den.as_expr() == 1
+
+
+def test_coefficients():
+    """
+    The coefficients of batch.exact_coefficients are identical to those
+    taken from the reference solution for every input and output, with the
+    other sources set to zero.
+    """
+    for origin, dest, ele, val in CIRCUITS:
+        for source in [x for x in ele if x.startswith('V')]:
+            reference = reference_solution(*batch.nodal_equations(
+                origin, dest, ele, val, input_source=source))
+            for ident in ele:
+                for kind in ('V', 'I'):
+                    expected = reference_coefficients(
+                        reference, origin, dest, ele, val,
+                        val[ele.index(source)], ident, kind)
+                    assert batch.exact_coefficients(
+                        origin, dest, ele, val, source, ident, kind) == \
+                        tuple(expected)
+# Atrribute will_run is added to all the test functions
+test_solve.will_run = True
+test_lowest_terms.will_run = True
+test_coefficients.will_run = True
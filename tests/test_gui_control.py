@@ -0,0 +1,54 @@
+"""numpy is used to build the curves and responses that are compared.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import gui_control
+
+
+def test_decimate():
+    """
+    Short curves are kept, long ones are cut to max_points in order and keep
+    their first and last points and their extremes.
+    """
+    x = np.arange(10)
+    assert np.array_equal(gui_control.decimate(x, x**2)[1], x**2)
+    x = np.linspace(0, 1, 100001)
+    y = np.sin(50*x)
+    y[31234] = 5.0
+    x_dec, y_dec = gui_control.decimate(x, y, 200)
+    assert len(x_dec) <= 200 and np.all(np.diff(x_dec) > 0)
+    assert x_dec[0] == 0 and x_dec[-1] == 1
+    assert y_dec.max() == 5.0 and y_dec.min() == y.min()
+
+
+def test_coefficient_response():
+    """
+    The response of 1/(s + 100) spans two decades around its pole, which
+    may also be given instead of being found from the coefficients.
+    """
+    freq_resp, omega = gui_control.coefficient_response([1.0], [1.0, 100.0])
+    assert np.isclose(omega[0], 1.0) and np.isclose(omega[-1], 1e4)
+    assert np.allclose(freq_resp, 1/(1j*omega + 100))
+    freq_resp, omega = gui_control.coefficient_response(
+        [1.0], [1.0, 100.0], roots=([], [-1e3]))
+    assert np.isclose(omega[0], 10.0) and np.isclose(omega[-1], 1e5)
+
+
+def test_frequency_grid():
+    """The grid spans two decades beyond the roots, ignoring those at 0."""
+    omega = gui_control.frequency_grid([np.array([0.0, -30.0]),
+                                        np.array([-2e3+1e3j])], 50)
+    assert len(omega) == 50
+    assert np.isclose(omega[0], 0.1) and np.isclose(omega[-1], 1e6)
+    assert np.isclose(gui_control.frequency_grid([[]])[0], 0.1)
+# Atrribute will_run is added to all the test functions
+test_decimate.will_run = True
+test_coefficient_response.will_run = True
+test_frequency_grid.will_run = True
@@ -0,0 +1,69 @@
+"""multiprocessing is used to run the worker as the window does.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+from multiprocessing import Process, Queue
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import gui_progress
+import prog_tf as prog
+
+ORIGIN, DEST = [1, 2, 2], [0, 0, 1]
+ELE, VAL = ["V1", "C1", "R1"], [1.0, 1e-3, 10.0]
+
+
+def messages(task, args):
+    """Messages sent back by a worker process running task."""
+    queue = Queue()
+    process = Process(target=gui_progress.work, args=(queue, task, args))
+    process.start()
+    received = [queue.get(timeout=60)]
+    while received[-1][0] == 'progress':
+        received.append(queue.get(timeout=60))
+    process.join()
+    return received
+
+
+def test_work():
+    """
+    The worker reports the stage of the task before its result, which is
+    that of the task run directly, and reports singular equations as an
+    error.
+    """
+    selection = (ORIGIN, DEST, ELE, VAL, "V1", "C1", "V")
+    received = messages(prog.coefficients_task, selection)
+    assert [kind for kind, value in received] == ['progress', 'done']
+    assert received[0][1] == "Interpolating the transfer function"
+    assert received[-1][1] == prog.coefficients_task(lambda x: None,
+                                                     *selection)
+    received = messages(prog.coefficients_task, ([1, 1], [0, 0],
+                                                 ["V1", "V2"], [1.0, 2.0],
+                                                 "V1", "V2", "I"))
+    assert received[-1][0] == 'error'
+
+
+def test_reduction_task():
+    """
+    The reduced model of a ladder of 60 sections is built in the worker,
+    which returns its coefficients with its roots, its realization of the
+    requested order and its estimated error.
+    """
+    origin, dest, ele, val = [1], [0], ["V1"], [1.0]
+    for k in range(60):
+        origin += [k+1, k+2]
+        dest += [k+2, 0]
+        ele += ["R"+str(k+1), "C"+str(k+1)]
+        val += [10.0, 1e-6]
+    selection = (origin, dest, ele, val, "V1", "C60", "V")
+    received = messages(prog.reduction_task, (8,) + selection)
+    assert [kind for kind, value in received][-1] == 'done'
+    coefficients, roots, realization, error, order = received[-1][1]
+    assert order == 8 and len(realization[0]) == 8 and len(roots[1]) == 8
+    assert len(coefficients[1]) == 9 and 0 <= error < 1
+# Atrribute will_run is added to all the test functions
+test_work.will_run = True
+test_reduction_task.will_run = True
@@ -0,0 +1,85 @@
+"""numpy is used to compare the coefficients.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import incremental
+import tf_interp
+
+ORIGIN, DEST = [1, 1, 2, 2, 3, 3, 4], [0, 2, 0, 3, 0, 4, 0]
+ELE = ["V1", "R1", "C1", "R2", "C2", "L1", "R3"]
+VAL = [1.0, 100.0, 1e-6, 220.0, 4.7e-7, 1e-3, 50.0]
+
+
+def close(got, expected):
+    """Coefficient lists of the same length equal to 1e-9 relative."""
+    return len(got) == len(expected) and \
+        np.allclose(got, expected, rtol=1e-9, atol=0)
+
+
+def test_updates():
+    """
+    Value changes give the transfer function of the changed netlist.
+
+    Changes of R, C and L, a change of the output element and a change
+    back to the factorized value are applied as updates.
+    """
+    solver = incremental.Incremental_solver(ORIGIN, DEST, ELE, VAL, "V1",
+                                            "R3", "I")
+    val = list(VAL)
+    for ident, value in [("R1", 150.0), ("C2", 1e-6), ("L1", 2e-3),
+                         ("R3", 75.0), ("R1", 100.0)]:
+        val[ELE.index(ident)] = value
+        got = solver.set_value(ident, value)
+        expected = tf_interp.transfer_coefficients(ORIGIN, DEST, ELE, val,
+                                                   "V1", "R3", "I",
+                                                   rho=solver.rho)
+        assert close(got[0], expected[0]) and close(got[1], expected[1])
+    assert solver.factorizations == 1 and solver.updates == 5
+    s_values, x = solver.solution()
+    assert x.shape == (len(s_values), solver.pattern.size)
+
+
+def test_refactorization():
+    """
+    The matrices are factorized again after max_updates changes, and after
+    every change when no drift at all is accepted.
+    """
+    solver = incremental.Incremental_solver(ORIGIN, DEST, ELE, VAL, "V1",
+                                            "C2", "V", max_updates=2)
+    for value in (110.0, 120.0, 130.0):
+        solver.set_value("R2", value)
+    assert solver.factorizations == 2 and solver.updates == 0
+    solver = incremental.Incremental_solver(ORIGIN, DEST, ELE, VAL, "V1",
+                                            "C2", "V", drift_tolerance=0.0)
+    solver.set_value("C1", 2e-6)
+    solver.set_value("C1", 3e-6)
+    assert solver.factorizations == 3
+    val = list(VAL)
+    val[2] = 3e-6
+    expected = tf_interp.transfer_coefficients(ORIGIN, DEST, ELE, val, "V1",
+                                               "C2", "V", rho=solver.rho)
+    got = solver.transfer_function()
+    assert close(got[0], expected[0]) and close(got[1], expected[1])
+
+
+def test_singular():
+    """Two voltage sources in parallel raise ValueError."""
+    try:
+        incremental.Incremental_solver([1, 1, 1], [0, 0, 0],
+                                       ["V1", "V2", "R1"], [1.0, 2.0, 1.0],
+                                       "V1", "R1", "V")
+    except ValueError as err:
+        assert str(err) == "Circuit equations are singular"
+    else:
+        assert False
+# Atrribute will_run is added to all the test functions
+test_updates.will_run = True
+test_refactorization.will_run = True
+test_singular.will_run = True
@@ -0,0 +1,69 @@
+"""numpy and scipy are used to build the values that are described.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+from scipy.sparse import csr_matrix
+from sympy import symbols
+from sympy.matrices import Matrix
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import batch
+import instrument
+
+ORIGIN, DEST = [1, 2, 2], [0, 0, 1]
+ELE, VAL = ["V1", "C1", "R1"], [1.0, 1e-3, 10.0]
+
+
+def test_describe():
+    """Shape, non-zero entries and operation count of the results."""
+    s = symbols('s')
+    mat = Matrix([[1 + s, 0], [0, 2*s]])
+    assert instrument.describe(mat) == ((2, 2), 2, 2)
+    assert instrument.describe(csr_matrix(np.eye(3))) == ((3, 3), 3, None)
+    assert instrument.describe(np.array([[0, 1], [2, 0]])) == ((2, 2), 2,
+                                                               None)
+    assert instrument.describe({s: s + 1}) == ((1,), 1, 1)
+    assert instrument.describe(None) == (None, None, None)
+
+
+def test_report():
+    """
+    The phases of a solution are recorded only while a Report is active,
+    the inner phases of solve_circuit one level deeper.
+    """
+    with instrument.Report(memory=True, profile=True) as report:
+        batch.solve_netlist(ORIGIN, DEST, ELE, VAL)
+        try:
+            instrument.Report().start()
+        except RuntimeError:
+            pass
+        else:
+            assert False
+    batch.solve_netlist(ORIGIN, DEST, ELE, VAL)
+    assert instrument.ACTIVE is None
+    names = [(x['name'], x['depth']) for x in report.rows()]
+    assert names == [('check_netlist_error', 0), ('set_cond_matrix', 0),
+                     ('set_volt_matrix', 0), ('nodal_matrix', 0),
+                     ('solve_circuit', 0), ('Bareiss', 1), ('cancel', 1)]
+    tot_mat = report.phases[3]
+    assert tot_mat.shape == (3, 3) and tot_mat.nnz == 6
+    assert all(x.seconds >= 0 for x in report.phases)
+    if instrument.tracemalloc is not None:
+        assert all(x.peak_memory >= 0 for x in report.phases)
+    assert report.totals()['solve_circuit'] >= report.totals()['Bareiss']
+    assert "  Bareiss" in report.summary()
+    assert "solve_circuit" in report.profile_stats(limit=50)
+    try:
+        instrument.Report().profile_stats()
+    except ValueError:
+        pass
+    else:
+        assert False
+# Atrribute will_run is added to all the test functions
+test_describe.will_run = True
+test_report.will_run = True
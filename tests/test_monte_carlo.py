@@ -0,0 +1,52 @@
+"""numpy is used to check the statistics of the Monte Carlo analysis.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import monte_carlo as mc
+
+O, D = [1, 1, 2], [0, 2, 0]
+E, V = ["V1", "R1", "C1"], [1.0, 1e3, 1e-6]
+
+
+def test_nominal():
+    """An RC low pass filter without tolerances has its corner at 1/RC."""
+    res = mc.monte_carlo(O, D, E, V, "V1", "C1", "V", {}, samples=3,
+                         processes=1, omega=np.logspace(0, 6, 601))
+    assert np.allclose(res["gain_db"], 0.0, atol=1e-4)
+    assert np.allclose(res["f3db"], 1e3, rtol=1e-2)
+    assert np.allclose(res["peak_db"], res["gain_db"])
+
+
+def test_tolerances():
+    """
+    With 5 % parts the corner frequency 1/RC stays within the worst case.
+
+    The same seed gives the same samples, also with a pool of processes.
+    """
+    tol = {"R1": 0.05, "C1": ("normal", 0.05)}
+    res = mc.monte_carlo(O, D, E, V, "V1", "C1", "V", tol, samples=200,
+                         seed=1, processes=2, chunk_size=50,
+                         omega=np.logspace(1, 5, 801))
+    values = res["values"]
+    assert values.shape == (200, 3)
+    assert np.all(values[:, 0] == 1.0)
+    assert np.all(np.abs(values[:, 1]/1e3 - 1) <= 0.05)
+    expected = 1/(values[:, 1]*values[:, 2])
+    assert np.allclose(res["f3db"], expected, rtol=2e-2)
+    stats = mc.summary(res)
+    assert stats["f3db"]["count"] == 200
+    assert 900 < stats["f3db"]["mean"] < 1100
+    again = mc.sample_values(E, V, tol, 200, seed=1)
+    assert np.all(again == values)
+    assert mc.yield_fraction(res, "f3db", 0, 1e6) == 1.0
+    assert mc.yield_fraction(res, "f3db", 2e3) == 0.0
+# Atrribute will_run is added to all the test functions
+test_nominal.will_run = True
+test_tolerances.will_run = True
@@ -0,0 +1,50 @@
+"""numpy is used to compare the arrays of the netlist.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import netlist
+
+O, D = [1, 2, 3, 1, 3], [2, 3, 0, 0, 0]
+E, V = ["R1", "L1", "C1", "V2", "r2"], [10.0, 0.01, 1e-6, 10.0, 5.0]
+
+
+def test_netlist_arrays():
+    """Test the array types, the type codes and the identifier table."""
+    net = netlist.Netlist(O, D, E, V)
+    assert net.origin.dtype == np.int32 and net.dest.dtype == np.int32
+    assert net.kind.dtype == np.uint8 and net.value.dtype == np.float64
+    assert list(net.kind) == [0, 1, 2, 3, 0]
+    assert list(netlist.type_codes(["X1"])) == [netlist.UNKNOWN]
+    assert len(net) == 5 and net.num_nodes == 3
+    assert net.index("C1") == 2 and net.letter("r2") == "R"
+    assert net.lists() == (O, D, E, V)
+    assert not hasattr(net, "__dict__")
+
+
+def test_views():
+    """
+    Test the views by element type and the adjacency index.
+
+    The arrays of one type share memory with the array sorted by type, and
+    the elements at a node are those with the node at either end.
+    """
+    net = netlist.Netlist(O, D, E, V)
+    positions, origin, dest, value = net.of_type("R")
+    assert list(positions) == [0, 4] and list(value) == [10.0, 5.0]
+    assert list(origin) == [1, 3] and list(dest) == [2, 0]
+    assert value.base is not None
+    assert value.base is net.of_type("C")[3].base
+    assert list(net.sources()) == [3]
+    assert sorted(net.elements_at(0)) == [2, 3, 4]
+    assert sorted(net.elements_at(3)) == [1, 2, 4]
+    assert list(net.of_type("L")[0]) == [1]
+# Atrribute will_run is added to all the test functions
+test_netlist_arrays.will_run = True
+test_views.will_run = True
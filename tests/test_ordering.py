@@ -0,0 +1,87 @@
+"""numpy and scipy are used to build and solve the test systems.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import splu
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import mna
+import ordering
+import prog_tf as prog
+
+
+def grid(size):
+    """RC grid of size x size nodes with shuffled node numbers."""
+    numbers = np.concatenate(([0], np.random.RandomState(1).permutation(
+        size*size) + 1))
+    origin, dest, ele, val = [numbers[1]], [0], ["V1"], [1.0]
+    for i in range(size*size):
+        for j in (i + 1, i + size):
+            if (j < size*size) and (j == i + size or j % size):
+                origin.append(numbers[i+1])
+                dest.append(numbers[j+1])
+                ele.append("R" + str(len(ele)))
+                val.append(1.0)
+        origin.append(numbers[i+1])
+        dest.append(0)
+        ele.append("C" + str(i + 1))
+        val.append(1e-6)
+    return [int(x) for x in origin], [int(x) for x in dest], ele, val
+
+
+def test_permutation():
+    """Every method returns a permutation; natural is the identity."""
+    g, c, b, unknowns = mna.descriptor_system(*grid(6))
+    size = g.shape[0]
+    for method in ordering.METHODS:
+        perm = ordering.descriptor_permutation(g, c, method)
+        assert sorted(perm) == list(range(size))
+    assert list(ordering.permutation(g, 'natural')) == list(range(size))
+    perm = ordering.permutation(g, 'amd')
+    assert list(perm[ordering.inverse(perm)]) == list(range(size))
+
+
+def test_fill_and_solution():
+    """
+    Both orderings produce less fill than the shuffled node numbers, the
+    minimum degree ordering less than half.
+
+    The solution, also of the transposed system, is that of SuperLU with its
+    own column ordering.
+    """
+    g, c, b, unknowns = mna.descriptor_system(*grid(12))
+    mat = csc_matrix(g + 1e3j*c)
+    rhs = b[:, 0].astype(np.complex128)
+    natural = ordering.Ordered_pencil(g, c, 'natural').factor(1e3j)
+    expected = splu(mat).solve(rhs)
+    expected_t = splu(mat).solve(rhs, trans='T')
+    for method in ('rcm', 'amd'):
+        lu = ordering.Ordered_pencil(g, c, method).factor(1e3j)
+        assert lu.nnz < natural.nnz
+        assert np.allclose(lu.solve(rhs), expected)
+        assert np.allclose(lu.solve(rhs, trans='T'), expected_t)
+    assert lu.nnz < natural.nnz/2
+
+
+def test_symbolic_solution():
+    """The solution of prog_tf keeps the unknowns of the user's nodes."""
+    origin, dest = [3, 3, 1, 2, 1], [0, 1, 2, 0, 0]
+    ele, val = ["V1", "R1", "C1", "L1", "R2"], [1.0, 2.0, 1e-3, 1e-2, 4.0]
+    cond, num_nodes = prog.set_cond_matrix(origin, dest, ele, val)
+    volt, volt_t, dep = prog.set_volt_matrix(origin, dest, ele)
+    unknowns, tot_mat, rhs = prog.nodal_matrix(cond, volt, val, volt_t,
+                                               num_nodes, dep.shape[1], ele,
+                                               dep)
+    natural = prog.solve_circuit(unknowns, tot_mat, rhs, 'natural')
+    for method in ('rcm', 'amd'):
+        assert prog.solve_circuit(unknowns, tot_mat, rhs, method) == natural
+# Atrribute will_run is added to all the test functions
+test_permutation.will_run = True
+test_fill_and_solution.will_run = True
+test_symbolic_solution.will_run = True
@@ -0,0 +1,124 @@
+"""numpy is used to compare the roots against known values and responses.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import ac_sweep
+import mna
+import pole_zero
+
+RLC = [1, 2, 3, 1], [2, 3, 0, 0], ["R1", "L1", "C1", "V1"], \
+    [10.0, 0.01, 1e-6, 10.0]
+
+
+def ladder(sections):
+    """RC ladder of sections with a resistive load, driven by V1."""
+    origin, dest, ele, val = [1], [0], ["V1"], [1.0]
+    for k in range(sections):
+        origin += [k+1, k+2]
+        dest += [k+2, 0]
+        ele += ["R"+str(k+1), "C"+str(k+1)]
+        val += [10.0*(1+0.1*k), 1e-6*(1+0.05*k)]
+    origin, dest = origin + [sections+1], dest + [0]
+    return origin, dest, ele + ["R0"], val + [1e3]
+
+
+def test_series_rlc():
+    """
+    The roots of the series RLC circuit are known by hand.
+
+    The poles are those of s^2 + 1000s + 1e8, the resistor voltage has a
+    zero at 0 and a gain of R/L, the capacitor voltage none and a gain of
+    1/LC.
+    """
+    expected = np.sort_complex(np.roots([1.0, 1e3, 1e8]))
+    assert np.allclose(np.sort_complex(pole_zero.poles(*RLC)), expected)
+    zeros, poles, sign, log_gain = pole_zero.transfer_roots(
+        *(RLC + ("V1", "R1", "V")))
+    assert np.allclose(np.sort_complex(poles), expected)
+    assert len(zeros) == 1 and abs(zeros[0]) < 1e-6
+    assert sign == 1.0 and np.isclose(log_gain, np.log(1e3))
+    zeros, poles, sign, log_gain = pole_zero.transfer_roots(
+        *(RLC + ("V1", "C1", "V")))
+    assert len(zeros) == 0 and np.isclose(log_gain, np.log(1e8))
+
+
+def test_elimination():
+    """
+    Eliminating the unknowns without capacitance keeps the finite
+    eigenvalues of the whole pencil.
+    """
+    g, c, b, unknowns = mna.descriptor_system(*ladder(30))
+    reduced = np.sort_complex(pole_zero.pencil_eigenvalues(g, c))
+    full = np.sort_complex(pole_zero.finite_eigenvalues(g.toarray(),
+                                                        c.toarray()))
+    assert len(reduced) == 30
+    assert np.allclose(reduced, full, rtol=1e-8)
+    assert np.all(reduced.real < 0)
+
+
+def test_response():
+    """
+    The roots and gain give back the response of ac_sweep, for a voltage
+    output and for a capacitor current, whose zeros need the whole
+    bordered pencil.
+    """
+    net = ladder(60)
+    omega = np.logspace(0, 7, 60)
+    for ident, output_var in (("C60", "V"), ("C20", "I")):
+        zeros, poles, sign, log_gain = pole_zero.transfer_roots(
+            *(net + ("V1", ident, output_var)))
+        full, w = ac_sweep.frequency_response(
+            *(net + ("V1", ident, output_var, omega)))
+        s = 1j*omega
+        resp = sign*np.exp(
+            log_gain + np.sum(np.log(s[:, None] - zeros[None, :]), axis=1) -
+            np.sum(np.log(s[:, None] - poles[None, :]), axis=1))
+        assert np.allclose(resp, full, rtol=1e-7,
+                           atol=1e-12*np.abs(full).max())
+
+
+def test_cancel_roots():
+    """Only a zero and a pole close relative to the pole cancel."""
+    zeros, poles = pole_zero.cancel_roots([1e-3, -5.0, -2e4],
+                                          [-2e4*(1+1e-9), -1e-3, -4.0])
+    assert np.allclose(zeros, [1e-3, -5.0])
+    assert np.allclose(poles, [-1e-3, -4.0])
+    num, den = pole_zero.coefficients([], [-2.0], -1.0, np.log(3.0))
+    assert np.allclose(num, [-3.0], rtol=1e-15) and den == [1.0, 2.0]
+
+
+def test_lc_ladder():
+    """
+    The gain of an LC ladder of 200 states is far beyond a float, yet its
+    logarithm gives back the response of ac_sweep.
+    """
+    origin, dest, ele, val = [1], [0], ["V1"], [1.0]
+    for k in range(100):
+        origin += [k+1, k+2]
+        dest += [k+2, 0]
+        ele += ["L"+str(k+1), "C"+str(k+1)]
+        val += [1e-3*(1+0.1*k), 1e-6*(1+0.05*k)]
+    net = (origin + [101], dest + [0], ele + ["R0"], val + [1e3])
+    zeros, poles, sign, log_gain = pole_zero.transfer_roots(
+        *(net + ("V1", "C100", "V")))
+    assert len(poles) == 200 and sign == 1.0
+    assert log_gain > np.log(np.finfo(float).max)
+    omega = np.logspace(2, 6, 40)
+    full, w = ac_sweep.frequency_response(*(net + ("V1", "C100", "V",
+                                                   omega)))
+    resp = sign*np.exp(log_gain - np.sum(np.log(1j*omega[:, None] -
+                                                poles[None, :]), axis=1))
+    assert np.allclose(resp, full, rtol=0, atol=1e-8*np.abs(full).max())
+# Atrribute will_run is added to all the test functions
+test_series_rlc.will_run = True
+test_elimination.will_run = True
+test_response.will_run = True
+test_cancel_roots.will_run = True
+test_lc_ladder.will_run = True
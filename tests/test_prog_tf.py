@@ -4,6 +4,7 @@ os and sys are used to access the program that is being tested and present
 in the cc_params directory.
 """
 import os
+import subprocess
 import sys
 from sympy import symbols
 from sympy.matrices import Matrix
@@ -127,6 +128,32 @@ def test_nodal_matrix():
     assert(mat, u, r) == (m, unknowns, rhs)
 
 
+def test_check_circuit_error():
+    """
+    Test the solution of the nodal analysis equations of check_circuit_error.
+
+    A series RLC circuit with V = 10V, R = 10ohms, L = 0.01H and C = 10^-6F is
+    solved and the voltage across the capacitor and the source current are
+    compared against the values computed by hand.
+    """
+    s, V_1, V_3, I_V1 = symbols('s'), symbols('V_1'), symbols('V_3'), \
+        symbols('I_V1')
+    o, d = [1, 2, 3, 1], [2, 3, 0, 0]
+    e, v = ["R1", "L1", "C1", "V1"], [10.0, 0.01, 1e-6, 10.0]
+    cond, n_nodes = prog.set_cond_matrix(o, d, e, v)
+    volt, volt_t, dep = prog.set_volt_matrix(o, d, e)
+    unknowns, tot_mat, rhs = prog.nodal_matrix(cond, volt, v, volt_t, n_nodes,
+                                               1, e, dep)
+    soln = prog.check_circuit_error(unknowns, tot_mat, rhs)
+    impedance = (s**2*1e-8+s*1e-5+1.0)/(s*1e-6)
+    for point in [0.5, 100.0, 1e4]:
+        assert abs(soln[V_3].subs(s, point) -
+                   (10.0/(point*1e-6)/impedance).subs(s, point)) < 1e-9
+        assert abs(soln[I_V1].subs(s, point) -
+                   (10.0/impedance).subs(s, point)) < 1e-9
+    assert soln[V_1] == 10.0
+
+
 def test_check_netlist_error():
     """Test the function check_netlist_error of prog_tf.py."""
     origin, dest = [1, -2, 3, 1], [-2, 3, 0, 0]
@@ -173,9 +200,26 @@ def test_check_netlist_error():
     ele_type, val = ['R1', 'L1', 'C1', 'V1'], [10, 0.01, 0.001, -10]
     e_flag, e_msg = prog.check_netlist_error(origin, dest, ele_type, val)
     assert(e_flag, e_msg) == (0, "")
+
+
+def test_lazy_gui_imports():
+    """
+    Importing prog_tf loads none of the GUI, plotting or control modules.
+
+    The import is made in a fresh interpreter, as the other tests may have
+    loaded them already.
+    """
+    code = ("import sys; sys.path.insert(0, %r); import prog_tf; "
+            "print([x for x in ('gui_input', 'gui_tf_io', 'gui_control', "
+            "'control', 'matplotlib', 'Tkinter', 'tkinter') "
+            "if x in sys.modules])" % os.path.abspath(module_path))
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.decode().strip() == "[]"
 # Atrribute will_run is added to all the test functions
 test_conductance_matrix.will_run = True
 test_voltage_matrix.will_run = True
 test_output_tf_calc.will_run = True
 test_nodal_matrix.will_run = True
+test_check_circuit_error.will_run = True
 test_check_netlist_error.will_run = True
+test_lazy_gui_imports.will_run = True
@@ -0,0 +1,146 @@
+"""numpy is used to compare the reduced models against the full circuits.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import warnings
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import ac_sweep
+import pole_zero
+import reduction
+import tf_interp
+
+
+def ladder(sections, series="R", series_value=10.0):
+    """Ladder of series elements and shunt capacitors driven by V1."""
+    origin, dest, ele, val = [1], [0], ["V1"], [1.0]
+    for k in range(sections):
+        origin += [k+1, k+2]
+        dest += [k+2, 0]
+        ele += [series+str(k+1), "C"+str(k+1)]
+        val += [series_value*(1+0.1*k), 1e-6*(1+0.05*k)]
+    return origin, dest, ele, val
+
+
+def test_exact():
+    """
+    A model whose Krylov subspace fills the whole space is exact.
+
+    Its coefficients are those of tf_interp, the error estimate is 0, and
+    the responses of an RLC circuit agree with ac_sweep.
+    """
+    rlc = [1, 2, 3, 1], [2, 3, 0, 0], ["R1", "L1", "C1", "V1"], \
+        [10.0, 0.01, 1e-6, 10.0]
+    model = reduction.Reduced_model(*rlc, order=10)
+    assert model.exact and model.order <= 5
+    num, den = model.transfer_coefficients("V1", "R1", "V")
+    expected = tf_interp.transfer_coefficients(*(rlc + ("V1", "R1", "V")))
+    assert np.allclose(num, expected[0], rtol=1e-9, atol=1e-6)
+    assert np.allclose(den, expected[1], rtol=1e-9)
+    assert model.error_estimate("V1", "C1", "I") == 0.0
+    omega = np.logspace(2, 6, 40)
+    resp, w = model.frequency_response("V1", "C1", "I", omega)
+    full, w = ac_sweep.frequency_response(*(rlc + ("V1", "C1", "I", omega)))
+    assert np.allclose(resp, full, rtol=1e-9, atol=0)
+
+
+def test_rc_ladder():
+    """
+    The reduced model of an RC ladder of 300 sections converges to it.
+
+    The true error over a band of six decades falls with the order, the
+    estimate is within a factor of ten of it, and the coefficients give
+    the response of the reduced model.
+    """
+    net = ladder(300)
+    omega = np.logspace(-1, 5, 100)
+    full, w = ac_sweep.frequency_response(*(net + ("V1", "C300", "V",
+                                                   omega)))
+    errors = []
+    for order in (10, 40):
+        model = reduction.Reduced_model(*net, order=order)
+        assert model.order == order and not model.exact
+        resp, w = model.frequency_response("V1", "C300", "V", omega)
+        error = np.max(np.abs(resp - full))/np.max(np.abs(full))
+        estimate = model.error_estimate("V1", "C300", "V", omega)
+        assert error/10 < estimate < error*10
+        errors.append(error)
+        num, den = model.transfer_coefficients("V1", "C300", "V")
+        assert len(den) == order + 1 and den[0] == 1.0
+        coeff_resp = np.polyval(num, 1j*omega)/np.polyval(den, 1j*omega)
+        assert np.allclose(coeff_resp, resp, rtol=1e-8, atol=1e-12)
+    assert errors[1] < errors[0]/5
+
+
+def test_passivity():
+    """
+    The reduced model of an LC ladder keeps G + G^T and C semidefinite.
+
+    Its poles are then in the closed left half plane.
+    """
+    model = reduction.Reduced_model(*ladder(40, "L", 1e-3), order=12)
+    assert model.order == 12
+    scale = np.abs(model.g).max()
+    assert np.linalg.eigvalsh(model.g + model.g.T).min() > -1e-10*scale
+    assert np.linalg.eigvalsh(model.c).min() > -1e-10*np.abs(model.c).max()
+    poles = pole_zero.pencil_eigenvalues(model.g, model.c)
+    assert len(poles) and np.all(poles.real < 1e-8*np.abs(poles).max())
+
+
+def test_expansion():
+    """
+    A circuit whose G is singular is expanded away from 0.
+
+    Node 2 is joined to the rest only through capacitors, so its DC voltage
+    is undefined; the model still matches the response at its order.
+    """
+    net = ([1, 1, 2, 3], [0, 2, 3, 0], ["V1", "C1", "C2", "R1"],
+           [1.0, 1e-6, 1e-6, 1e3])
+    model = reduction.Reduced_model(*net)
+    assert model.expansion > 0 and model.exact
+    omega = np.logspace(1, 5, 30)
+    resp, w = model.frequency_response("V1", "R1", "V", omega)
+    full, w = ac_sweep.frequency_response(*(net + ("V1", "R1", "V", omega)))
+    assert np.allclose(resp, full, rtol=1e-9, atol=0)
+
+
+def test_error_estimate():
+    """
+    The estimate on the default frequencies of a uniform RC ladder of 300
+    sections, which reach its slowest pole, is within a factor of ten of
+    the true error. With shunt inductors the far node sees nothing the
+    model of order 20 can show; its response is zero and the error is 1.
+    """
+    origin, dest, ele, val = [1], [0], ["V1"], [1.0]
+    shunt = ([], [], [], [])
+    for k in range(1, 301):
+        origin += [k, k+1]
+        dest += [k+1, 0]
+        ele += ["R"+str(k), "C"+str(k)]
+        val += [1e3, 1e-6]
+        shunt = (shunt[0] + [k+1], shunt[1] + [0], shunt[2] + ["L"+str(k)],
+                 shunt[3] + [1e-3])
+    net = (origin, dest, ele, val)
+    model = reduction.Reduced_model(*net)
+    resp, omega = model.frequency_response("V1", "C300", "V")
+    full, w = ac_sweep.frequency_response(*(net + ("V1", "C300", "V",
+                                                   omega)))
+    error = np.max(np.abs(resp - full))/np.max(np.abs(full))
+    estimate = model.error_estimate("V1", "C300", "V")
+    assert error/10 < estimate < error*10
+    net = tuple(x + y for x, y in zip(net, shunt))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        model = reduction.Reduced_model(*net)
+        assert model.error_estimate("V1", "C300", "V") == 1.0
+# Atrribute will_run is added to all the test functions
+test_exact.will_run = True
+test_rc_ladder.will_run = True
+test_passivity.will_run = True
+test_expansion.will_run = True
+test_error_estimate.will_run = True
@@ -0,0 +1,182 @@
+"""json, numpy and urllib are used to post records and check the results.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+try:
+    from urllib2 import urlopen, Request, HTTPError
+except ImportError:
+    from urllib.request import urlopen, Request
+    from urllib.error import HTTPError
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import ac_sweep
+import batch
+import server
+
+RLC = {"name": "rlc", "origin": [1, 2, 3, 1], "dest": [2, 3, 0, 0],
+       "ele": ["R1", "L1", "C1", "V1"], "val": [10.0, 0.01, 1e-6, 10.0],
+       "input": "V1", "output": "V:C1"}
+
+
+def sleepy(record):
+    """Task of a worker sleeping as long as a record asks, then failing."""
+    time.sleep(record.get("sleep", 0))
+    if record.get("fail"):
+        raise IndexError("list index out of range")
+    return {"name": record["name"]}
+
+
+def post(url, data):
+    """Post data as JSON and return the status code and the decoded body."""
+    request = Request(url, json.dumps(data).encode('utf-8'),
+                      {'Content-Type': 'application/json'})
+    try:
+        response = urlopen(request, timeout=120)
+    except HTTPError as err:
+        return err.code, json.loads(err.read().decode('utf-8'))
+    return response.getcode(), json.loads(response.read().decode('utf-8'))
+
+
+def test_server():
+    """
+    Records posted to a local server are answered with the coefficients of
+    batch, the roots, the frequency response of ac_sweep and the step
+    response, singly or as a list, and a body that is not JSON is refused.
+    """
+    pool = server.Coalescing_pool(2)
+    httpd = server.Solver_server(('127.0.0.1', 0), pool, quiet=True)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+    url = "http://127.0.0.1:%d" % httpd.server_address[1]
+    try:
+        omega = [1e2, 1e4, 1e6]
+        code, result = post(url + "/solve", dict(
+            RLC, roots=True, frequencies=omega,
+            times=list(np.linspace(0, 0.02, 201))))
+        assert code == 200 and 'error' not in result
+        expected = batch.solve_transfer_function(
+            (RLC["origin"], RLC["dest"], RLC["ele"], RLC["val"]), "V1",
+            "V:C1")
+        assert (result["num"], result["den"]) == expected
+        poles = np.array([complex(*x) for x in result["poles"]])
+        assert np.allclose(np.sort_complex(poles),
+                           np.sort_complex(np.roots([1.0, 1e3, 1e8])))
+        assert result["zeros"] == [] and np.isclose(result["gain"], 1e8)
+        response, w = ac_sweep.frequency_response(
+            RLC["origin"], RLC["dest"], RLC["ele"], RLC["val"], "V1", "C1",
+            "V", np.array(omega))
+        sampled = np.array(result["frequency"]["real"]) + \
+            1j*np.array(result["frequency"]["imag"])
+        assert np.allclose(sampled, response)
+        assert len(result["step"]["t"]) == 201
+        assert abs(result["step"]["y"][-1] - 1.0) < 1e-2
+        code, results = post(url + "/solve", [RLC, dict(RLC, output="X:C1"),
+                                              dict(RLC, order=2), 3])
+        assert code == 200 and len(results) == 4
+        assert (results[0]["num"], results[0]["den"]) == expected
+        assert "error" in results[1] and "error" in results[3]
+        assert results[3] == batch.solve_record(3)
+        assert np.allclose(results[2]["den"], expected[1])
+        request = Request(url + "/solve", b"{not json")
+        try:
+            urlopen(request, timeout=60)
+        except HTTPError as err:
+            assert err.code == 400
+        else:
+            assert False
+        status = json.loads(urlopen(url + "/status",
+                                    timeout=60).read().decode('utf-8'))
+        assert status["workers"] == 2 and status["requests"] == 4
+        assert status["in_flight"] == 0
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
+        pool.close()
+
+
+def test_coalescing():
+    """
+    A record identical to one in flight shares its result, while one that
+    differs is solved on its own.
+    """
+    pool = server.Coalescing_pool(1)
+    try:
+        first = pool.submit(dict(RLC, roots=True))
+        second = pool.submit(dict(RLC, roots=True))
+        other = pool.submit(dict(RLC, output="V:R1"))
+        assert second[1] is first[1]
+        assert other[1] is not first[1]
+        results = [pool.wait(*x) for x in (first, second, other)]
+        assert results[0] == results[1] and results[0] != results[2]
+        status = pool.status()
+        assert status["requests"] == 3 and status["coalesced"] == 1
+        assert status["in_flight"] == 0
+    finally:
+        pool.close()
+
+
+def test_stuck_worker():
+    """
+    An exception in a worker is an error of its record. A record that
+    times out stays in flight, and once it holds the only worker the
+    workers are restarted and the record queued behind it is solved.
+    """
+    pool = server.Coalescing_pool(1, task=sleepy)
+    try:
+        result = pool.wait(*pool.submit({"name": "bad", "fail": True}))
+        assert result["name"] == "bad" and "IndexError" in result["error"]
+        stuck = pool.submit({"name": "slow", "sleep": 600})
+        queued = pool.submit({"name": "fast"})
+        pool.timeout = 2
+        assert "error" in pool.wait(*stuck)
+        pool.timeout = server.REQUEST_TIMEOUT
+        assert pool.wait(*queued) == {"name": "fast"}
+        status = pool.status()
+        assert status["failed"] == 1 and status["timed_out"] == 1
+        assert status["restarts"] == 1 and status["in_flight"] == 0
+    finally:
+        pool.close()
+
+
+def test_json_gain():
+    """Gains beyond a float and zero gains give valid JSON."""
+    assert server.json_gain(-1.0, np.log(2.0)) == {
+        "gain_sign": -1.0, "log_gain": np.log(2.0), "gain": -2.0}
+    huge = server.json_gain(1.0, 1e4)
+    assert huge["gain"] is None and huge["log_gain"] == 1e4
+    zero = server.json_gain(0.0, -np.inf)
+    assert zero["gain"] == 0.0 and zero["log_gain"] is None
+    json.dumps(huge, allow_nan=False)
+    json.dumps(zero, allow_nan=False)
+
+
+def test_two_sources():
+    """
+    With a second source, the coefficients and the roots both describe the
+    transfer function from the input with the other source set to zero.
+    """
+    record = {"name": "two", "origin": [1, 2, 2, 3, 3],
+              "dest": [0, 1, 0, 2, 0], "ele": ["V1", "R1", "C1", "R2", "V2"],
+              "val": [1.0, 1e3, 1e-6, 1e3, 2.0], "input": "V1",
+              "output": "V:C1", "roots": True}
+    result = server.solve_request(record)
+    assert (result["num"], result["den"]) == ([1000.0], [1.0, 2000.0])
+    poles = np.array([complex(*x) for x in result["poles"]])
+    assert result["zeros"] == [] and np.allclose(np.poly(poles),
+                                                 result["den"])
+    assert np.isclose(result["gain"], result["num"][0])
+# Atrribute will_run is added to all the test functions
+test_server.will_run = True
+test_coalescing.will_run = True
+test_stuck_worker.will_run = True
+test_json_gain.will_run = True
+test_two_sources.will_run = True
@@ -0,0 +1,113 @@
+"""Tests for reading SPICE like netlists with spice_netlist.py.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import prog_tf as prog
+import spice_netlist as spice
+
+
+def test_parse_value():
+    """Test the engineering suffixes and trailing units of values."""
+    assert spice.parse_value("10") == 10.0
+    assert spice.parse_value("10k") == 10e3
+    assert spice.parse_value("4.7u") == 4.7e-6
+    assert spice.parse_value("2MEG") == 2e6
+    assert spice.parse_value("1m") == 1e-3
+    assert spice.parse_value("10kOhm") == 10e3
+    assert spice.parse_value("1e-3") == 1e-3
+    assert spice.parse_value(".5n") == 0.5e-9
+
+
+def test_read_netlist():
+    """
+    Test a netlist with comments, continuation lines and named nodes.
+
+    Nodes are numbered in the order in which they first appear and
+    identifiers are numbered per element type in the order of the file.
+    """
+    lines = ["* series RLC circuit",
+             "Vin 1 0 DC 10",
+             "R1 1 mid 10 ; inline comment",
+             "",
+             "Lx mid",
+             "+ out 10m",
+             "C1 out gnd 1u",
+             ".tran 1u 1m",
+             ".end",
+             "R9 1 0 1k"]
+    origin, dest, ele, val, names = spice.read_netlist(lines)
+    assert origin == [1, 1, 2, 3]
+    assert dest == [0, 2, 3, 0]
+    assert ele == ["V1", "R1", "L1", "C1"]
+    assert val == [10.0, 10.0, 10e-3, 1e-6]
+    assert names == {"VIN": "V1", "R1": "R1", "LX": "L1", "C1": "C1"}
+
+
+def test_node_gaps():
+    """
+    Numeric labels that skip numbers are numbered without gaps, so the
+    circuit is not taken as unconnected.
+    """
+    lines = ["Vin in 0 1", "R1 in 10 1k", "L1 10 out 1m", "C1 out 0 1u"]
+    origin, dest, ele, val, names = spice.read_netlist(lines)
+    assert origin == [1, 1, 2, 3] and dest == [0, 2, 3, 0]
+    assert not prog.check_netlist_error(origin, dest, ele, val)[0]
+
+
+def test_read_netlist_errors():
+    """Unsupported elements and malformed lines are reported with the line."""
+    for lines, msg in [(["V1 1 0 5", "Q1 1 2 3 npn"], "Line 2"),
+                       (["V1 1 0"], "Line 1"),
+                       (["R1 1 0 abc"], "invalid value"),
+                       (["R1 1 0 1", "R1 1 0 2"], "Same identifier")]:
+        try:
+            spice.read_netlist(lines)
+        except ValueError as err:
+            assert msg in str(err)
+        else:
+            assert False
+
+
+def test_read_hierarchy():
+    """
+    Test subcircuit definitions, local node numbers and their errors.
+
+    The elements of a definition are not part of the top level netlist and
+    named nodes used by instances are numbered like those of elements.
+    """
+    lines = ["V1 in 0 1",
+             ".subckt div a b",
+             "R1 a x 1k",
+             "R2 x 0 1k",
+             "R3 x b 2k",
+             ".ends",
+             "X1 in out div",
+             "R1 out 0 1k"]
+    origin, dest, ele, val, names, instances = spice.read_hierarchy(lines)
+    assert (origin, dest, ele) == ([1, 2], [0, 0], ["V1", "R1"])
+    assert instances[0].name == "X1" and instances[0].nodes == [1, 2]
+    definition = instances[0].definition
+    assert (definition.origin, definition.dest) == ([1, 3, 3], [3, 0, 2])
+    for lines, msg in [(lines[1:3], "Missing .ends"),
+                       (["X1 1 2 div"], "Line 1"),
+                       (lines[1:6] + ["X1 1 2 3 div"], "2 ports"),
+                       ([".ends"], ".ends without"),
+                       (lines, "read_hierarchy")]:
+        try:
+            spice.read_netlist(lines)
+        except ValueError as err:
+            assert msg in str(err)
+        else:
+            assert False
+# Atrribute will_run is added to all the test functions
+test_parse_value.will_run = True
+test_read_netlist.will_run = True
+test_node_gaps.will_run = True
+test_read_netlist_errors.will_run = True
+test_read_hierarchy.will_run = True
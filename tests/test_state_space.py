@@ -0,0 +1,118 @@
+"""control and numpy are used to check the realizations against responses.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import control
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import ac_sweep
+import reduction
+import state_space
+
+RLC = [1, 2, 3, 1], [2, 3, 0, 0], ["R1", "L1", "C1", "V1"], \
+    [10.0, 0.01, 1e-6, 10.0]
+
+
+def check(netlist, ident, output_var, states):
+    """
+    Check the number of states of a realization and that its frequency
+    response is the one of ac_sweep.
+    """
+    a, b, c, d = state_space.realization(*(netlist + ("V1", ident,
+                                                      output_var)))
+    assert a.shape == (states, states) and b.shape == (states, 1)
+    assert c.shape == (1, states) and d.shape == (1, 1)
+    omega = np.logspace(1, 7, 50)
+    full, w = ac_sweep.frequency_response(*(netlist + ("V1", ident,
+                                                       output_var, omega)))
+    resp = state_space.frequency_response(a, b, c, d, omega)
+    assert np.allclose(resp, full, rtol=1e-8, atol=1e-12*np.abs(full).max())
+    return a, b, c, d
+
+
+def test_series_rlc():
+    """
+    The series RLC circuit has two states for every output, and the step
+    response of control.ss settles at the DC gain of the capacitor voltage.
+    """
+    for ident, output_var in (("R1", "V"), ("C1", "I"), ("L1", "V")):
+        check(RLC, ident, output_var, 2)
+    a, b, c, d = check(RLC, "C1", "V", 2)
+    assert np.allclose(np.sort_complex(np.linalg.eigvals(a)),
+                       np.sort_complex(np.roots([1.0, 1e3, 1e8])))
+    t, yout = control.step_response(control.ss(a, b, c, d),
+                                    np.linspace(0, 0.02, 2001))
+    assert abs(np.ravel(yout)[-1] - 1.0) < 1e-3
+
+
+def test_elimination():
+    """
+    Loops of capacitors and parallel inductors are realized after the
+    rotation of C, a resistive divider has no state and a feedthrough, and
+    a capacitor across the source has no realization for its own current.
+    """
+    loop = [1, 2, 2, 3, 1, 3], [2, 0, 3, 0, 0, 0], \
+        ["R1", "C1", "C2", "C3", "V1", "R2"], \
+        [1e3, 1e-6, 2e-6, 3e-6, 1.0, 2e3]
+    check(loop, "C2", "I", 2)
+    parallel = [1, 2, 2, 1], [2, 0, 0, 0], ["R1", "L1", "L2", "V1"], \
+        [10.0, 1e-3, 2e-3, 1.0]
+    check(parallel, "L2", "I", 2)
+    divider = [1, 2, 1], [2, 0, 0], ["R1", "R2", "V1"], [1e3, 3e3, 1.0]
+    a, b, c, d = check(divider, "R2", "V", 0)
+    assert np.isclose(d[0, 0], 0.75)
+    across = [1, 1, 1], [0, 0, 0], ["V1", "C1", "R1"], [1.0, 1e-6, 1e3]
+    try:
+        state_space.realization(*(across + ("V1", "C1", "I")))
+    except ValueError as err:
+        assert "no state space realization" in str(err)
+    else:
+        assert False
+
+
+def test_reduced_model():
+    """The realization of a reduced model has its order as states."""
+    origin, dest, ele, val = [1], [0], ["V1"], [1.0]
+    for k in range(100):
+        origin += [k+1, k+2]
+        dest += [k+2, 0]
+        ele += ["R"+str(k+1), "C"+str(k+1)]
+        val += [10.0, 1e-6]
+    model = reduction.Reduced_model(origin, dest, ele, val, order=8)
+    a, b, c, d = model.state_space("V1", "C100", "V")
+    assert a.shape == (8, 8)
+    omega = np.logspace(0, 4, 30)
+    resp, w = model.frequency_response("V1", "C100", "V", omega)
+    assert np.allclose(state_space.frequency_response(a, b, c, d, omega),
+                       resp, rtol=1e-8)
+
+
+def test_source_capacitor():
+    """
+    A capacitor across a voltage source holds no state once the source
+    current is eliminated, unless the output is that current.
+    """
+    across = [1, 1, 1, 2], [0, 0, 2, 0], ["V1", "C1", "R1", "R2"], \
+        [1.0, 1e-6, 1e3, 3e3]
+    a, b, c, d = check(across, "R1", "V", 0)
+    assert np.isclose(d[0, 0], 0.25)
+    loaded = [1, 1, 1, 2, 2], [0, 0, 2, 0, 0], \
+        ["V1", "C1", "R1", "R2", "C2"], [1.0, 1e-6, 1e3, 3e3, 2e-6]
+    check(loaded, "C2", "V", 1)
+    check(loaded, "R1", "I", 1)
+    try:
+        state_space.realization(*(across + ("V1", "V1", "I")))
+    except ValueError as err:
+        assert "no state space realization" in str(err)
+    else:
+        assert False
+# Atrribute will_run is added to all the test functions
+test_series_rlc.will_run = True
+test_elimination.will_run = True
+test_reduced_model.will_run = True
+test_source_capacitor.will_run = True
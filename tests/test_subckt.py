@@ -0,0 +1,89 @@
+"""sympy is used to compare the port blocks.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+from sympy import symbols, simplify
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import batch
+import prog_tf as prog
+import spice_netlist as spice
+import subckt
+
+SECTION = [".subckt sec in out",
+           "R1 in mid 1k",
+           "C1 mid 0 1u",
+           "R2 mid out 1k",
+           ".ends"]
+
+
+def test_port_block():
+    """
+    Test the Kron reduction of a T section and the cache of the blocks.
+
+    Eliminating the middle node of R1 - C1 - R2 leaves the two port
+    admittance matrix of the T section. A second definition with the same
+    contents gets the same block from the cache.
+    """
+    s = symbols('s')
+    section = subckt.Subcircuit("SEC", 2, [1, 3, 3], [3, 0, 2],
+                                ["R1", "C1", "R2"], [1e3, 1e-6, 1e3])
+    block = section.port_block()
+    total = 2/1e3 + s*1e-6
+    expected = [[1/1e3 - 1/(1e6*total), -1/(1e6*total)],
+                [-1/(1e6*total), 1/1e3 - 1/(1e6*total)]]
+    for i in range(2):
+        for j in range(2):
+            assert simplify(block[i, j] - expected[i][j]).equals(0)
+    other = subckt.Subcircuit("OTHER", 2, [1, 3, 3], [3, 0, 2],
+                              ["R3", "C2", "R4"], [1e3, 1e-6, 1e3])
+    assert other.port_block() is block
+    assert section.port_edges() == [(0, 1), (0, 2)]
+    try:
+        subckt.Subcircuit("BAD", 2, [1, 3], [2, 4], ["R1", "R2"],
+                          [1.0, 1.0]).port_block()
+    except ValueError as err:
+        assert "floating" in str(err)
+    else:
+        assert False
+
+
+def test_hierarchy_solution():
+    """
+    A ladder of instances gives the transfer function of the flat ladder.
+
+    The nodal analysis equations of the hierarchical netlist only hold the
+    nodes at the ports, node 2 is only used by an instance and a resistor.
+    """
+    lines = ["V1 1 0 1"] + SECTION + [".subckt two a c",
+                                      "X1 a b sec",
+                                      "X2 b c sec",
+                                      ".ends",
+                                      "X1 1 2 two",
+                                      "R9 2 0 10k"]
+    origin, dest, ele, val, names, instances = spice.read_hierarchy(lines)
+    assert [x.nodes for x in instances] == [[1, 2]]
+    assert instances[0].definition.size == 3
+    assert prog.check_netlist_error(origin, dest, ele, val,
+                                    instances) == (0, "")
+    assert subckt.check_edges(instances) == ([0, 0], [1, 2])
+    cond, num_nodes = prog.set_cond_matrix(origin, dest, ele, val, instances)
+    assert num_nodes == 2
+    hierarchical = batch.solve_transfer_function(
+        (origin, dest, ele, val), "V1", "V:" + names["R9"], instances)
+    flat = ["V1 1 0 1", "R1 1 3 1k", "C1 3 0 1u", "R2 3 4 1k",
+            "R3 4 5 1k", "C2 5 0 1u", "R4 5 2 1k", "R9 2 0 10k"]
+    origin, dest, ele, val, names = spice.read_netlist(flat)
+    expected = batch.solve_transfer_function((origin, dest, ele, val), "V1",
+                                             "V:" + names["R9"])
+    for got, want in zip(hierarchical, expected):
+        assert len(got) == len(want)
+        for a, b in zip(got, want):
+            assert abs(a - b) <= 1e-9*abs(b)
+# Atrribute will_run is added to all the test functions
+test_port_block.will_run = True
+test_hierarchy_solution.will_run = True
@@ -0,0 +1,126 @@
+"""Tests for the transfer function cache of tf_cache.py.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import threading
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import tf_cache
+
+
+def test_canonical_netlist():
+    """
+    The canonical form does not depend on node numbers or element order.
+
+    The second netlist is the first one with nodes 1 and 3 swapped and the
+    elements listed in reverse order. Reversing the direction of an element
+    gives another canonical form.
+    """
+    o, d = [1, 2, 3, 1], [2, 3, 0, 0]
+    e, v = ["R1", "L1", "C1", "V1"], [10.0, 0.01, 1e-6, 10.0]
+    text1, nodes1, elements1 = tf_cache.canonical_netlist(o, d, e, v)
+    o2, d2 = [3, 1, 2, 3], [0, 0, 1, 2]
+    e2, v2 = ["V1", "C1", "L1", "R1"], [10.0, 1e-6, 0.01, 10.0]
+    text2, nodes2, elements2 = tf_cache.canonical_netlist(o2, d2, e2, v2)
+    assert text1 == text2
+    assert nodes1[1] == nodes2[3] and nodes1[3] == nodes2[1]
+    assert elements1 == elements2
+    text3 = tf_cache.canonical_netlist([2, 2, 3, 1], [1, 3, 0, 0], e, v)[0]
+    assert text3 != text1
+
+
+def test_memory_cache():
+    """The least recently used entry is evicted first."""
+    cache = tf_cache.Memory_cache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_coefficients_cache():
+    """
+    A relabeled netlist is served from the cache, and results of different
+    methods are kept apart.
+
+    The coefficients go through the disk tier of a temporary directory.
+    """
+    directory = tempfile.mkdtemp()
+    calls = []
+
+    def solve():
+        calls.append(1)
+        return [0.5], [1.0]
+    try:
+        cache = tf_cache.Solution_cache(directory=directory)
+        o, d, e, v = [1, 1, 2], [0, 2, 0], ["V1", "R1", "R2"], [10, 10, 10]
+        assert cache.coefficients(o, d, e, v, "V1", "R2", "V", solve) == \
+            ([0.5], [1.0])
+        cache = tf_cache.Solution_cache(directory=directory)
+        coeffs = cache.coefficients([2, 2, 1], [0, 1, 0], ["V1", "R2", "R1"],
+                                    [10, 10, 10], "V1", "R1", "V", solve)
+        assert coeffs == ([0.5], [1.0])
+        assert len(calls) == 1 and cache.hits == 1
+        coeffs = cache.coefficients(o, d, e, v, "V1", "R2", "V",
+                                    lambda: ([0.0], [1.0]), method='interp')
+        assert coeffs == ([0.0], [1.0])
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_disk_cache_eviction():
+    """Old files are removed when the directory grows beyond its limit."""
+    directory = tempfile.mkdtemp()
+    try:
+        cache = tf_cache.Disk_cache(directory, max_bytes=1000)
+        for ind in range(10):
+            cache.put("k" + str(ind), "x"*300)
+        assert len(os.listdir(directory)) <= 3
+        assert cache.get("k9") == "x"*300
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_disk_cache_shared():
+    """
+    Writers sharing a directory neither lose their entries nor fail when
+    another one evicts the same files.
+    """
+    directory = tempfile.mkdtemp()
+    errors = []
+
+    def write(ind):
+        cache = tf_cache.Disk_cache(directory, max_bytes=2000)
+        try:
+            for count in range(50):
+                cache.put("k" + str(count % 7), "x"*(300 + ind))
+        except Exception as err:
+            errors.append(err)
+    try:
+        threads = [threading.Thread(target=write, args=(ind,))
+                   for ind in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert not [x for x in os.listdir(directory) if x.endswith(".tmp")]
+        cache = tf_cache.Disk_cache(directory)
+        cache.put("last", "y")
+        assert cache.get("last") == "y"
+    finally:
+        shutil.rmtree(directory)
+# Atrribute will_run is added to all the test functions
+test_canonical_netlist.will_run = True
+test_memory_cache.will_run = True
+test_coefficients_cache.will_run = True
+test_disk_cache_eviction.will_run = True
+test_disk_cache_shared.will_run = True
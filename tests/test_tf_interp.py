@@ -0,0 +1,65 @@
+"""numpy is used to compare the coefficients against known values.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import ac_sweep
+import tf_interp
+
+
+def test_transfer_coefficients():
+    """
+    Test the coefficients of RC, RL and RLC circuits against hand computation.
+
+    The denominators are monic and the common factor s of the capacitor
+    current is not cancelled, as in prog_tf.polynomial_coefficients. A
+    resistive divider has constant coefficients.
+    """
+    rc = [1, 2, 1], [2, 0, 0], ["R1", "C1", "V1"], [1e3, 1e-6, 2.0]
+    assert tf_interp.transfer_coefficients(*(rc + ("V1", "C1", "V"))) == \
+        ([1000.0], [1.0, 1000.0])
+    assert tf_interp.transfer_coefficients(*(rc + ("V1", "C1", "I"))) == \
+        ([0.001, 0.0], [1.0, 1000.0])
+    rl = [1, 2, 1], [2, 0, 0], ["R1", "L1", "V1"], [1e3, 1e-3, 2.0]
+    assert tf_interp.transfer_coefficients(*(rl + ("V1", "L1", "V"))) == \
+        ([1.0, 0.0], [1.0, 1e6])
+    rlc = [1, 2, 3, 1], [2, 3, 0, 0], ["R1", "L1", "C1", "V1"], \
+        [10.0, 0.01, 1e-6, 10.0]
+    assert tf_interp.transfer_coefficients(*(rlc + ("V1", "R1", "V"))) == \
+        ([1000.0, 0.0], [1.0, 1000.0, 1e8])
+    div = [1, 2, 1], [2, 0, 0], ["R1", "R2", "V1"], [1e3, 1e3, 2.0]
+    assert tf_interp.transfer_coefficients(*(div + ("V1", "R2", "V"))) == \
+        ([0.5], [1.0])
+
+
+def test_ladder():
+    """
+    Test the degree detection on an LC ladder of ten sections.
+
+    The denominator has degree 20 and the numerator is a constant; the
+    response computed from the coefficients matches ac_sweep.
+    """
+    origin, dest, ele, val = [1], [0], ["V1"], [1.0]
+    for k in range(10):
+        origin += [k+1, k+2]
+        dest += [k+2, 0]
+        ele += ["L"+str(k+1), "C"+str(k+1)]
+        val += [1e-3*(1+0.1*k), 1e-6*(1+0.05*k)]
+    origin, dest, ele, val = origin+[11], dest+[0], ele+["R1"], val+[50.0]
+    num, den = tf_interp.transfer_coefficients(origin, dest, ele, val, "V1",
+                                               "R1", "V")
+    assert len(num) == 1 and len(den) == 21
+    omega = np.logspace(3, 5, 50)
+    resp, w = ac_sweep.frequency_response(origin, dest, ele, val, "V1", "R1",
+                                          "V", omega)
+    assert np.allclose(np.polyval(num, 1j*omega)/np.polyval(den, 1j*omega),
+                       resp, rtol=1e-3)
+# Atrribute will_run is added to all the test functions
+test_transfer_coefficients.will_run = True
+test_ladder.will_run = True
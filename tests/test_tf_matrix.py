@@ -0,0 +1,60 @@
+"""numpy is used to compare the transfer functions against known values.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import ac_sweep
+import tf_matrix
+
+O, D = [1, 2, 3, 1, 4, 4], [2, 3, 0, 0, 3, 0]
+E = ["R1", "L1", "C1", "V1", "R2", "V2"]
+V = [10.0, 0.01, 1e-6, 10.0, 100.0, 5.0]
+
+
+def test_transfer_matrix():
+    """
+    Test the transfer functions of an RLC circuit driven by two sources.
+
+    The coefficients of every entry must agree with the numeric frequency
+    response, and the adjoint system used for few outputs must give the same
+    entries as the direct one.
+    """
+    tfs = tf_matrix.transfer_matrix(O, D, E, V)
+    assert len(tfs) == 2*2*len(E)
+    assert tfs[("V1", ("C1", "V"))] == ([1e8], [1.0, 11000.0, 1.1e8])
+    assert tfs[("V2", ("C1", "V"))] == ([1e4, 1e7], [1.0, 11000.0, 1.1e8])
+    omega = np.logspace(2, 6, 9)
+    for (source, (ident, kind)), (num, den) in tfs.items():
+        resp, w = ac_sweep.frequency_response(O, D, E, V, source, ident,
+                                              kind, omega)
+        assert np.allclose(np.polyval(num, 1j*omega) /
+                           np.polyval(den, 1j*omega), resp)
+    outputs = [("C1", "V"), ("L1", "I")]
+    assert tf_matrix.use_adjoint(2, len(outputs)) is False
+    adjoint = tf_matrix.transfer_matrix(O, D, E, V, outputs=outputs[:1])
+    assert adjoint[("V2", ("C1", "V"))] == tfs[("V2", ("C1", "V"))]
+
+
+def test_response_matrix():
+    """Each column of the response matrix equals ac_sweep for that source."""
+    omega = np.logspace(2, 6, 9)
+    outputs = tf_matrix.all_outputs(E)
+    resp, w = tf_matrix.response_matrix(O, D, E, V, omega=omega)
+    assert resp.shape == (9, 2*len(E), 2)
+    for col, source in enumerate(["V1", "V2"]):
+        for row, (ident, kind) in enumerate(outputs):
+            single, w = ac_sweep.frequency_response(O, D, E, V, source, ident,
+                                                    kind, omega)
+            assert np.allclose(resp[:, row, col], single)
+    adjoint, w = tf_matrix.response_matrix(O, D, E, V, outputs=[("L1", "I")],
+                                           omega=omega)
+    assert np.allclose(adjoint[:, 0], resp[:, outputs.index(("L1", "I"))])
+# Atrribute will_run is added to all the test functions
+test_transfer_matrix.will_run = True
+test_response_matrix.will_run = True
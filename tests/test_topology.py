@@ -0,0 +1,69 @@
+"""os and sys are used to access the program that is being tested.
+
+The program is present in the cc_params directory.
+"""
+import os
+import sys
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import prog_tf as prog
+import topology
+
+
+def test_union_find():
+    """Sets are merged once, a second union of the same set is refused."""
+    sets = topology.Union_find(5)
+    assert sets.union(0, 1) and sets.union(3, 4) and sets.union(1, 4)
+    assert not sets.union(0, 3)
+    assert sets.find(3) == sets.find(0) and sets.find(2) == 2
+
+
+def test_connectivity():
+    """
+    Test connectivity on an LC ladder, a skipped node number and an island.
+
+    The ladder has more nodes than elements on no node, which the former
+    check of check_netlist_error rejected.
+    """
+    origin, dest = [1, 1, 2, 2, 3, 3], [0, 2, 0, 3, 0, 0]
+    ele = ["V1", "L1", "C1", "L2", "C2", "R1"]
+    assert topology.unconnected_nodes(origin, dest) == []
+    assert prog.check_netlist_error(origin, dest, ele, [1.0]*6) == (0, "")
+    assert topology.unconnected_nodes([1, 2, 3, 10], [2, 3, 10, 0]) == \
+        [4, 5, 6, 7, 8, 9]
+    assert topology.unconnected_nodes([1, 2, 3], [0, 3, 2]) == [2, 3]
+
+
+def test_loops():
+    """
+    Test loops of voltage sources and structural rank.
+
+    Two voltage sources in parallel form a loop and make the descriptor
+    system structurally singular. Inductors in series form no loop.
+    """
+    origin, dest, ele = [1, 1, 1], [0, 0, 0], ["V1", "V2", "R1"]
+    assert topology.voltage_loops(origin, dest, ele) == ["V2"]
+    assert topology.structural_rank(origin, dest, ele) == (2, 3)
+    assert prog.check_netlist_error(origin, dest, ele, [1.0, 2.0, 1.0]) == \
+        (1, "Loop of voltage sources")
+    origin, dest = [1, 1, 2, 3, 3], [0, 2, 3, 0, 0]
+    ele = ["V1", "L1", "L2", "C1", "R1"]
+    assert topology.voltage_loops(origin, dest, ele) == []
+    assert topology.structural_rank(origin, dest, ele) == (6, 6)
+
+
+def test_dc_singular():
+    """
+    G is singular when a node hangs on capacitors only or when inductors and
+    voltage sources form a loop, not otherwise.
+    """
+    origin, dest = [1, 1, 2, 3], [0, 2, 3, 0]
+    assert topology.dc_singular(origin, dest, ["V1", "C1", "C2", "R1"])
+    assert not topology.dc_singular(origin, dest, ["V1", "R1", "L1", "C1"])
+    assert topology.dc_singular([1, 1, 2], [0, 2, 0], ["V1", "L1", "L2"])
+# Atrribute will_run is added to all the test functions
+test_union_find.will_run = True
+test_connectivity.will_run = True
+test_loops.will_run = True
+test_dc_singular.will_run = True
@@ -0,0 +1,81 @@
+"""numpy is used to compare the simulated waveforms against known values.
+
+os and sys are used to access the program that is being tested and present
+in the cc_params directory.
+"""
+import os
+import sys
+import numpy as np
+module_path = os.path.dirname(os.path.pardir + os.path.sep)
+module_path = os.path.join(module_path, "cc_params")
+sys.path.insert(0, os.path.abspath(module_path))
+import transient
+
+O, D = [1, 2, 1], [2, 0, 0]
+E, V = ["R1", "C1", "V1"], [1e3, 1e-6, 1.0]
+
+
+def test_simulate():
+    """
+    Test the step response of an RC circuit against 1 - exp(-t/RC).
+
+    The capacitor current must equal the resistor current at every time
+    point, and the source current is the resistor current with the sign of
+    set_volt_matrix.
+    """
+    for method, tol in (('trap', 2e-3), ('be', 1e-2)):
+        result = transient.simulate(O, D, E, V, t_end=5e-3, method=method)
+        t = result['time']
+        assert t[0] == 0.0 and np.isclose(t[-1], 5e-3)
+        assert np.allclose(result['voltage']['C1'], 1 - np.exp(-t/1e-3),
+                           atol=tol)
+        assert np.allclose(result['current']['C1'][1:],
+                           result['current']['R1'][1:])
+        assert np.allclose(result['current']['V1'], result['current']['R1'])
+        assert result['x'].shape == (len(t), 3)
+        assert result['unknowns'] == ['V_1', 'V_2', 'I_V1']
+
+
+def test_fixed_step():
+    """
+    A fixed step needs one factorization for the first backward Euler step
+    and one for all the trapezoidal steps.
+    """
+    result = transient.simulate(O, D, E, V, t_end=5e-3, h=1e-5,
+                                adaptive=False)
+    assert len(result['time']) == 501
+    assert result['factorizations'] == 2
+    assert np.allclose(result['voltage']['C1'],
+                       1 - np.exp(-result['time']/1e-3), atol=1e-4)
+
+
+def test_step_response():
+    """
+    Test the inductor current of a series RLC circuit, a sine source and the
+    default end time.
+
+    With V1 = 1 the current settles back to zero and its peak matches the
+    underdamped response C*w0/sqrt(1-z^2)*exp(-z*w0*t)*sin(wd*t). Once the
+    transient has died out, a sine source at 10^3 rad/s gives the sine
+    computed from the transfer function 1/(LCs^2 + RCs + 1).
+    """
+    o, d = [1, 2, 3, 1], [2, 3, 0, 0]
+    e, v = ["R1", "L1", "C1", "V1"], [10.0, 0.01, 1e-6, 10.0]
+    T, yout = transient.step_response(o, d, e, v, "V1", "L1", "I")
+    zeta, w0 = 0.05, 1e4
+    w_d = w0*np.sqrt(1 - zeta**2)
+    exact = 1e-6*w0/np.sqrt(1 - zeta**2)*np.exp(-zeta*w0*T)*np.sin(w_d*T)
+    assert T[-1] >= 7/(zeta*w0)
+    assert np.max(np.abs(yout - exact)) < 0.05*np.max(np.abs(exact))
+    result = transient.simulate(o, d, e, v, t_end=2e-2, sources={
+        'V1': lambda t: np.sin(1e3*t)})
+    t = result['time']
+    gain = 1/(1 - 1e-2 + 1e-2j)
+    steady = np.imag(gain*np.exp(1e3j*t))
+    late = t > 1e-2
+    assert np.allclose(result['voltage']['C1'][late], steady[late],
+                       atol=1e-2)
+# Atrribute will_run is added to all the test functions
+test_simulate.will_run = True
+test_fixed_step.will_run = True
+test_step_response.will_run = True